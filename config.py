@@ -17,5 +17,63 @@ except ZoneInfoNotFoundError:
 # Путь к базе основных данных
 DB_PATH = "../data/events.db"
 
+# Число файлов основной БД (шардов). 1 - одна база DB_PATH; больше 1 - мероприятия каждого чата
+# хранятся в одном из файлов events.db, events.shard1.db, ... (см. src/database/sharding.py)
+DB_SHARDS = int(os.getenv('DB_SHARDS', '1'))
+
 # Путь к базе данных черновиков
-DB_DRAFT_PATH = "../data/draft.db"
\ No newline at end of file
+DB_DRAFT_PATH = "../data/draft.db"
+
+# Хранилище БД: file - файлы SQLite, memory - SQLite в памяти процесса (тесты и нагрузочные замеры)
+DB_BACKEND = os.getenv('DB_BACKEND', 'file')
+
+# Размер кэша страниц SQLite на одно соединение (в КиБ)
+DB_CACHE_SIZE_KB = int(os.getenv('DB_CACHE_SIZE_KB', '16384'))
+
+# Очередь записи: интервал группового коммита (мс) и максимум операций в одной транзакции
+WRITE_BATCH_INTERVAL_MS = int(os.getenv('WRITE_BATCH_INTERVAL_MS', '5'))
+WRITE_BATCH_MAX_SIZE = int(os.getenv('WRITE_BATCH_MAX_SIZE', '100'))
+
+# Интервал сохранения черновиков из памяти в БД (секунды)
+DRAFT_FLUSH_INTERVAL_SEC = int(os.getenv('DRAFT_FLUSH_INTERVAL_SEC', '2'))
+
+# Архивация пропущенных мероприятий: через сколько часов после начала, как часто (секунды) и сколько за раз
+ARCHIVE_GRACE_HOURS = int(os.getenv('ARCHIVE_GRACE_HOURS', '24'))
+ARCHIVE_INTERVAL_SEC = int(os.getenv('ARCHIVE_INTERVAL_SEC', '3600'))
+ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', '100'))
+
+# Обслуживание БД (optimize, incremental vacuum, checkpoint): час запуска по TIMEZONE
+# и сколько страниц освобождать за раз
+DB_MAINTENANCE_HOUR = int(os.getenv('DB_MAINTENANCE_HOUR', '4'))
+DB_VACUUM_PAGES = int(os.getenv('DB_VACUUM_PAGES', '2000'))
+# Разовый перевод существующей БД в auto_vacuum=INCREMENTAL полным VACUUM при ближайшем обслуживании.
+# VACUUM перестраивает весь файл и блокирует запись на всё время работы: включать на одно окно обслуживания
+DB_VACUUM_REBUILD = os.getenv('DB_VACUUM_REBUILD', 'false').lower() in ('1', 'true', 'yes')
+
+# Срок жизни брошенного черновика (минуты с последнего изменения) и интервал их очистки (секунды)
+DRAFT_TTL_MINUTES = int(os.getenv('DRAFT_TTL_MINUTES', '60'))
+DRAFT_SWEEP_INTERVAL_SEC = int(os.getenv('DRAFT_SWEEP_INTERVAL_SEC', '600'))
+
+# Резервное копирование БД: каталог, час запуска по TIMEZONE и сколько копий каждой базы хранить
+BACKUP_DIR = os.getenv('BACKUP_DIR', '../data/backups')
+BACKUP_HOUR = int(os.getenv('BACKUP_HOUR', '3'))
+BACKUP_KEEP = int(os.getenv('BACKUP_KEEP', '7'))
+# Копирование порциями: страниц за шаг и пауза между шагами (мс), чтобы не задерживать запись
+BACKUP_PAGES_PER_STEP = int(os.getenv('BACKUP_PAGES_PER_STEP', '256'))
+BACKUP_STEP_SLEEP_MS = int(os.getenv('BACKUP_STEP_SLEEP_MS', '10'))
+# Проверять копию PRAGMA quick_check перед сохранением
+BACKUP_VERIFY = os.getenv('BACKUP_VERIFY', 'true').lower() in ('1', 'true', 'yes')
+
+# Блокировки SQLite: сколько ждать освобождения БД внутри запроса (мс),
+# сколько раз повторять запрос после "database is locked" и базовая задержка повтора (мс)
+DB_BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', '5000'))
+DB_LOCK_RETRIES = int(os.getenv('DB_LOCK_RETRIES', '3'))
+DB_LOCK_RETRY_BASE_MS = int(os.getenv('DB_LOCK_RETRY_BASE_MS', '50'))
+
+# Кэш мероприятий в памяти: максимум мероприятий и время жизни записи (секунды); 0 - кэш отключён
+EVENT_CACHE_SIZE = int(os.getenv('EVENT_CACHE_SIZE', '1000'))
+EVENT_CACHE_TTL_SEC = int(os.getenv('EVENT_CACHE_TTL_SEC', '60'))
+
+# Чтение: число потоков с соединениями только для чтения и объём файла БД, отображаемый в память (МиБ)
+DB_READER_THREADS = int(os.getenv('DB_READER_THREADS', '4'))
+DB_MMAP_SIZE_MB = int(os.getenv('DB_MMAP_SIZE_MB', '64'))
@@ -1,10 +1,16 @@
 import logging
+from datetime import time as dt_time
 
 from telegram import Update
 from telegram.ext import Application, CommandHandler, ContextTypes, TypeHandler
-from config import DB_PATH, tz, DB_DRAFT_PATH
-from src.database.init_database import init_db
+from config import DB_PATH, tz, DB_DRAFT_PATH, DRAFT_FLUSH_INTERVAL_SEC, ARCHIVE_INTERVAL_SEC, \
+    DB_MAINTENANCE_HOUR, DRAFT_SWEEP_INTERVAL_SEC, BACKUP_HOUR, DB_SHARDS
+from src.database.connection import close_all_connections
+from src.database.db_executor import run_db, shutdown_db_executor
+from src.database.draft_store import flush_all_drafts
+from src.database.write_queue import flush_writes
 from src.database.init_draft_database import init_drafts_db
+from src.database.sharding import init_shards
 from src.handlers.cancel_handler import register_cancel_handlers
 from src.handlers.draft_handlers import register_draft_handlers
 
@@ -16,6 +22,10 @@ from src.handlers.mention_handler import register_mention_handler
 from src.buttons.menu_button_handlers import  register_menu_button_handler
 from src.buttons.button_handlers import  register_button_handler
 from src.buttons.create_event_button import register_create_handlers
+from src.jobs.archive_jobs import archive_expired_events_job
+from src.jobs.backup_jobs import backup_job
+from src.jobs.draft_jobs import flush_drafts_job, sweep_expired_drafts_job
+from src.jobs.maintenance_jobs import db_maintenance_job
 from src.jobs.notification_jobs import restore_scheduled_jobs
 import os
 from dotenv import load_dotenv
@@ -37,11 +47,18 @@ def main():
         level=logging.INFO,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
+    async def on_shutdown(application: Application):
+        # Фиксируем очередь записи и черновики, дожидаемся запросов в потоке БД и закрываем соединения
+        await flush_writes()
+        await run_db(flush_all_drafts)
+        shutdown_db_executor()
+        close_all_connections()
+
     # Создаём приложение и передаём токен
-    application = Application.builder().token(BOT_TOKEN).build()
+    application = Application.builder().token(BOT_TOKEN).post_shutdown(on_shutdown).build()
 
     # Инициализация баз данных
-    init_db(DB_PATH)
+    init_shards(DB_PATH, DB_SHARDS)
     init_drafts_db(DB_DRAFT_PATH)
 
     # Сохраняем данные в context.bot_data
@@ -73,6 +90,30 @@ def main():
     # Восстанавливаем запланированные задачи
     restore_scheduled_jobs(application)
 
+    # Периодическое сохранение черновиков из памяти в БД
+    application.job_queue.run_repeating(
+        flush_drafts_job, interval=DRAFT_FLUSH_INTERVAL_SEC, first=DRAFT_FLUSH_INTERVAL_SEC, name="flush_drafts"
+    )
+
+    # Очистка брошенных черновиков
+    application.job_queue.run_repeating(
+        sweep_expired_drafts_job, interval=DRAFT_SWEEP_INTERVAL_SEC, first=DRAFT_SWEEP_INTERVAL_SEC,
+        name="sweep_expired_drafts"
+    )
+
+    # Перенос в архив прошедших мероприятий, пропущенных задачами unpin_delete
+    application.job_queue.run_repeating(
+        archive_expired_events_job, interval=ARCHIVE_INTERVAL_SEC, first=60, name="archive_expired_events"
+    )
+
+    # Ежедневное обслуживание БД в часы наименьшей нагрузки
+    application.job_queue.run_daily(
+        db_maintenance_job, time=dt_time(hour=DB_MAINTENANCE_HOUR, tzinfo=tz), name="db_maintenance"
+    )
+
+    # Ежедневное резервное копирование БД
+    application.job_queue.run_daily(backup_job, time=dt_time(hour=BACKUP_HOUR, tzinfo=tz), name="db_backup")
+
     #Обработчики отмены
     register_cancel_handlers(application)
 
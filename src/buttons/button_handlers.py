@@ -5,21 +5,18 @@ from telegram.error import BadRequest
 from telegram.ext import ContextTypes, CallbackQueryHandler
 from src.database.db_operations import (
     get_event,
-    add_participant,
-    remove_participant,
-    add_to_declined,
-    remove_from_reserve,
-    remove_from_declined,
-    is_user_in_participants,
-    is_user_in_reserve,
-    get_participants_count,
-    add_to_reserve,
-    get_reserve,
-    is_user_in_declined,
-    delete_event,
-    get_participants
+    get_event_header,
+    apply_join_event,
+    apply_leave_event,
+    archive_event,
+    ARCHIVE_REASON_DELETED,
+    STATUS_PARTICIPANT,
+    STATUS_RESERVE,
+    STATUS_DECLINED,
 )
 from src.database.db_draft_operations import add_draft
+from src.database.db_executor import run_db, run_db_read
+from src.database.write_queue import queue_write
 
 from src.handlers.template_handlers import handle_save_template, handle_use_template, handle_delete_template, \
     handle_my_templates
@@ -116,57 +113,48 @@ async def handle_join(query, context, event_id):
     """Обработка нажатия 'Участвовать'"""
     user = query.from_user
     db_path = context.bot_data["db_path"]
-    event = get_event(db_path, event_id)
+    user_name = f"{user.first_name} (@{user.username})" if user.username else f"{user.first_name} (ID: {user.id})"
 
-    if not event:
+    # Проверка статуса, лимита и запись выполняются одной транзакцией (общей с другими нажатиями);
+    # ответ отправляется только после фиксации
+    result = await queue_write(db_path, apply_join_event, event_id, user.id, user_name)
+
+    if not result:
         await query.answer("Мероприятие не найдено.")
         return
 
-    user_id = user.id
-    user_name = f"{user.first_name} (@{user.username})" if user.username else f"{user.first_name} (ID: {user.id})"
-
-    if is_user_in_declined(db_path, event_id, user_id):
-        remove_from_declined(db_path, event_id, user_id)
-
-    if is_user_in_participants(db_path, event_id, user_id) or is_user_in_reserve(db_path, event_id, user_id):
+    if not result["changed"]:
         await query.answer("Вы уже в списке участников или резерва.")
         return
 
-    if event["participant_limit"] is None or get_participants_count(db_path, event_id) < event["participant_limit"]:
-        add_participant(db_path, event_id, user_id, user_name)
+    if result["status"] == STATUS_PARTICIPANT:
         await query.answer(f"{user_name}, вы добавлены в список участников!")
     else:
-        add_to_reserve(db_path, event_id, user_id, user_name)
         await query.answer(f"{user_name}, вы добавлены в резерв.")
 
-    await update_event_message(context, event_id, query.message)
+    await update_event_message(context, event_id, query.message, event=result["event"])
 
 
 async def handle_leave(query, context, event_id):
     """Обработка нажатия 'Не участвовать'"""
     user = query.from_user
     db_path = context.bot_data["db_path"]
-    event = get_event(db_path, event_id)
+    user_name = f"{user.first_name} (@{user.username})" if user.username else f"{user.first_name} (ID: {user.id})"
 
-    if not event:
+    # Отказ и повышение из резерва выполняются одной транзакцией (общей с другими нажатиями)
+    result = await queue_write(db_path, apply_leave_event, event_id, user.id, user_name)
+
+    if not result:
         await query.answer("Мероприятие не найдено.")
         return
 
-    user_id = user.id
-    user_name = f"{user.first_name} (@{user.username})" if user.username else f"{user.first_name} (ID: {user.id})"
-
-    if is_user_in_participants(db_path, event_id, user_id):
-        remove_participant(db_path, event_id, user_id)
-        add_to_declined(db_path, event_id, user_id, user_name)
-
-        reserve = get_reserve(db_path, event_id)
-        if reserve:
-            new_participant = reserve[0]
-            remove_from_reserve(db_path, event_id, new_participant["user_id"])
-            add_participant(db_path, event_id, new_participant["user_id"], new_participant["user_name"])
+    previous_status = result["previous_status"]
+    new_participant = result["promoted"]
 
+    if previous_status == STATUS_PARTICIPANT:
+        if new_participant:
             await context.bot.send_message(
-                chat_id=event["chat_id"],
+                chat_id=result["event"]["chat_id"],
                 text=f"👋 {user_name} больше не участвует в мероприятии.\n"
                      f"🎉 {new_participant['user_name']} был(а) перемещён(а) из резерва в список участников!",
             )
@@ -178,25 +166,22 @@ async def handle_leave(query, context, event_id):
         else:
             await query.answer(f"{user_name}, вы удалены из списка участников и добавлены в список отказавшихся.")
 
-    elif is_user_in_reserve(db_path, event_id, user_id):
-        remove_from_reserve(db_path, event_id, user_id)
-        add_to_declined(db_path, event_id, user_id, user_name)
+    elif previous_status == STATUS_RESERVE:
         await query.answer(f"{user_name}, вы удалены из резерва и добавлены в список отказавшихся.")
 
-    elif is_user_in_declined(db_path, event_id, user_id):
+    elif previous_status == STATUS_DECLINED:
         await query.answer("Вы уже в списке отказавшихся.")
         return
 
     else:
-        add_to_declined(db_path, event_id, user_id, user_name)
         await query.answer(f"{user_name}, вы добавлены в список отказавшихся.")
 
-    await update_event_message(context, event_id, query.message)
+    await update_event_message(context, event_id, query.message, event=result["event"])
 
 # Новая логика редактирования
 async def handle_edit_event(query, context, event_id):
     """Обработка нажатия кнопки 'Редактировать'"""
-    event = get_event(context.bot_data["db_path"], event_id)
+    event = await run_db_read(get_event_header, context.bot_data["db_path"], event_id)
 
     if not event:
         await query.answer("Мероприятие не найдено", show_alert=False)
@@ -237,21 +222,29 @@ async def handle_edit_event(query, context, event_id):
 async def handle_edit_field(query, context, event_id, field):
     """Обработка выбора поля для редактирования с полной проверкой данных"""
     try:
-        # Получаем полные данные о мероприятии
-        event = get_event(context.bot_data["db_path"], event_id)
-        if not event:
+        header = await run_db_read(get_event_header, context.bot_data["db_path"], event_id)
+        if not header:
             logger.error(f"Мероприятие {event_id} не найдено при редактировании")
             await query.edit_message_text("❌ Мероприятие не найдено")
             return
 
         # Проверяем авторство
-        if query.from_user.id != event["creator_id"]:
-            logger.warning(f"Попытка редактирования не автором: user={query.from_user.id}, creator={event['creator_id']}")
+        if query.from_user.id != header["creator_id"]:
+            logger.warning(
+                f"Попытка редактирования не автором: user={query.from_user.id}, creator={header['creator_id']}"
+            )
             await query.answer("❌ Только автор может редактировать мероприятие", show_alert=False)
             return
 
+        # Получаем полные данные о мероприятии (только для автора)
+        event = await run_db_read(get_event, context.bot_data["db_path"], event_id)
+        if not event:
+            await query.edit_message_text("❌ Мероприятие не найдено")
+            return
+
         # Создаем черновик с полным набором данных
-        draft_id = add_draft(
+        draft_id = await run_db(
+            add_draft,
             db_path=context.bot_data["drafts_db_path"],
             creator_id=query.from_user.id,
             chat_id=query.message.chat_id,
@@ -311,11 +304,14 @@ async def handle_edit_field(query, context, event_id, field):
             await query.answer("⚠️ Ошибка! Попробуйте ещё раз", show_alert=False)
 
 
-async def update_event_message(context, event_id, message):
-    """Обновляет сообщение о мероприятии"""
+async def update_event_message(context, event_id, message, event=None):
+    """
+    Обновляет сообщение о мероприятии.
+    Если данные мероприятия уже получены (например, из join_event), повторно они не читаются.
+    """
     try:
-        db_path = context.bot_data["db_path"]
-        event = get_event(db_path, event_id)
+        if event is None:
+            event = await run_db_read(get_event, context.bot_data["db_path"], event_id)
         if not event:
             logger.error(f"Мероприятие {event_id} не найдено")
             return
@@ -328,7 +324,8 @@ async def update_event_message(context, event_id, message):
                     event_id=event_id,
                     context=context,
                     chat_id=message.chat.id,
-                    message_id=event.get("message_id")
+                    message_id=event.get("message_id"),
+                    event=event
                 )
                 break
             except Exception as e:
@@ -344,7 +341,7 @@ async def update_event_message(context, event_id, message):
 async def handle_confirm_delete(query, context, event_id):
     """Показывает подтверждение удаления с проверкой авторства"""
     try:
-        event = get_event(context.bot_data["db_path"], event_id)
+        event = await run_db_read(get_event_header, context.bot_data["db_path"], event_id)
 
         if not event:
             await query.answer("Мероприятие не найдено", show_alert=False)
@@ -372,7 +369,7 @@ async def handle_confirm_delete(query, context, event_id):
 async def handle_delete_event(query, context, event_id):
     """Обработчик удаления мероприятия с отправкой уведомления автору в ЛС"""
     try:
-        event = get_event(context.bot_data["db_path"], event_id)
+        event = await run_db_read(get_event, context.bot_data["db_path"], event_id)
 
         if not event:
             await query.answer("⚠️ Мероприятие не найдено", show_alert=False)
@@ -414,8 +411,8 @@ async def handle_delete_event(query, context, event_id):
         # Удаляем задачи на уведомления
         remove_existing_notification_jobs(event_id, context)
 
-        # Удаляем мероприятие из базы данных
-        delete_event(context.bot_data["db_path"], event_id)
+        # Переносим мероприятие в архив
+        await run_db(archive_event, context.bot_data["db_path"], event_id, ARCHIVE_REASON_DELETED)
 
         # Удаляем сообщение о мероприятии из чата
         try:
@@ -445,9 +442,8 @@ async def handle_delete_event(query, context, event_id):
                 text=f"✅ Мероприятие удалено (не удалось отправить уведомление в ЛС)"
             )
 
-        # Уведомляем участников
-        participants = get_participants(context.bot_data["db_path"], event_id)
-        for participant in participants:
+        # Уведомляем участников (список получен вместе с мероприятием до удаления)
+        for participant in event["participants"]:
             # Не уведомляем автора повторно
             if participant["user_id"] != creator.id:
                 try:
@@ -483,7 +479,7 @@ async def handle_delete_event(query, context, event_id):
 async def handle_cancel_delete(query, context, event_id):
     """Обработчик отмены удаления с проверкой авторства"""
     try:
-        event = get_event(context.bot_data["db_path"], event_id)
+        event = await run_db_read(get_event_header, context.bot_data["db_path"], event_id)
         if not event:
             await query.answer("Мероприятие не найдено", show_alert=False)
             return
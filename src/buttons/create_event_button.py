@@ -1,6 +1,7 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CallbackQueryHandler
 from src.database.db_draft_operations import add_draft, get_user_chat_draft, update_draft, delete_draft
+from src.database.db_executor import run_db
 from src.logger.logger import logger
 
 async def create_event_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -20,7 +21,8 @@ async def create_event_button(update: Update, context: ContextTypes.DEFAULT_TYPE
 
         # Создаем черновик
         print("⏺ Добавление черновика:", context.bot_data["drafts_db_path"], creator_id, chat_id)
-        draft_id = add_draft(
+        draft_id = await run_db(
+            add_draft,
             db_path=context.bot_data["drafts_db_path"],
             creator_id=creator_id,
             chat_id=chat_id,
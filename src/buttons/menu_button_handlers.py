@@ -3,7 +3,8 @@ from telegram.ext import ContextTypes, CallbackQueryHandler
 
 
 from src.database.db_draft_operations import get_draft
-from src.database.db_operations import get_event
+from src.database.db_executor import run_db_read
+from src.database.db_operations import get_event_header
 from src.buttons.button_handlers import handle_cancel_delete, handle_confirm_delete
 from src.buttons.create_event_button import create_event_button
 from src.buttons.my_events_button import my_events_button
@@ -42,7 +43,7 @@ async def menu_button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
 
                 # Для черновиков редактирования проверяем авторство мероприятия
                 if draft.get("event_id"):
-                    event = get_event(context.bot_data["db_path"], draft["event_id"])
+                    event = await run_db_read(get_event_header, context.bot_data["db_path"], draft["event_id"])
                     if event and query.from_user.id != event["creator_id"]:
                         await query.answer("❌ Только автор может отменить редактирование", show_alert=False)
                         return
@@ -56,7 +57,7 @@ async def menu_button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
 
             elif data.startswith("cancel_edit|"):
                 event_id = int(data.split('|')[1])
-                event = get_event(context.bot_data["db_path"], event_id)
+                event = await run_db_read(get_event_header, context.bot_data["db_path"], event_id)
 
                 if not event:
                     await query.answer("Мероприятие не найдено", show_alert=False)
@@ -71,7 +72,7 @@ async def menu_button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
 
             elif data.startswith("confirm_delete|"):
                 event_id = int(data.split('|')[1])
-                event = get_event(context.bot_data["db_path"], event_id)
+                event = await run_db_read(get_event_header, context.bot_data["db_path"], event_id)
 
                 if not event:
                     await query.answer("Мероприятие не найдено", show_alert=False)
@@ -88,7 +89,7 @@ async def menu_button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
 
                 event_id = int(data.split('|')[1])
 
-                event = get_event(context.bot_data["db_path"], event_id)
+                event = await run_db_read(get_event_header, context.bot_data["db_path"], event_id)
 
                 if not event:
                     await query.answer("Мероприятие не найдено", show_alert=False)
@@ -114,7 +115,7 @@ async def menu_button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
 
                 # Для черновиков редактирования проверяем авторство
                 if draft.get("event_id"):
-                    event = get_event(context.bot_data["db_path"], draft["event_id"])
+                    event = await run_db_read(get_event_header, context.bot_data["db_path"], draft["event_id"])
                     if event and query.from_user.id != event["creator_id"]:
                         await query.answer("❌ Только автор может отменить ввод", show_alert=False)
                         return
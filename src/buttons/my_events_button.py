@@ -1,6 +1,7 @@
 from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
 
+from src.database.db_executor import run_db_read
 from src.database.db_operations import get_events_by_participant
 from src.logger.logger import logger
 
@@ -13,7 +14,7 @@ async def my_events_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
     db_path = context.bot_data["db_path"]
 
     # Получаем мероприятия, в которых участвует пользователь
-    events = get_events_by_participant(db_path, user_id)
+    events = await run_db_read(get_events_by_participant, db_path, user_id)
 
     if not events:
         await query.answer("Вы не участвуете ни в одном мероприятии.", show_alert=False)
@@ -43,7 +44,12 @@ async def my_events_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
         message_text += f"💬 <b>{chat_name}</b> ({chat_link}):\n"
         for event in events_in_chat:
             event_link = f"https://t.me/c/{str(chat_id).replace('-100', '')}/{event['message_id']}"
-            message_text += f"  - <a href='{event_link}'>📅 {event['description']}</a> ({event['date']} {event['time']})\n"
+            # Количество участников берётся из счётчика в events, списки не загружаются
+            limit = event["participant_limit"] or "∞"
+            message_text += (
+                f"  - <a href='{event_link}'>📅 {event['description']}</a> ({event['date']} {event['time']}), "
+                f"👥 {event['participants_count']}/{limit}\n"
+            )
         message_text += "\n"
 
     # Отправляем сообщение в личный чат с пользователем
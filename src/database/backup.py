@@ -0,0 +1,83 @@
+import glob
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+from config import BACKUP_KEEP, BACKUP_PAGES_PER_STEP, BACKUP_STEP_SLEEP_MS, BACKUP_VERIFY
+from src.database.connection import get_backend
+from src.logger.logger import logger
+
+
+def backup_database(db_path, backup_dir, keep=BACKUP_KEEP, pages=BACKUP_PAGES_PER_STEP,
+                    step_sleep_ms=BACKUP_STEP_SLEEP_MS, verify=BACKUP_VERIFY):
+    """
+    Создаёт копию работающей базы через онлайн-API резервного копирования SQLite.
+    Страницы копируются порциями по pages с паузой step_sleep_ms после каждой порции:
+    блокировка чтения держится только на время порции, а запись из бота продолжается.
+    Если между порциями базу изменило другое соединение, SQLite начинает копирование
+    заново, поэтому при частой записи стоит увеличить pages или уменьшить паузу.
+    Вызывать в отдельном потоке (asyncio.to_thread), не в потоке БД.
+    :param db_path: Путь к базе данных.
+    :param backup_dir: Каталог для копий.
+    :param keep: Сколько последних копий этой базы хранить.
+    :param pages: Страниц за одну порцию.
+    :param step_sleep_ms: Пауза между порциями (мс).
+    :param verify: Проверить копию PRAGMA quick_check; непрошедшая проверку копия удаляется.
+    :return: Путь к созданной копии или None при ошибке.
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(db_path))[0]
+    target = os.path.join(backup_dir, f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.db")
+    partial = f"{target}.part"
+    started = time.monotonic()
+
+    try:
+        # Отдельное соединение: постоянные соединения принадлежат потоку БД
+        source = get_backend().connect(os.path.abspath(db_path))
+        destination = sqlite3.connect(partial)
+        try:
+            # sleep= у Connection.backup действует только при BUSY/LOCKED,
+            # паузу между порциями делает progress (вызывается после каждой порции)
+            source.backup(destination, pages=pages, progress=_step_pause(step_sleep_ms))
+            # Копия наследует режим WAL; переводим её в обычный журнал, чтобы она была одним файлом
+            destination.execute("PRAGMA journal_mode=DELETE")
+            if verify:
+                result = destination.execute("PRAGMA quick_check").fetchone()[0]
+                if result != "ok":
+                    raise sqlite3.DatabaseError(f"quick_check: {result}")
+        finally:
+            destination.close()
+            source.close()
+        os.replace(partial, target)
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка резервного копирования БД {db_path}: {e}")
+        if os.path.exists(partial):
+            os.remove(partial)
+        return None
+
+    logger.info(
+        f"Резервная копия БД {db_path} сохранена в {target}: "
+        f"{os.path.getsize(target)} байт, {int((time.monotonic() - started) * 1000)} мс"
+    )
+    _rotate_backups(backup_dir, name, keep)
+    return target
+
+
+def _step_pause(step_sleep_ms):
+    """Обработчик progress для Connection.backup: пауза после каждой порции, кроме последней."""
+    def progress(status, remaining, total):
+        if remaining and step_sleep_ms > 0:
+            time.sleep(step_sleep_ms / 1000)
+    return progress
+
+
+def _rotate_backups(backup_dir, name, keep):
+    """Удаляет старые копии базы name, оставляя keep последних."""
+    backups = sorted(glob.glob(os.path.join(backup_dir, f"{glob.escape(name)}-*.db")))
+    for path in backups[:-keep] if keep > 0 else []:
+        try:
+            os.remove(path)
+            logger.info(f"Удалена старая резервная копия {path}")
+        except OSError as e:
+            logger.warning(f"Не удалось удалить резервную копию {path}: {e}")
@@ -0,0 +1,364 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote
+
+from config import DB_BACKEND, DB_BUSY_TIMEOUT_MS, DB_CACHE_SIZE_KB, DB_MMAP_SIZE_MB
+from src.logger.logger import logger
+
+# Постоянные соединения живут в пределах потока: sqlite3.Connection нельзя
+# безопасно разделять между потоками. Запросы обработчиков выполняются
+# в выделенном потоке БД (см. db_executor), синхронные вызовы - в своём потоке.
+_local = threading.local()
+_registry_lock = threading.Lock()
+# Словари соединений всех потоков: {путь: соединение, (путь, "read"): соединение для чтения}
+_thread_connections = []
+
+
+class Connection(sqlite3.Connection):
+    """
+    Соединение с отложенными действиями: действия, добавленные after_commit внутри транзакции,
+    выполняются после её фиксации и отбрасываются при откате.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._after_commit = []
+
+    def commit(self):
+        try:
+            super().commit()
+        except BaseException:
+            self._after_commit.clear()
+            raise
+        self._run_after_commit()
+
+    def rollback(self):
+        self._after_commit.clear()
+        super().rollback()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Контекстный менеджер sqlite3 фиксирует и откатывает транзакцию без вызова commit/rollback
+        try:
+            result = super().__exit__(exc_type, exc_value, traceback)
+        except BaseException:
+            self._after_commit.clear()
+            raise
+        if exc_type is None:
+            self._run_after_commit()
+        else:
+            self._after_commit.clear()
+        return result
+
+    def after_commit_mark(self):
+        """Отметка очереди отложенных действий (перед SAVEPOINT)."""
+        return len(self._after_commit)
+
+    def discard_after_commit(self, mark):
+        """Отбрасывает действия, добавленные после mark (при ROLLBACK TO точки сохранения)."""
+        del self._after_commit[mark:]
+
+    def _run_after_commit(self):
+        actions, self._after_commit = self._after_commit, []
+        for action in actions:
+            action()
+
+
+def after_commit(conn, action):
+    """
+    Выполняет action() после фиксации текущей транзакции conn (сразу, если транзакции нет).
+    При откате транзакции действие не выполняется.
+    :param conn: Соединение, полученное через get_connection.
+    """
+    if conn.in_transaction and isinstance(conn, Connection):
+        conn._after_commit.append(action)
+    else:
+        action()
+
+
+class SQLiteFileBackend:
+    """Хранилище в файлах SQLite (по умолчанию)."""
+    name = "file"
+
+    def connect(self, path):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        # Соединение используется только потоком-владельцем; проверка потока отключена,
+        # чтобы close_all_connections мог закрыть его при остановке из другого потока
+        return sqlite3.connect(path, check_same_thread=False, factory=Connection)
+
+    def connect_read_only(self, path):
+        """Соединение только для чтения (файл открывается с mode=ro)."""
+        return sqlite3.connect(f"file:{quote(path)}?mode=ro", uri=True, check_same_thread=False)
+
+    def attach_target(self, path):
+        """Имя базы для ATTACH и то, как её показывает PRAGMA database_list."""
+        return path
+
+    def reset(self):
+        pass
+
+
+class SQLiteMemoryBackend:
+    """
+    Хранилище в памяти процесса: для тестов и нагрузочных замеров без дискового ввода-вывода.
+    Каждому пути соответствует общая (cache=shared) база в памяти; все соединения
+    процесса с одним путём видят одни данные. База живёт, пока открыто служебное
+    соединение-якорь, то есть до reset() или завершения процесса.
+    """
+    name = "memory"
+
+    def __init__(self):
+        self._anchors = {}
+        self._lock = threading.Lock()
+
+    def _uri(self, path):
+        return f"file:{quote(path)}?mode=memory&cache=shared"
+
+    def connect(self, path):
+        uri = self._uri(path)
+        with self._lock:
+            if path not in self._anchors:
+                self._anchors[path] = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        return sqlite3.connect(uri, uri=True, check_same_thread=False, factory=Connection)
+
+    # Общий кэш баз в памяти не даёт читателям изоляции от писателя (нет WAL),
+    # поэтому чтение идёт через обычные соединения
+    connect_read_only = None
+
+    def attach_target(self, path):
+        # Базы в памяти PRAGMA database_list показывает с пустым именем файла
+        return self._uri(path)
+
+    def reset(self):
+        """Удаляет все базы в памяти."""
+        with self._lock:
+            anchors = list(self._anchors.values())
+            self._anchors.clear()
+        for anchor in anchors:
+            anchor.close()
+
+
+BACKENDS = {
+    SQLiteFileBackend.name: SQLiteFileBackend,
+    SQLiteMemoryBackend.name: SQLiteMemoryBackend,
+}
+_backend = BACKENDS[DB_BACKEND]()
+
+
+def get_backend():
+    """Возвращает текущее хранилище."""
+    return _backend
+
+
+def set_backend(backend):
+    """
+    Переключает хранилище (например, на SQLiteMemoryBackend в тестах и замерах).
+    Открытые соединения прежнего хранилища закрываются.
+    :return: Прежнее хранилище.
+    """
+    global _backend
+    close_all_connections()
+    previous, _backend = _backend, backend
+    logger.info(f"Хранилище БД: {backend.name}")
+    return previous
+
+
+def _normalize_path(db_path):
+    """Приводит путь к БД к абсолютному виду, чтобы один файл имел одно соединение."""
+    return os.path.abspath(os.fspath(db_path))
+
+
+def _configure_connection(conn):
+    """
+    Настраивает соединение: WAL-журнал, synchronous=NORMAL и увеличенный кэш страниц.
+    В режиме WAL с synchronous=NORMAL fsync выполняется только при checkpoint,
+    а не на каждый commit. Внешние ключи в SQLite по умолчанию выключены
+    для каждого соединения, без них не работает ON DELETE CASCADE.
+    """
+    conn.row_factory = sqlite3.Row
+    # Сколько ждать снятия чужой блокировки, прежде чем вернуть "database is locked"
+    conn.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{DB_CACHE_SIZE_KB}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+
+
+def is_lock_error(error):
+    """Ошибка вызвана блокировкой БД другим соединением (SQLITE_BUSY/SQLITE_LOCKED)."""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+
+def reraise_if_locked(error):
+    """
+    Пробрасывает ошибку блокировки дальше: её обрабатывает run_db, повторяя вызов с задержкой.
+    Вызывать в обработчиках sqlite3.Error функций, которые возвращают None/False при прочих ошибках.
+    """
+    if is_lock_error(error):
+        raise error
+
+
+def _open_connection(path):
+    """Открывает и настраивает новое соединение с БД через текущее хранилище."""
+    conn = _backend.connect(path)
+    _configure_connection(conn)
+    logger.info(f"Открыто постоянное соединение с БД {path} ({_backend.name})")
+    return conn
+
+
+def _current_thread_connections():
+    """Словарь постоянных соединений текущего потока (создаётся и регистрируется при первом обращении)."""
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+        with _registry_lock:
+            _thread_connections.append(connections)
+    return connections
+
+
+def get_connection(db_path):
+    """
+    Возвращает постоянное соединение с базой данных для текущего потока.
+    Соединение создаётся при первом обращении и переиспользуется дальше.
+    Использовать как контекстный менеджер: `with get_connection(path) as conn:`
+    фиксирует транзакцию при успехе и откатывает при ошибке, но не закрывает соединение.
+    :param db_path: Путь к файлу базы данных.
+    :return: Объект соединения с базой данных.
+    """
+    connections = _current_thread_connections()
+
+    path = _normalize_path(db_path)
+    conn = connections.get(path)
+    if conn is None:
+        conn = connections[path] = _open_connection(path)
+    return conn
+
+
+def in_write_transaction(db_path):
+    """
+    Открыта ли в текущем потоке транзакция на постоянном соединении с БД (не на соединении
+    только для чтения). Новое соединение при проверке не открывается.
+    :param db_path: Путь к файлу базы данных.
+    """
+    conn = _current_thread_connections().get(_normalize_path(db_path))
+    return conn is not None and conn.in_transaction
+
+
+def _open_read_connection(path):
+    """Открывает соединение только для чтения: query_only, отображение файла в память."""
+    conn = _backend.connect_read_only(path)
+    # Без неявных BEGIN модуля sqlite3: транзакции чтения открывает только read_snapshot
+    conn.isolation_level = None
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA query_only=ON")
+    conn.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE_MB * 1024 * 1024}")
+    conn.execute(f"PRAGMA cache_size=-{DB_CACHE_SIZE_KB}")
+    logger.info(f"Открыто соединение для чтения с БД {path}")
+    return conn
+
+
+def get_read_connection(db_path):
+    """
+    Возвращает постоянное соединение только для чтения для текущего потока.
+    В режиме WAL читатели не ждут писателей: каждая транзакция чтения видит
+    последнее зафиксированное состояние на момент своего начала. Если хранилище
+    не поддерживает отдельных читателей, возвращается обычное соединение.
+    :param db_path: Путь к файлу базы данных.
+    """
+    if _backend.connect_read_only is None:
+        return get_connection(db_path)
+
+    connections = _current_thread_connections()
+
+    path = _normalize_path(db_path)
+    key = (path, "read")
+    conn = connections.get(key)
+    if conn is None:
+        conn = connections[key] = _open_read_connection(path)
+    return conn
+
+
+@contextmanager
+def read_snapshot(db_path):
+    """
+    Выполняет несколько запросов чтения в одной транзакции (один снимок WAL),
+    например мероприятие и его списки. Для чтения используется соединение get_read_connection.
+    :param db_path: Путь к файлу базы данных.
+    """
+    conn = get_read_connection(db_path)
+    if conn.in_transaction:
+        # Отдельных читателей нет, а обычное соединение уже в транзакции: читаем в ней же
+        yield conn
+        return
+
+    conn.execute("BEGIN")
+    try:
+        yield conn
+    finally:
+        conn.rollback()
+
+
+def close_all_connections():
+    """Закрывает все открытые постоянные соединения (при остановке бота и в тестах)."""
+    connections = []
+    with _registry_lock:
+        # Словари потоков очищаются, поэтому следующее обращение из любого потока откроет новое соединение
+        for thread_connections in _thread_connections:
+            connections.extend(thread_connections.values())
+            thread_connections.clear()
+
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Ошибка при закрытии соединения с БД: {e}")
+
+
+@contextmanager
+def immediate_transaction(db_path):
+    """
+    Открывает транзакцию BEGIN IMMEDIATE на постоянном соединении.
+    Блокировка записи берётся сразу, поэтому параллельные писатели не успеют
+    изменить прочитанные внутри транзакции данные. Фиксирует изменения при успехе
+    и откатывает при любой ошибке.
+    :param db_path: Путь к файлу базы данных.
+    """
+    conn = get_connection(db_path)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+
+
+def attach_database(db_path, alias, attached_path):
+    """
+    Подключает (ATTACH) другой файл БД к постоянному соединению db_path под именем alias,
+    чтобы изменять обе базы одной транзакцией. Повторный вызов ничего не делает.
+    :param db_path: Путь к основной базе данных.
+    :param alias: Имя схемы подключённой базы в запросах (alias.table).
+    :param attached_path: Путь к подключаемой базе данных.
+    :return: Постоянное соединение с основной базой.
+    """
+    conn = get_connection(db_path)
+    attached = {row["name"]: row["file"] for row in conn.execute("PRAGMA database_list")}
+    path = _normalize_path(attached_path)
+    target = _backend.attach_target(path)
+    if alias in attached and (attached[alias] == target or _backend.name == SQLiteMemoryBackend.name):
+        return conn
+    if alias in attached:
+        conn.execute(f"DETACH DATABASE {alias}")
+
+    conn.execute(f"ATTACH DATABASE ? AS {alias}", (target,))
+    conn.execute(f"PRAGMA {alias}.synchronous=NORMAL")
+    logger.info(f"База {path} подключена к соединению {_normalize_path(db_path)} как {alias}")
+    return conn
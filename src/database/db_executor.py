@@ -0,0 +1,128 @@
+import asyncio
+import functools
+import os
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from config import DB_LOCK_RETRIES, DB_LOCK_RETRY_BASE_MS, DB_READER_THREADS
+from src.database.connection import is_lock_error
+from src.database.sharding import writer_shard_path
+from src.logger.logger import logger
+
+# Все запросы обработчиков выполняются в одном выделенном потоке: у него свои
+# постоянные соединения (см. connection.get_connection), а запись в один файл SQLite
+# и так последовательна, поэтому больше одного потока на файл не даёт выигрыша.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db")
+# При шардировании (DB_SHARDS > 1) у каждого дополнительного шарда свой поток записи:
+# у файлов шардов независимые блокировки, и запись в разных чатах идёт параллельно.
+# {путь к шарду: поток записи}; шард 0 пишет в потоке _executor
+_shard_executors = {}
+_shard_executors_lock = threading.Lock()
+# Чтение (отрисовка мероприятий, уведомления) идёт в отдельном пуле потоков
+# с соединениями только для чтения: в режиме WAL оно не ждёт писателя и поток БД.
+_read_executor = ThreadPoolExecutor(max_workers=DB_READER_THREADS, thread_name_prefix="db-read")
+
+# Счётчики блокировок: lock_errors - запросы, получившие "database is locked",
+# retries - повторы, failures - запросы, не выполненные после всех повторов,
+# lock_wait_ms - время, потерянное на заблокированные попытки и паузы между ними
+_lock_stats = Counter()
+_lock_stats_lock = threading.Lock()
+
+
+async def run_db(func, *args, **kwargs):
+    """
+    Выполняет синхронную функцию работы с БД в потоке БД, не блокируя событийный цикл.
+    Пример: `event = await run_db(get_event, db_path, event_id)`.
+    Если БД осталась заблокированной дольше busy_timeout, вызов повторяется до DB_LOCK_RETRIES раз
+    со случайной задержкой: конкуренция за запись выражается в задержке, а не в ошибке.
+    Функция должна откатывать свою транзакцию при ошибке (так делают get_connection
+    и immediate_transaction), тогда повтор безопасен.
+    :param func: Функция из db_operations/db_draft_operations.
+    :return: Результат функции; исключения пробрасываются вызывающему.
+    """
+    return await _run_with_retries(_writer(func, args, kwargs), func, *args, **kwargs)
+
+
+def _writer(func, args, kwargs):
+    """Поток записи для вызова: поток шарда, в который пишет вызов, или общий поток БД."""
+    path = writer_shard_path(func, args, kwargs)
+    if path is None:
+        return _executor
+    with _shard_executors_lock:
+        executor = _shard_executors.get(path)
+        if executor is None:
+            name = os.path.splitext(os.path.basename(path))[0]
+            executor = _shard_executors[path] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"db-{name}")
+    return executor
+
+
+async def run_db_read(func, *args, **kwargs):
+    """
+    Выполняет функцию чтения (get_event и т.п.) в пуле потоков чтения.
+    Функция не должна изменять БД: get_event и другие функции чтения используют
+    соединения только для чтения (connection.read_snapshot).
+    Пример: `event = await run_db_read(get_event, db_path, event_id)`.
+    """
+    return await _run_with_retries(_read_executor, func, *args, **kwargs)
+
+
+async def _run_with_retries(executor, func, *args, **kwargs):
+    """Выполняет func в executor, повторяя вызов при блокировке БД (см. run_db)."""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(func, *args, **kwargs)
+    name = getattr(func, "__name__", repr(func))
+    for attempt in range(DB_LOCK_RETRIES + 1):
+        started = time.monotonic()
+        try:
+            return await loop.run_in_executor(executor, call)
+        except Exception as e:
+            if not is_lock_error(e):
+                raise
+            record_lock_event("lock_errors", wait_ms=(time.monotonic() - started) * 1000)
+            if attempt == DB_LOCK_RETRIES:
+                record_lock_event("failures")
+                logger.error(f"БД заблокирована, {name} не выполнен после {attempt + 1} попыток: {e}")
+                raise
+            delay = lock_retry_delay(attempt)
+            record_lock_event("retries", wait_ms=delay * 1000)
+            logger.warning(f"БД заблокирована при вызове {name}, повтор через {int(delay * 1000)} мс")
+            await asyncio.sleep(delay)
+
+
+def lock_retry_delay(attempt):
+    """Задержка перед повтором (секунды): экспоненциальный рост со случайным разбросом."""
+    return DB_LOCK_RETRY_BASE_MS * (2 ** attempt) * random.uniform(0.5, 1.5) / 1000
+
+
+def record_lock_event(name, wait_ms=0):
+    """Увеличивает счётчик блокировок name и суммарное время ожидания."""
+    with _lock_stats_lock:
+        _lock_stats[name] += 1
+        _lock_stats["lock_wait_ms"] += int(wait_ms)
+
+
+def get_lock_stats(reset=False):
+    """
+    Возвращает счётчики блокировок БД.
+    :param reset: Обнулить счётчики после чтения (для отчёта за период).
+    """
+    with _lock_stats_lock:
+        stats = dict(_lock_stats)
+        if reset:
+            _lock_stats.clear()
+    return stats
+
+
+def shutdown_db_executor():
+    """Дожидается завершения запросов в потоках БД и останавливает их (при остановке бота)."""
+    _read_executor.shutdown(wait=True)
+    with _shard_executors_lock:
+        shard_executors = list(_shard_executors.values())
+        _shard_executors.clear()
+    for executor in shard_executors:
+        executor.shutdown(wait=True)
+    _executor.shutdown(wait=True)
+    logger.info("Поток БД остановлен")
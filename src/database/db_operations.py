@@ -1,32 +1,50 @@
-import os
 import sqlite3
+import time as time_module
+from contextlib import contextmanager
 from datetime import datetime
+from functools import partial
 
+from config import tz
+from src.database.connection import (
+    after_commit, attach_database, get_connection, get_read_connection, immediate_transaction, in_write_transaction,
+    read_snapshot, reraise_if_locked,
+)
+from src.database import models
+from src.database.draft_store import get_draft_store
+from src.database.event_cache import REMOVED, event_cache
+from src.database.models import Event, EventHeader, Participation, Template
+from src.database.sharding import concat, concat_sorted, fan_out, route_by_chat, route_by_id, route_by_user
 from src.logger.logger import logger
+from src.utils.utils import to_starts_at
+
+# Статусы пользователя в таблице participation (определены в models, реэкспорт для обработчиков)
+STATUS_PARTICIPANT = models.STATUS_PARTICIPANT
+STATUS_RESERVE = models.STATUS_RESERVE
+STATUS_DECLINED = models.STATUS_DECLINED
+
+# Записи участия со списков мероприятия. Имя пользователя хранится один раз в users.display_name
+# и подставляется при чтении; если имени нет, показывается ID.
+ROSTER_SELECT = (
+    "SELECT p.user_id, COALESCE(u.display_name, 'ID ' || p.user_id) AS user_name, p.status, p.position "
+    "FROM participation p LEFT JOIN users u ON u.id = p.user_id "
+)
 
 def get_db_connection(db_path):
     """
-    Устанавливает соединение с базой данных SQLite.
+    Возвращает постоянное соединение с базой данных SQLite для текущего потока.
     :param db_path: Путь к файлу базы данных.
     :return: Объект соединения с базой данных.
     """
-    # Проверяем и создаём директорию, если её нет
-    directory = os.path.dirname(db_path)
-    if not os.path.exists(directory):
-        os.makedirs(directory)
-
-    # Устанавливаем соединение с базой данных
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    return conn
+    return get_connection(db_path)
 
 
+@route_by_chat()
 def add_event(db_path, description, date, time, limit, creator_id, chat_id, message_id):
     """
     Добавляет мероприятие в базу данных.
     :param db_path: Путь к базе данных.
     :param description: Описание мероприятия.
-    :param date: Дата мероприятия в формате "дд-мм-гггг".
+    :param date: Дата мероприятия в формате "дд.мм.гггг".
     :param time: Время мероприятия в формате "чч:мм".
     :param limit: Лимит участников (0 означает неограниченный лимит).
     :param creator_id: ID создателя мероприятия.
@@ -34,149 +52,370 @@ def add_event(db_path, description, date, time, limit, creator_id, chat_id, mess
     :param message_id: ID сообщения в Telegram (опционально).
     :return: ID добавленного мероприятия.
     """
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     try:
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-
-            # Сначала сохраняем/обновляем пользователя
-            cursor.execute(
-                """INSERT OR REPLACE INTO users 
-                (id, first_name, last_name, username, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?)""",
-                (creator_id,
-                 "Данные из контекста",  # Заполняете реальными данными
-                 "Данные из контекста",
-                 "Данные из контекста",
-                 now, now)
-            )
-
-            # Затем создаем мероприятие
-            cursor.execute(
-                """
-                INSERT INTO events (description, date, time, participant_limit, creator_id, chat_id, message_id, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (description, date, time, limit, creator_id, chat_id, message_id, now, now),
-            )
-            event_id = cursor.lastrowid
+        with get_db_connection(db_path) as conn:
+            event_id = _insert_event(conn.cursor(), description, date, time, limit, creator_id, chat_id, message_id)
             conn.commit()
             logger.info(f"Мероприятие добавлено с ID: {event_id} и номером сообщения {message_id}")
             return event_id
     except sqlite3.Error as e:
+        reraise_if_locked(e)
         logger.error(f"Ошибка при добавлении мероприятия в базу данных: {e}")
         return None
 
-def get_event(db_path, event_id):
-    """Возвращает информацию о мероприятии по его ID."""
-    with get_db_connection(db_path) as conn:
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+def _insert_event(cursor, description, date, time, limit, creator_id, chat_id, message_id):
+    """Сохраняет создателя и мероприятие в рамках текущей транзакции. Возвращает ID мероприятия."""
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-        # Получаем основную информацию о мероприятии
-        cursor.execute("SELECT * FROM events WHERE id = ?", (event_id,))
-        event = cursor.fetchone()
+    # Сначала убеждаемся, что создатель есть в users
+    _ensure_user(cursor, creator_id, now)
 
-        if not event:
-            return None
+    # Затем создаем мероприятие
+    cursor.execute(
+        """
+        INSERT INTO events (
+            description, date, time, starts_at, participant_limit, creator_id, chat_id, message_id,
+            created_at, updated_at
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (description, date, time, to_starts_at(date, time, tz), limit, creator_id, chat_id, message_id, now, now),
+    )
+    return cursor.lastrowid
 
-        # Получаем участников
-        cursor.execute("SELECT user_id, user_name FROM participants WHERE event_id = ?", (event_id,))
-        participants = [{"user_id": row["user_id"], "name": row["user_name"]} for row in cursor.fetchall()]
+@route_by_chat()
+def create_event_from_draft(
+    db_path, drafts_db_path, draft_id, description, date, time, limit, creator_id, chat_id, message_id
+):
+    """
+    Создаёт мероприятие из черновика и удаляет черновик одной транзакцией.
+    БД черновиков подключается (ATTACH) к соединению основной БД, поэтому при ошибке
+    откатываются обе записи. В режиме WAL SQLite фиксирует каждый файл отдельно,
+    так что при сбое питания точно в момент COMMIT атомарность между файлами не гарантируется.
+    :param db_path: Путь к основной базе данных.
+    :param drafts_db_path: Путь к базе данных черновиков.
+    :param draft_id: ID черновика, из которого создаётся мероприятие.
+    Остальные параметры - как у add_event.
+    :return: ID созданного мероприятия или None при ошибке.
+    """
+    try:
+        attach_database(db_path, "drafts", drafts_db_path)
+        with immediate_transaction(db_path) as conn:
+            cursor = conn.cursor()
+            event_id = _insert_event(cursor, description, date, time, limit, creator_id, chat_id, message_id)
+            cursor.execute("DELETE FROM drafts.drafts WHERE id = ?", (draft_id,))
+    except sqlite3.Error as e:
+        reraise_if_locked(e)
+        logger.error(f"Ошибка при создании мероприятия из черновика {draft_id}: {e}")
+        return None
 
-        # Получаем резерв
-        cursor.execute("SELECT user_id, user_name FROM reserve WHERE event_id = ?", (event_id,))
-        reserve = [{"user_id": row["user_id"], "name": row["user_name"]} for row in cursor.fetchall()]
+    # Черновик уже удалён из БД, убираем его из памяти
+    get_draft_store(drafts_db_path).delete(draft_id, persisted=True)
+    logger.info(f"Мероприятие {event_id} создано из черновика {draft_id}, номер сообщения {message_id}")
+    return event_id
 
-        # Получаем отказавшихся
-        cursor.execute("SELECT user_id, user_name FROM declined WHERE event_id = ?", (event_id,))
-        declined = [{"user_id": row["user_id"], "name": row["user_name"]} for row in cursor.fetchall()]
+@route_by_id()
+def get_event(db_path, event_id) -> Event | None:
+    """
+    Возвращает информацию о мероприятии по его ID (мероприятие и списки - из одного снимка БД).
+    Повторные чтения обслуживаются кэшем event_cache; изменения в этом модуле сбрасывают его.
+    """
+    if in_write_transaction(db_path):
+        # Внутри транзакции записи нужны её незафиксированные изменения: читаем через
+        # соединение писателя мимо кэша (читатель их не видит)
+        return _load_event(get_connection(db_path).cursor(), event_id)
+
+    event = event_cache.get(db_path, event_id)
+    if event is not None:
+        return event
+    with read_snapshot(db_path) as conn:
+        event = _load_event(conn.cursor(), event_id)
+    if event is not None:
+        event_cache.put(db_path, event)
+    return event
+
+@route_by_id()
+def get_event_header(db_path, event_id) -> EventHeader | None:
+    """
+    Возвращает заголовок мероприятия (creator_id, chat_id, message_id, version) для проверок прав.
+    Списки не читаются: заголовок берётся из кэша мероприятий или одним запросом по первичному ключу.
+    """
+    event = event_cache.peek(db_path, event_id)
+    if event is not None:
+        return EventHeader(event.id, event.creator_id, event.chat_id, event.message_id, event.version)
 
-        event_data = {
-            "id": event["id"],
-            "description": event["description"],
-            "date": event["date"],
-            "time": event["time"],
-            "participant_limit": event["participant_limit"],  # Переименовано с "limit" на "participant_limit"
-            "creator_id": event["creator_id"],
-            "chat_id": event["chat_id"],  # Добавлено поле chat_id
-            "message_id": event["message_id"],
-            "participants": participants,
-            "reserve": reserve,
-            "declined": declined,
-        }
+    row = get_read_connection(db_path).execute(
+        "SELECT id, creator_id, chat_id, message_id, version FROM events WHERE id = ?", (event_id,)
+    ).fetchone()
+    return EventHeader.from_row(row) if row else None
 
-        return event_data
+def _load_event(cursor, event_id) -> Event | None:
+    """Читает мероприятие вместе со всеми списками в рамках текущего соединения."""
+    # Получаем основную информацию о мероприятии
+    cursor.execute("SELECT * FROM events WHERE id = ?", (event_id,))
+    row = cursor.fetchone()
+
+    if not row:
+        return None
 
-def get_events_by_participant(db_path, user_id):
+    # Списки читаются сразу, одним проходом по индексу, в той же транзакции
+    return Event.from_row(row, _roster=_fetch_roster(cursor, event_id))
+
+def _lazy_events(db_path, rows) -> list[Event]:
+    """Создаёт мероприятия, списки которых будут загружены при первом обращении."""
+    return [
+        Event.from_row(row, _roster_loader=partial(_load_roster, db_path, row["id"]))
+        for row in rows
+    ]
+
+@fan_out(concat)
+def get_events_by_participant(db_path, user_id) -> list[Event]:
     """
     Возвращает список мероприятий, в которых участвует пользователь.
     """
-    with get_db_connection(db_path) as conn:
+    with read_snapshot(db_path) as conn:
         cursor = conn.cursor()
         cursor.execute(
             """
-            SELECT e.id, e.description, e.date, e.time, e.chat_id, e.message_id
+            SELECT e.*
             FROM events e
-            JOIN participants p ON e.id = p.event_id
-            WHERE p.user_id = ?
+            JOIN participation p ON e.id = p.event_id
+            WHERE p.user_id = ? AND p.status = ?
             """,
-            (user_id,),
+            (user_id, STATUS_PARTICIPANT),
         )
-        return cursor.fetchall()
+        return _lazy_events(db_path, cursor.fetchall())
+
+@fan_out(concat_sorted("starts_at"))
+def get_events_starting_between(db_path, start_ts, end_ts) -> list[Event]:
+    """
+    Возвращает мероприятия, начинающиеся в полуинтервале [start_ts, end_ts), по возрастанию времени начала.
+    Запрос выполняется по индексу idx_events_starts_at.
+    :param db_path: Путь к базе данных.
+    :param start_ts: Начало интервала (Unix-время).
+    :param end_ts: Конец интервала (Unix-время).
+    :return: Список мероприятий (списки участников загружаются при обращении).
+    """
+    with read_snapshot(db_path) as conn:
+        rows = conn.execute(
+            "SELECT * FROM events WHERE starts_at >= ? AND starts_at < ? ORDER BY starts_at",
+            (start_ts, end_ts),
+        ).fetchall()
+    return _lazy_events(db_path, rows)
+
+def get_upcoming_events(db_path, within_seconds, now_ts=None) -> list[Event]:
+    """
+    Возвращает мероприятия, которые начнутся в ближайшие within_seconds секунд.
+    :param now_ts: Текущее время (Unix-время), по умолчанию - системное.
+    """
+    now_ts = int(time_module.time()) if now_ts is None else now_ts
+    return get_events_starting_between(db_path, now_ts, now_ts + within_seconds)
+
+@fan_out(concat_sorted("starts_at"))
+def get_expired_events(db_path, now_ts=None) -> list[Event]:
+    """
+    Возвращает уже начавшиеся мероприятия, по возрастанию времени начала.
+    Мероприятия с неизвестным временем начала (starts_at IS NULL) не возвращаются.
+    :param now_ts: Текущее время (Unix-время), по умолчанию - системное.
+    """
+    now_ts = int(time_module.time()) if now_ts is None else now_ts
+    with read_snapshot(db_path) as conn:
+        rows = conn.execute(
+            "SELECT * FROM events WHERE starts_at < ? ORDER BY starts_at",
+            (now_ts,),
+        ).fetchall()
+    return _lazy_events(db_path, rows)
+
+@fan_out(concat)
+def get_all_events(db_path) -> list[Event]:
+    with read_snapshot(db_path) as conn:
+        rows = conn.execute("SELECT * FROM events").fetchall()
+    return _lazy_events(db_path, rows)
+
+#Состав мероприятия
+def _fetch_roster(cursor, event_id):
+    """
+    Читает все записи участия мероприятия одним диапазонным проходом
+    по индексу (event_id, status, position) и раскладывает их по спискам.
+    """
+    roster = {STATUS_PARTICIPANT: [], STATUS_RESERVE: [], STATUS_DECLINED: []}
+    cursor.execute(ROSTER_SELECT + "WHERE p.event_id = ? ORDER BY p.status, p.position", (event_id,))
+    for user_id, user_name, status, position in cursor.fetchall():
+        roster[status].append(Participation(user_id, user_name, status, position))
+    return roster
+
+def _load_roster(db_path, event_id):
+    """Загружает списки мероприятия (для ленивой загрузки в Event)."""
+    with read_snapshot(db_path) as conn:
+        return _fetch_roster(conn.cursor(), event_id)
+
+def _next_position(cursor, event_id):
+    """Возвращает следующую свободную позицию в очереди мероприятия."""
+    cursor.execute("SELECT COALESCE(MAX(position), 0) + 1 FROM participation WHERE event_id = ?", (event_id,))
+    return cursor.fetchone()[0]
+
+def _timestamp():
+    """Текущее время для created_at и updated_at в participation (Unix-время, секунды)."""
+    return int(time_module.time())
+
+def _set_status(cursor, event_id, user_id, user_name, status, now):
+    """
+    Записывает пользователя в указанный список. Если запись уже есть,
+    меняет её статус одной строкой и ставит пользователя в конец списка.
+    :param now: Время изменения (см. _timestamp).
+    """
+    _remember_names(cursor, [(user_id, user_name)])
+    cursor.execute(
+        """
+        INSERT INTO participation (event_id, user_id, status, position, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (event_id, user_id) DO UPDATE SET
+            status = excluded.status,
+            position = excluded.position,
+            updated_at = excluded.updated_at
+        """,
+        (event_id, user_id, status, _next_position(cursor, event_id), now, now),
+    )
+    _bump_version(cursor, event_id)
+
+def _remember_names(cursor, names):
+    """
+    Сохраняет отображаемые имена пользователей в users.display_name: списки мероприятий
+    хранят только user_id. Строка users переписывается, только если имя изменилось.
+    Мероприятия, в списках которых имя изменилось, получают новую версию (см. _bump_version),
+    чтобы снимок со старым именем не вернулся в кэш.
+    :param names: Пары (user_id, имя).
+    """
+    names = dict(names)
+    if not names:
+        return
+    placeholders = ", ".join("?" for _ in names)
+    cursor.execute(f"SELECT id, display_name FROM users WHERE id IN ({placeholders})", tuple(names))
+    stored = {row[0]: row[1] for row in cursor.fetchall()}
+    renamed = [user_id for user_id, name in names.items() if stored.get(user_id) != name]
+    if not renamed:
+        return
+
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    cursor.executemany(
+        """
+        INSERT INTO users (id, display_name, created_at, updated_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT (id) DO UPDATE SET display_name = excluded.display_name, updated_at = excluded.updated_at
+        WHERE users.display_name IS NOT excluded.display_name
+        """,
+        [(user_id, names[user_id], now, now) for user_id in renamed],
+    )
+    placeholders = ", ".join("?" for _ in renamed)
+    cursor.execute(f"SELECT DISTINCT event_id FROM participation WHERE user_id IN ({placeholders})", renamed)
+    for (event_id,) in cursor.fetchall():
+        _bump_version(cursor, event_id)
+
+def _bump_version(cursor, event_id, expected_version=None, now=None):
+    """
+    Увеличивает версию мероприятия (compare-and-swap, если задана expected_version).
+    :param expected_version: Версия, с которой писатель прочитал мероприятие;
+                             None - изменение без проверки (операция уже под блокировкой записи).
+    :param now: Новое значение updated_at (None - не менять).
+    :return: True, если версия увеличена; False, если мероприятия нет или его уже изменили.
+    """
+    cursor.execute(
+        """
+        UPDATE events SET version = version + 1, updated_at = COALESCE(?, updated_at)
+        WHERE id = ? AND (? IS NULL OR version = ?)
+        """,
+        (now, event_id, expected_version, expected_version),
+    )
+    if cursor.rowcount == 0:
+        return False
+    _invalidate_cached(cursor, event_id)
+    return True
+
+def _invalidate_cached(cursor, event_id):
+    """
+    Сбрасывает мероприятие из кэша после фиксации транзакции, которая его изменила
+    (при откате кэш не трогается). Снимки, прочитанные до фиксации (с версией меньше новой),
+    в кэш уже не попадут.
+    """
+    row = cursor.execute("SELECT version FROM events WHERE id = ?", (event_id,)).fetchone()
+    after_commit(cursor.connection, partial(event_cache.invalidate, event_id, row[0] if row else REMOVED))
 
-def get_all_events(db_path):
-    conn = get_db_connection(db_path)
-    events = conn.execute("SELECT * FROM events").fetchall()
-    conn.close()
-    return [dict(event) for event in events]
+@route_by_id()
+def get_roster(db_path, event_id):
+    """
+    Возвращает участников, резерв и отказавшихся мероприятия одним запросом.
+    :return: Словарь {"participants": [...], "reserve": [...], "declined": [...]}.
+    """
+    roster = _load_roster(db_path, event_id)
+    return {
+        "participants": roster[STATUS_PARTICIPANT],
+        "reserve": roster[STATUS_RESERVE],
+        "declined": roster[STATUS_DECLINED],
+    }
+
+@contextmanager
+def _read_cursor(db_path):
+    """
+    Курсор для чтения: соединение только для чтения (read_snapshot), а внутри транзакции
+    записи текущего потока - соединение писателя, чтобы видеть её изменения.
+    """
+    if in_write_transaction(db_path):
+        yield get_connection(db_path).cursor()
+        return
+    with read_snapshot(db_path) as conn:
+        yield conn.cursor()
+
+def _get_by_status(db_path, event_id, status) -> list[Participation]:
+    with _read_cursor(db_path) as cursor:
+        cursor.execute(
+            ROSTER_SELECT + "WHERE p.event_id = ? AND p.status = ? ORDER BY p.position",
+            (event_id, status),
+        )
+        return [Participation(*row) for row in cursor.fetchall()]
 
 #Получение одного из списков
+@route_by_id()
 def get_participants(db_path, event_id):
     """Возвращает список участников мероприятия."""
-    with get_db_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT user_id, user_name FROM participants WHERE event_id = ?", (event_id,))
-        return [dict(row) for row in cursor.fetchall()]
+    return _get_by_status(db_path, event_id, STATUS_PARTICIPANT)
 
+@route_by_id()
 def get_reserve(db_path, event_id):
-    """Возвращает список резерва мероприятия."""
-    with get_db_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT user_id, user_name FROM reserve WHERE event_id = ?", (event_id,))
-        return [dict(row) for row in cursor.fetchall()]
+    """Возвращает список резерва мероприятия в порядке очереди."""
+    return _get_by_status(db_path, event_id, STATUS_RESERVE)
 
+@route_by_id()
 def get_declined(db_path, event_id):
     """Возвращает список отказавшихся."""
-    with get_db_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT user_id, user_name FROM declined WHERE event_id = ?", (event_id,))
-        return [dict(row) for row in cursor.fetchall()]
+    return _get_by_status(db_path, event_id, STATUS_DECLINED)
+
+@route_by_id()
+def get_user_status(db_path, event_id, user_id):
+    """
+    Возвращает статус пользователя в мероприятии.
+    :return: 'participant', 'reserve', 'declined' или None, если пользователя нет ни в одном списке.
+    """
+    with _read_cursor(db_path) as cursor:
+        return _get_status(cursor, event_id, user_id)
 
+@route_by_id()
 def is_user_in_participants(db_path, event_id, user_id):
     """Проверяет, есть ли пользователь в списке участников."""
-    with get_db_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1 FROM participants WHERE event_id = ? AND user_id = ?", (event_id, user_id))
-        return cursor.fetchone() is not None
+    return get_user_status(db_path, event_id, user_id) == STATUS_PARTICIPANT
 
+@route_by_id()
 def is_user_in_reserve(db_path, event_id, user_id):
     """Проверяет, есть ли пользователь в резерве."""
-    with get_db_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1 FROM reserve WHERE event_id = ? AND user_id = ?", (event_id, user_id))
-        return cursor.fetchone() is not None
+    return get_user_status(db_path, event_id, user_id) == STATUS_RESERVE
 
+@route_by_id()
 def is_user_in_declined(db_path, event_id, user_id):
     """Проверяет, есть ли пользователь в списке отказавшихся."""
-    with get_db_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1 FROM declined WHERE event_id = ? AND user_id = ?", (event_id, user_id))
-        return cursor.fetchone() is not None
+    return get_user_status(db_path, event_id, user_id) == STATUS_DECLINED
 
 #Добавление в один из трёх списков
 
 
+@route_by_id()
 def add_participant(db_path, event_id, user_id, user_name):
     """
     Добавляет участника мероприятия
@@ -185,75 +424,205 @@ def add_participant(db_path, event_id, user_id, user_name):
     :param user_id: ID пользователя
     :param user_name: Имя пользователя (уже отформатированное)
     """
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    now = _timestamp()
     with get_db_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO participants (event_id, user_id, user_name, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (event_id, user_id, user_name, now, now),
-        )
+        _set_status(conn.cursor(), event_id, user_id, user_name, STATUS_PARTICIPANT, now)
         conn.commit()
         logger.info(f"Пользователь {user_name} добавлен в участники мероприятия {event_id}.")
 
+@route_by_id()
 def add_to_reserve(db_path, event_id, user_id, user_name):
     """
-    Добавляет пользователя в резерв.
+    Добавляет пользователя в конец очереди резерва.
     :param db_path: Путь к базе данных.
     :param event_id: ID мероприятия.
     :param user_id: ID пользователя.
     :param user_name: Имя пользователя.
     """
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # Текущее время
+    now = _timestamp()
     with get_db_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO reserve (event_id, user_id, user_name, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (event_id, user_id, user_name, now, now),
-        )
+        _set_status(conn.cursor(), event_id, user_id, user_name, STATUS_RESERVE, now)
         conn.commit()
         logger.info(f"Пользователь {user_name} добавлен в резерв мероприятия {event_id}.")
 
+@route_by_id()
 def add_to_declined(db_path, event_id, user_id, user_name):
     """
     Добавляет пользователя в список отказавшихся.
+    Если пользователь был в участниках или резерве, запись переводится в отказавшиеся одним UPDATE.
     :param db_path: Путь к базе данных.
     :param event_id: ID мероприятия.
     :param user_id: ID пользователя.
     :param user_name: Имя пользователя.
     """
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # Текущее время
+    now = _timestamp()
     with get_db_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO declined (event_id, user_id, user_name, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (event_id, user_id, user_name, now, now),
-        )
+        _set_status(conn.cursor(), event_id, user_id, user_name, STATUS_DECLINED, now)
         conn.commit()
         logger.info(f"Пользователь {user_name} добавлен в список отказавшихся от мероприятия {event_id}.")
 
-#Удаление из списков
-def remove_participant(db_path, event_id, user_id):
+@route_by_id()
+def promote_from_reserve(db_path, event_id):
     """
-    Удаляет участника из таблицы participants.
+    Переводит первого пользователя из очереди резерва в участники (UPDATE одной строки).
+    :param db_path: Путь к базе данных.
+    :param event_id: ID мероприятия.
+    :return: Словарь {"user_id", "user_name"} переведённого пользователя или None, если резерв пуст.
+    """
+    now = _timestamp()
+    with get_db_connection(db_path) as conn:
+        promoted = _promote_first_reserve(conn.cursor(), event_id, now)
+        conn.commit()
+    if promoted:
+        logger.info(f"Пользователь {promoted['user_name']} переведён из резерва в участники мероприятия {event_id}.")
+    return promoted
+
+def _promote_first_reserve(cursor, event_id, now):
+    cursor.execute(
+        ROSTER_SELECT + "WHERE p.event_id = ? AND p.status = ? ORDER BY p.position LIMIT 1",
+        (event_id, STATUS_RESERVE),
+    )
+    row = cursor.fetchone()
+    if not row:
+        return None
+
+    cursor.execute(
+        "UPDATE participation SET status = ?, position = ?, updated_at = ? WHERE event_id = ? AND user_id = ?",
+        (STATUS_PARTICIPANT, _next_position(cursor, event_id), now, event_id, row["user_id"]),
+    )
+    _bump_version(cursor, event_id)
+    return {"user_id": row["user_id"], "user_name": row["user_name"]}
+
+#Атомарные действия "Участвую" / "Не участвую"
+@route_by_id()
+def join_event(db_path, event_id, user_id, user_name):
+    """
+    Записывает пользователя на мероприятие одной транзакцией BEGIN IMMEDIATE:
+    проверка статуса, проверка лимита и запись выполняются под одной блокировкой,
+    поэтому параллельные нажатия не переполнят лимит.
+    :param db_path: Путь к базе данных.
+    :param event_id: ID мероприятия.
+    :param user_id: ID пользователя.
+    :param user_name: Имя пользователя (уже отформатированное).
+    :return: Изменение состава (см. _roster_delta) или None, если мероприятие не найдено.
+    """
+    with immediate_transaction(db_path) as conn:
+        return apply_join_event(conn.cursor(), event_id, user_id, user_name)
+
+@route_by_id()
+def apply_join_event(cursor, event_id, user_id, user_name):
+    """
+    Записывает пользователя на мероприятие в уже открытой транзакции
+    (используется join_event и очередью записи write_queue).
+    :return: Изменение состава (см. _roster_delta) или None, если мероприятие не найдено.
+    """
+    now = _timestamp()
+    cursor.execute("SELECT participant_limit, participants_count FROM events WHERE id = ?", (event_id,))
+    event = cursor.fetchone()
+    if not event:
+        return None
+
+    previous_status = _get_status(cursor, event_id, user_id)
+    if previous_status in (STATUS_PARTICIPANT, STATUS_RESERVE):
+        status = previous_status
+    else:
+        limit = event["participant_limit"]
+        status = STATUS_PARTICIPANT if limit is None or event["participants_count"] < limit else STATUS_RESERVE
+        _set_status(cursor, event_id, user_id, user_name, status, now)
+
+    delta = _roster_delta(cursor, event_id, user_id, previous_status, status, None)
+    if delta["changed"]:
+        logger.info(f"Пользователь {user_name} записан в список '{status}' мероприятия {event_id}.")
+    return delta
+
+@route_by_id()
+def leave_event(db_path, event_id, user_id, user_name):
+    """
+    Переводит пользователя в отказавшиеся одной транзакцией BEGIN IMMEDIATE.
+    Если уходит участник, первый из резерва повышается в участники в той же транзакции.
     :param db_path: Путь к базе данных.
     :param event_id: ID мероприятия.
     :param user_id: ID пользователя.
+    :param user_name: Имя пользователя (уже отформатированное).
+    :return: Изменение состава (см. _roster_delta) или None, если мероприятие не найдено.
+    """
+    with immediate_transaction(db_path) as conn:
+        return apply_leave_event(conn.cursor(), event_id, user_id, user_name)
+
+@route_by_id()
+def apply_leave_event(cursor, event_id, user_id, user_name):
     """
+    Переводит пользователя в отказавшиеся в уже открытой транзакции
+    (используется leave_event и очередью записи write_queue).
+    :return: Изменение состава (см. _roster_delta) или None, если мероприятие не найдено.
+    """
+    now = _timestamp()
+    cursor.execute("SELECT 1 FROM events WHERE id = ?", (event_id,))
+    if not cursor.fetchone():
+        return None
+
+    previous_status = _get_status(cursor, event_id, user_id)
+    promoted = None
+    if previous_status != STATUS_DECLINED:
+        _set_status(cursor, event_id, user_id, user_name, STATUS_DECLINED, now)
+        if previous_status == STATUS_PARTICIPANT:
+            promoted = _promote_first_reserve(cursor, event_id, now)
+
+    delta = _roster_delta(cursor, event_id, user_id, previous_status, STATUS_DECLINED, promoted)
+    if delta["changed"]:
+        logger.info(f"Пользователь {user_name} отказался от мероприятия {event_id}.")
+    if promoted:
+        logger.info(f"Пользователь {promoted['user_name']} переведён из резерва в участники мероприятия {event_id}.")
+    return delta
+
+def _get_status(cursor, event_id, user_id):
+    cursor.execute("SELECT status FROM participation WHERE event_id = ? AND user_id = ?", (event_id, user_id))
+    row = cursor.fetchone()
+    return row["status"] if row else None
+
+def _roster_delta(cursor, event_id, user_id, previous_status, status, promoted):
+    """
+    Формирует результат join_event/leave_event.
+    :return: Словарь с ключами:
+        "user_id" - ID пользователя;
+        "previous_status" - статус до изменения (None, если пользователя не было);
+        "status" - статус после изменения;
+        "changed" - изменился ли статус пользователя;
+        "promoted" - {"user_id", "user_name"} повышенного из резерва или None;
+        "event" - мероприятие со списками после изменения (как в get_event).
+    """
+    return {
+        "user_id": user_id,
+        "previous_status": previous_status,
+        "status": status,
+        "changed": previous_status != status,
+        "promoted": promoted,
+        "event": _load_event(cursor, event_id),
+    }
+
+#Удаление из списков
+def _remove_with_status(db_path, event_id, user_id, status):
     with get_db_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM participants WHERE event_id = ? AND user_id = ?", (event_id, user_id))
+        cursor = conn.execute(
+            "DELETE FROM participation WHERE event_id = ? AND user_id = ? AND status = ?",
+            (event_id, user_id, status),
+        )
+        if cursor.rowcount:
+            _bump_version(cursor, event_id)
         conn.commit()
-        logger.info(f"Участник с ID={user_id} удалён из мероприятия {event_id}.")
 
+@route_by_id()
+def remove_participant(db_path, event_id, user_id):
+    """
+    Удаляет пользователя из списка участников.
+    :param db_path: Путь к базе данных.
+    :param event_id: ID мероприятия.
+    :param user_id: ID пользователя.
+    """
+    _remove_with_status(db_path, event_id, user_id, STATUS_PARTICIPANT)
+    logger.info(f"Участник с ID={user_id} удалён из мероприятия {event_id}.")
+
+@route_by_id()
 def remove_from_reserve(db_path, event_id, user_id):
     """
     Удаляет пользователя из резерва.
@@ -261,12 +630,10 @@ def remove_from_reserve(db_path, event_id, user_id):
     :param event_id: ID мероприятия.
     :param user_id: ID пользователя.
     """
-    with get_db_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM reserve WHERE event_id = ? AND user_id = ?", (event_id, user_id))
-        conn.commit()
-        logger.info(f"Пользователь с ID={user_id} удалён из резерва мероприятия {event_id}.")
+    _remove_with_status(db_path, event_id, user_id, STATUS_RESERVE)
+    logger.info(f"Пользователь с ID={user_id} удалён из резерва мероприятия {event_id}.")
 
+@route_by_id()
 def remove_from_declined(db_path, event_id, user_id):
     """
     Удаляет пользователя из списка отказавшихся.
@@ -274,106 +641,204 @@ def remove_from_declined(db_path, event_id, user_id):
     :param event_id: ID мероприятия.
     :param user_id: ID пользователя.
     """
-    with get_db_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM declined WHERE event_id = ? AND user_id = ?", (event_id, user_id))
-        conn.commit()
-        logger.info(f"Пользователь с ID={user_id} удалён из списка отказавшихся мероприятия {event_id}.")
+    _remove_with_status(db_path, event_id, user_id, STATUS_DECLINED)
+    logger.info(f"Пользователь с ID={user_id} удалён из списка отказавшихся мероприятия {event_id}.")
 
 #Подсчёт количества участников
+@route_by_id()
 def get_participants_count(db_path, event_id):
-    """Возвращает количество участников мероприятия."""
-    with get_db_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM participants WHERE event_id = ?", (event_id,))
-        return cursor.fetchone()[0]
+    """Возвращает количество участников мероприятия (по счётчику в events, без подсчёта строк)."""
+    with _read_cursor(db_path) as cursor:
+        row = cursor.execute("SELECT participants_count FROM events WHERE id = ?", (event_id,)).fetchone()
+        return row[0] if row else 0
+
 
+# Значение expected_value по умолчанию: прежнее значение поля не проверяется
+_ANY_VALUE = object()
 
 #Обновление поля в мероприятии
-def update_event_field(db_path: str, event_id: int, field: str, value: str | int | None) -> bool:
+@route_by_id()
+def update_event_field(db_path: str, event_id: int, field: str, value: str | int | None,
+                       expected_version: int | None = None, expected_value=_ANY_VALUE) -> bool:
     """
     Универсальная функция для обновления любого поля в таблице events.
-    Обновляет также поле updated_at текущей датой-временем.
+    Обновляет также поле updated_at текущей датой-временем и увеличивает версию мероприятия.
 
     :param db_path: Путь к базе данных
     :param event_id: ID мероприятия
     :param field: Название поля (description/date/time/participant_limit)
     :param value: Новое значение
+    :param expected_version: Версия мероприятия, по которой принималось решение об изменении.
+                             Если мероприятие с тех пор изменили, поле не обновляется.
+    :param expected_value: Значение поля, которое видел автор изменения. Поле не обновляется,
+                           только если его самого успели изменить: в отличие от expected_version,
+                           записи в списки участников изменению не мешают.
     :return: True если обновление прошло успешно
     """
     try:
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        check_value = expected_value is not _ANY_VALUE
 
         with get_db_connection(db_path) as conn:
             cursor = conn.cursor()
             cursor.execute(
-                f"UPDATE events SET {field} = ?, updated_at = ? WHERE id = ?",
-                (value, now, event_id)
+                f"""
+                UPDATE events SET {field} = ?, updated_at = ?, version = version + 1
+                WHERE id = ? AND (? IS NULL OR version = ?) AND (NOT ? OR {field} IS ?)
+                """,
+                (value, now, event_id, expected_version, expected_version,
+                 check_value, expected_value if check_value else None)
             )
+            updated = cursor.rowcount > 0
+            if not updated and (expected_version is not None or check_value):
+                logger.warning(f"Мероприятие {event_id} изменено другим запросом, {field} не обновлено")
+            if updated:
+                _invalidate_cached(cursor, event_id)
+
+            # Дата и время - источник starts_at, пересчитываем его в той же транзакции
+            if updated and field in ("date", "time"):
+                cursor.execute("SELECT date, time FROM events WHERE id = ?", (event_id,))
+                row = cursor.fetchone()
+                cursor.execute(
+                    "UPDATE events SET starts_at = ? WHERE id = ?",
+                    (to_starts_at(row["date"], row["time"], tz), event_id)
+                )
             conn.commit()
-            return cursor.rowcount > 0
+            return updated
     except sqlite3.Error as e:
+        reraise_if_locked(e)
         logger.error(f"Ошибка обновления {field}: {e}")
         return False
 
-def update_event(db_path, event_id, participants, reserve, declined):
+@route_by_id()
+def update_event(db_path, event_id, participants, reserve, declined, expected_version=None):
     """
     Обновляет списки участников, резерва и отказавшихся.
+    Порядок в каждом списке сохраняется как порядок позиций.
     :param db_path: Путь к базе данных.
     :param event_id: ID мероприятия.
     :param participants: Список участников (список словарей с ключами "user_id" и "name").
     :param reserve: Список резерва (список словарей с ключами "user_id" и "name").
     :param declined: Список отказавшихся (список словарей с ключами "user_id" и "name").
+    :param expected_version: Версия мероприятия, из которой построены списки (event.version).
+                             Если мероприятие с тех пор изменили, списки не записываются,
+                             чтобы не затереть чужие изменения.
+    :return: True, если списки записаны.
     """
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # Текущее время для updated_at
-    with get_db_connection(db_path) as conn:
+    with immediate_transaction(db_path) as conn:
         cursor = conn.cursor()
 
-        # Обновляем updated_at в таблице events
-        cursor.execute(
-            "UPDATE events SET updated_at = ? WHERE id = ?",
-            (now, event_id),
-        )
+        # Увеличиваем версию (и updated_at), если мероприятие не изменили после чтения
+        if not _bump_version(cursor, event_id, expected_version, now):
+            logger.warning(f"Мероприятие {event_id} изменено другим запросом, списки не обновлены")
+            return False
 
-        # Удаляем старые записи
-        cursor.execute("DELETE FROM participants WHERE event_id = ?", (event_id,))
-        cursor.execute("DELETE FROM reserve WHERE event_id = ?", (event_id,))
-        cursor.execute("DELETE FROM declined WHERE event_id = ?", (event_id,))
+        # Записываем только разницу с сохранёнными списками
+        _apply_roster_diff(cursor, event_id, participants, reserve, declined, _timestamp())
 
-        # Добавляем новых участников
-        for participant in participants:
-            cursor.execute(
-                """
-                INSERT INTO participants (event_id, user_id, user_name, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (event_id, participant["user_id"], participant["name"], now, now),
-            )
+    logger.info(f"Мероприятие с ID={event_id} обновлено.")
+    return True
 
-        # Добавляем новый резерв
-        for user in reserve:
-            cursor.execute(
-                """
-                INSERT INTO reserve (event_id, user_id, user_name, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (event_id, user["user_id"], user["name"], now, now),
-            )
+def _apply_roster_diff(cursor, event_id, participants, reserve, declined, now):
+    """
+    Приводит participation к заданным спискам, изменяя только отличающиеся строки:
+    удаляет пропавших пользователей и записывает новых и тех, у кого изменились
+    статус или позиция. Объём записи пропорционален размеру изменения, а не списков.
+    Имена сохраняются в users (см. _remember_names).
+    """
+    cursor.execute("SELECT user_id, status, position FROM participation WHERE event_id = ?", (event_id,))
+    stored = {row["user_id"]: (row["status"], row["position"]) for row in cursor.fetchall()}
 
-        # Добавляем новых отказавшихся
-        for user in declined:
-            cursor.execute(
-                """
-                INSERT INTO declined (event_id, user_id, user_name, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (event_id, user["user_id"], user["name"], now, now),
-            )
+    desired = {}
+    names = []
+    for status, users in (
+        (STATUS_PARTICIPANT, participants),
+        (STATUS_RESERVE, reserve),
+        (STATUS_DECLINED, declined),
+    ):
+        positions = _assign_positions(stored, status, users)
+        for user in users:
+            desired[user["user_id"]] = (status, positions[user["user_id"]])
+            names.append((user["user_id"], user["name"]))
 
-        conn.commit()
-        logger.info(f"Мероприятие с ID={event_id} обновлено.")
+    removed = [(event_id, user_id) for user_id in stored.keys() - desired.keys()]
+    changed = [
+        (event_id, user_id, status, position, now, now)
+        for user_id, (status, position) in desired.items()
+        if stored.get(user_id) != (status, position)
+    ]
+
+    _remember_names(cursor, names)
+    cursor.executemany("DELETE FROM participation WHERE event_id = ? AND user_id = ?", removed)
+    cursor.executemany(
+        """
+        INSERT INTO participation (event_id, user_id, status, position, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (event_id, user_id) DO UPDATE SET
+            status = excluded.status,
+            position = excluded.position,
+            updated_at = excluded.updated_at
+        """,
+        changed,
+    )
+    logger.debug(f"Списки мероприятия {event_id}: удалено {len(removed)}, записано {len(changed)}")
 
+def _assign_positions(stored, status, users):
+    """
+    Подбирает позиции для списка users со статусом status так, чтобы сохранить как можно
+    больше уже записанных позиций: порядок в списке задаётся только возрастанием position,
+    поэтому пропуски допустимы, а переписывать нужно лишь перемещённых и новых пользователей.
+    :param stored: {user_id: (status, position)} - текущие записи мероприятия.
+    :return: {user_id: position}.
+    """
+    # Пользователи, уже стоящие в этом списке, и их позиции в новом порядке
+    candidates = [(index, stored[user["user_id"]][1]) for index, user in enumerate(users)
+                  if stored.get(user["user_id"], (None, None))[0] == status]
+    kept = _longest_increasing(candidates)
 
+    positions = {}
+    previous = 0
+    for index, user in enumerate(users):
+        if index in kept and kept[index] > previous:
+            position = kept[index]
+        else:
+            # Следующая свободная позиция; если места до следующей сохранённой не хватит,
+            # та будет переписана на следующем шаге
+            position = previous + 1
+        positions[user["user_id"]] = previous = position
+    return positions
+
+def _longest_increasing(candidates):
+    """
+    Находит наибольшую подпоследовательность пар (индекс, позиция) с возрастающими позициями.
+    :return: {индекс: позиция} для элементов подпоследовательности.
+    """
+    tails = []  # tails[k] - номер в candidates последнего элемента лучшей цепочки длины k + 1
+    parents = [None] * len(candidates)
+    for number, (_, position) in enumerate(candidates):
+        low, high = 0, len(tails)
+        while low < high:
+            middle = (low + high) // 2
+            if candidates[tails[middle]][1] < position:
+                low = middle + 1
+            else:
+                high = middle
+        parents[number] = tails[low - 1] if low else None
+        if low == len(tails):
+            tails.append(number)
+        else:
+            tails[low] = number
+
+    kept = {}
+    number = tails[-1] if tails else None
+    while number is not None:
+        index, position = candidates[number]
+        kept[index] = position
+        number = parents[number]
+    return kept
+
+@route_by_id()
 def update_message_id(db_path, event_id, message_id):
     """
     Обновляет message_id мероприятия.
@@ -383,23 +848,24 @@ def update_message_id(db_path, event_id, message_id):
     """
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # Текущее время для updated_at
     try:
-        conn = get_db_connection(db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            UPDATE events
-            SET message_id = ?, updated_at = ?
-            WHERE id = ?
-            """,
-            (message_id, now, event_id),
-        )
-        conn.commit()
+        with get_db_connection(db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                UPDATE events
+                SET message_id = ?, updated_at = ?, version = version + 1
+                WHERE id = ?
+                """,
+                (message_id, now, event_id),
+            )
+            _invalidate_cached(cursor, event_id)
+            conn.commit()
         logger.info(f"message_id={message_id} обновлен для мероприятия с ID={event_id}")
     except sqlite3.Error as e:
+        reraise_if_locked(e)
         logger.error(f"Ошибка при обновлении message_id: {e}")
-#    finally:
-#        conn.close()
 
+@route_by_id()
 def add_scheduled_job(db_path, event_id, job_id, chat_id, execute_at, job_type=None):
     """
     Сохраняет информацию о запланированной задаче в базу данных.
@@ -422,6 +888,20 @@ def add_scheduled_job(db_path, event_id, job_id, chat_id, execute_at, job_type=N
         )
         conn.commit()
         logger.info(f"Запланированная задача {job_id} добавлена для мероприятия {event_id}.")
+@fan_out(concat)
+def get_scheduled_jobs(db_path: str) -> list[dict]:
+    """Возвращает все запланированные задачи (для восстановления при запуске бота)."""
+    with get_db_connection(db_path) as conn:
+        rows = conn.execute("SELECT * FROM scheduled_jobs").fetchall()
+    return [dict(row) for row in rows]
+
+@route_by_id("scheduled_job_id")
+def delete_scheduled_job_by_id(db_path: str, scheduled_job_id: int):
+    """Удаляет запись о задаче по её id в таблице scheduled_jobs."""
+    with get_db_connection(db_path) as conn:
+        conn.execute("DELETE FROM scheduled_jobs WHERE id = ?", (scheduled_job_id,))
+
+@route_by_id()
 def get_scheduled_job_id(db_path: str, event_id: int) -> str:
     """Возвращает job_id запланированной задачи для указанного мероприятия."""
     with get_db_connection(db_path) as conn:
@@ -430,6 +910,7 @@ def get_scheduled_job_id(db_path: str, event_id: int) -> str:
         result = cursor.fetchone()
         return result["job_id"] if result else None
 
+@route_by_id()
 def delete_scheduled_job(db_path: str, event_id: int, job_id: str = None, job_type: str = None):
     """
     Удаляет задачу из базы данных по event_id.
@@ -447,19 +928,119 @@ def delete_scheduled_job(db_path: str, event_id: int, job_id: str = None, job_ty
         conn.commit()
         logger.info(f"Задачи для мероприятия {event_id} удалены из базы данных.")
 
+@route_by_id()
 def delete_event(db_path: str, event_id: int):
     """Удаляет мероприятие и все связанные данные"""
     with get_db_connection(db_path) as conn:
         cursor = conn.cursor()
         # Удаляем связанные записи (благодаря ON DELETE CASCADE)
         cursor.execute("DELETE FROM events WHERE id = ?", (event_id,))
+        after_commit(conn, partial(event_cache.invalidate, event_id, REMOVED))
         conn.commit()
         logger.info(f"Мероприятие {event_id} удалено из базы данных")
 
 
-def get_user_templates(db_path, user_id):
+#Архив мероприятий
+ARCHIVE_REASON_FINISHED = "finished"
+ARCHIVE_REASON_DELETED = "deleted"
+
+@route_by_id()
+def archive_event(db_path: str, event_id: int, reason: str = ARCHIVE_REASON_FINISHED) -> bool:
+    """
+    Переносит мероприятие и его списки в архивные таблицы одной транзакцией
+    и удаляет их (вместе с запланированными задачами) из рабочих таблиц.
+    :param db_path: Путь к базе данных.
+    :param event_id: ID мероприятия.
+    :param reason: Причина архивации: ARCHIVE_REASON_FINISHED или ARCHIVE_REASON_DELETED.
+    :return: True, если мероприятие было найдено и перенесено.
+    """
+    try:
+        with immediate_transaction(db_path) as conn:
+            archived = _archive_events(conn.cursor(), [event_id], reason)
+    except sqlite3.Error as e:
+        reraise_if_locked(e)
+        logger.error(f"Ошибка при архивации мероприятия {event_id}: {e}")
+        return False
+
+    if archived:
+        logger.info(f"Мероприятие {event_id} перенесено в архив ({reason})")
+    return bool(archived)
+
+def archive_expired_events(db_path: str, before_ts: int, limit: int) -> int:
+    """
+    Переносит в архив до limit мероприятий, начавшихся раньше before_ts
+    (например, пропущенных, пока бот был остановлен).
+    :return: Количество перенесённых мероприятий.
+    """
+    with immediate_transaction(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT id FROM events WHERE starts_at < ? ORDER BY starts_at LIMIT ?",
+            (before_ts, limit),
+        )
+        event_ids = [row[0] for row in cursor.fetchall()]
+        return _archive_events(cursor, event_ids, ARCHIVE_REASON_FINISHED)
+
+def _archive_events(cursor, event_ids, reason):
+    """Переносит мероприятия в архив в рамках текущей транзакции. Возвращает их количество."""
+    if not event_ids:
+        return 0
+
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    placeholders = ", ".join("?" for _ in event_ids)
+    cursor.execute(
+        f"""
+        INSERT OR REPLACE INTO events_archive
+            (id, description, date, time, starts_at, participant_limit,
+             creator_id, chat_id, message_id, created_at, archived_at, reason)
+        SELECT id, description, date, time, starts_at, participant_limit,
+               creator_id, chat_id, message_id, created_at, ?, ?
+        FROM events WHERE id IN ({placeholders})
+        """,
+        (now, reason, *event_ids),
+    )
+    archived = cursor.rowcount
+    cursor.execute(
+        f"""
+        INSERT OR REPLACE INTO participation_archive (event_id, user_id, user_name, status, position)
+        SELECT p.event_id, p.user_id, COALESCE(u.display_name, 'ID ' || p.user_id), p.status, p.position
+        FROM participation p LEFT JOIN users u ON u.id = p.user_id
+        WHERE p.event_id IN ({placeholders})
+        """,
+        event_ids,
+    )
+    for table in ("participation", "scheduled_jobs"):
+        cursor.execute(f"DELETE FROM {table} WHERE event_id IN ({placeholders})", event_ids)
+    cursor.execute(f"DELETE FROM events WHERE id IN ({placeholders})", event_ids)
+    for event_id in event_ids:
+        after_commit(cursor.connection, partial(event_cache.invalidate, event_id, REMOVED))
+    return archived
+
+@route_by_id()
+def get_archived_event(db_path: str, event_id: int) -> Event | None:
+    """Возвращает мероприятие из архива вместе со списками или None."""
+    with get_db_connection(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM events_archive WHERE id = ?", (event_id,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+
+        roster = {STATUS_PARTICIPANT: [], STATUS_RESERVE: [], STATUS_DECLINED: []}
+        cursor.execute(
+            "SELECT user_id, user_name, status, position FROM participation_archive "
+            "WHERE event_id = ? ORDER BY status, position",
+            (event_id,),
+        )
+        for user_id, user_name, status, position in cursor.fetchall():
+            roster[status].append(Participation(user_id, user_name, status, position))
+    return Event.from_row(row, _roster=roster)
+
+
+@fan_out(concat_sorted("created_at", reverse=True))
+def get_user_templates(db_path, user_id) -> list[Template]:
     """Возвращает шаблоны пользователя с проверкой существования пользователя"""
-    with sqlite3.connect(db_path) as conn:
+    with get_db_connection(db_path) as conn:
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
 
@@ -469,10 +1050,92 @@ def get_user_templates(db_path, user_id):
             return []
 
         cursor.execute(
-            """SELECT id, name, description, time, participant_limit 
-            FROM event_templates 
+            """SELECT * FROM event_templates 
             WHERE user_id = ? 
             ORDER BY created_at DESC""",
             (user_id,)
         )
-        return [dict(row) for row in cursor.fetchall()]
\ No newline at end of file
+        return [Template.from_row(row) for row in cursor.fetchall()]
+
+@route_by_id("template_id")
+def get_template(db_path, template_id, user_id) -> Template | None:
+    """
+    Возвращает шаблон пользователя.
+    :param db_path: Путь к базе данных.
+    :param template_id: ID шаблона.
+    :param user_id: ID владельца шаблона.
+    :return: Шаблон или None, если шаблон не найден или принадлежит другому пользователю.
+    """
+    with get_db_connection(db_path) as conn:
+        row = conn.execute(
+            "SELECT * FROM event_templates WHERE id = ? AND user_id = ?",
+            (template_id, user_id)
+        ).fetchone()
+    return Template.from_row(row) if row else None
+
+
+@route_by_user()
+def add_template(db_path, user_id, name, description, date, time, participant_limit):
+    """
+    Сохраняет шаблон мероприятия.
+    :return: ID нового шаблона.
+    """
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with get_db_connection(db_path) as conn:
+        cursor = conn.cursor()
+        _ensure_user(cursor, user_id, now)
+        cursor.execute(
+            """INSERT INTO event_templates 
+            (user_id, name, description, date, time, participant_limit, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (user_id, name, description, date, time, participant_limit, now)
+        )
+        return cursor.lastrowid
+
+
+@route_by_id("template_id")
+def delete_template(db_path, template_id):
+    """Удаляет шаблон по его ID."""
+    with get_db_connection(db_path) as conn:
+        conn.execute("DELETE FROM event_templates WHERE id = ?", (template_id,))
+
+
+@route_by_user()
+def save_user(db_path, user_id, first_name, last_name, username):
+    """
+    Сохраняет или обновляет данные пользователя Telegram.
+    :param db_path: Путь к базе данных.
+    :param user_id: ID пользователя.
+    """
+    with get_db_connection(db_path) as conn:
+        apply_save_user(conn.cursor(), user_id, first_name, last_name, username)
+
+
+@route_by_user()
+def apply_save_user(cursor, user_id, first_name, last_name, username):
+    """Сохраняет данные пользователя в уже открытой транзакции (для очереди записи write_queue)."""
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    # UPSERT, а не INSERT OR REPLACE: REPLACE удаляет строку и каскадно удалил бы шаблоны пользователя
+    cursor.execute(
+        """INSERT INTO users
+        (id, first_name, last_name, username, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (id) DO UPDATE SET
+            first_name = excluded.first_name,
+            last_name = excluded.last_name,
+            username = excluded.username,
+            updated_at = excluded.updated_at""",
+        (user_id, first_name, last_name or "", username or "", now, now)
+    )
+
+def _ensure_user(cursor, user_id, now):
+    """
+    Добавляет пользователя-заглушку, если его ещё нет в users (нужно для внешнего ключа
+    event_templates). Настоящие данные запишет save_user; существующая строка не меняется.
+    """
+    cursor.execute(
+        """INSERT INTO users (id, first_name, last_name, username, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (id) DO NOTHING""",
+        (user_id, "Данные из контекста", "Данные из контекста", "Данные из контекста", now, now)
+    )
@@ -0,0 +1,175 @@
+import os
+import sqlite3
+import threading
+
+from src.database.connection import get_connection
+from src.database.models import Draft
+from src.logger.logger import logger
+
+# Столбцы таблицы drafts (кроме id), которые сохраняются при сбросе на диск
+DRAFT_COLUMNS = (
+    "creator_id", "chat_id", "message_id", "bot_message_id", "status",
+    "description", "date", "time", "participant_limit", "event_id",
+    "original_message_id", "created_at", "updated_at", "is_from_template",
+)
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class DraftStore:
+    """
+    Черновики одной БД в памяти процесса.
+    Пока процесс работает, источник истины - память: чтение и изменение черновиков
+    не обращаются к диску. Изменения и удаления копятся и сбрасываются в drafts
+    функцией flush (периодической задачей и при остановке бота).
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._by_id = {}
+        # (creator_id, chat_id) -> множество ID черновиков
+        self._by_user_chat = {}
+        self._dirty = set()
+        self._deleted = set()
+
+    def _ensure_loaded(self):
+        """Загружает черновики из БД при первом обращении."""
+        if self._loaded:
+            return
+        with get_connection(self.db_path) as conn:
+            rows = conn.execute("SELECT * FROM drafts").fetchall()
+        for row in rows:
+            self._index(dict(row))
+        self._loaded = True
+        logger.info(f"Загружено черновиков из {self.db_path}: {len(rows)}")
+
+    def _index(self, draft):
+        self._by_id[draft["id"]] = draft
+        self._by_user_chat.setdefault((draft["creator_id"], draft["chat_id"]), set()).add(draft["id"])
+
+    def add(self, draft):
+        """Добавляет в память черновик, уже сохранённый в БД (с присвоенным id)."""
+        with self._lock:
+            self._ensure_loaded()
+            self._index(dict(draft))
+
+    def get(self, draft_id):
+        """Возвращает копию черновика (Draft) или None."""
+        with self._lock:
+            self._ensure_loaded()
+            draft = self._by_id.get(draft_id)
+            return Draft.from_row(draft) if draft else None
+
+    def get_latest(self, creator_id, chat_id):
+        """Возвращает копию последнего (с наибольшим id) черновика пользователя в чате или None."""
+        with self._lock:
+            self._ensure_loaded()
+            ids = self._by_user_chat.get((creator_id, chat_id))
+            return Draft.from_row(self._by_id[max(ids)]) if ids else None
+
+    def update(self, draft_id, fields):
+        """
+        Изменяет черновик в памяти и помечает его для сброса на диск.
+        :return: True, если черновик найден.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            draft = self._by_id.get(draft_id)
+            if draft is None:
+                return False
+            draft.update(fields)
+            self._dirty.add(draft_id)
+            return True
+
+    def delete(self, draft_id, persisted=False):
+        """
+        Удаляет черновик из памяти и помечает его для удаления из БД.
+        :param persisted: Черновик уже удалён из БД (например, в транзакции создания мероприятия).
+        """
+        with self._lock:
+            self._ensure_loaded()
+            draft = self._by_id.pop(draft_id, None)
+            if draft is not None:
+                key = (draft["creator_id"], draft["chat_id"])
+                self._by_user_chat[key].discard(draft_id)
+                if not self._by_user_chat[key]:
+                    del self._by_user_chat[key]
+            self._dirty.discard(draft_id)
+            if not persisted:
+                self._deleted.add(draft_id)
+
+    def pop_expired(self, cutoff):
+        """
+        Удаляет из памяти черновики, не изменявшиеся с момента cutoff, и помечает их
+        для удаления из БД (удаляются одним запросом при ближайшем сбросе).
+        :param cutoff: Время в формате "%Y-%m-%d %H:%M:%S".
+        :return: Список удалённых черновиков (Draft).
+        """
+        with self._lock:
+            self._ensure_loaded()
+            expired = [
+                draft for draft in self._by_id.values()
+                if (draft.get("updated_at") or draft.get("created_at") or cutoff) < cutoff
+            ]
+            for draft in expired:
+                self.delete(draft["id"])
+            return [Draft.from_row(draft) for draft in expired]
+
+    def flush(self):
+        """
+        Сбрасывает накопленные изменения и удаления в БД одной транзакцией.
+        :return: Количество записанных черновиков (изменённых и удалённых).
+        """
+        with self._lock:
+            if not self._dirty and not self._deleted:
+                return 0
+            dirty = {draft_id: dict(self._by_id[draft_id]) for draft_id in self._dirty}
+            deleted = set(self._deleted)
+            self._dirty.clear()
+            self._deleted.clear()
+
+        assignments = ", ".join(f"{column} = ?" for column in DRAFT_COLUMNS)
+        try:
+            with get_connection(self.db_path) as conn:
+                conn.executemany(
+                    f"UPDATE drafts SET {assignments} WHERE id = ?",
+                    [tuple(draft.get(column) for column in DRAFT_COLUMNS) + (draft_id,)
+                     for draft_id, draft in dirty.items()],
+                )
+                conn.executemany("DELETE FROM drafts WHERE id = ?", [(draft_id,) for draft_id in deleted])
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка сохранения черновиков в {self.db_path}: {e}")
+            # Возвращаем изменения в очередь, если их не перекрыли более новые
+            with self._lock:
+                self._dirty.update(draft_id for draft_id in dirty if draft_id in self._by_id)
+                self._deleted.update(deleted)
+            return 0
+
+        logger.debug(f"Черновики сохранены в {self.db_path}: изменено {len(dirty)}, удалено {len(deleted)}")
+        return len(dirty) + len(deleted)
+
+
+def get_draft_store(db_path):
+    """Возвращает хранилище черновиков для файла БД (одно на процесс)."""
+    path = os.path.abspath(os.fspath(db_path))
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = DraftStore(path)
+        return store
+
+
+def flush_all_drafts():
+    """Сбрасывает на диск изменения черновиков всех хранилищ."""
+    with _stores_lock:
+        stores = list(_stores.values())
+    return sum(store.flush() for store in stores)
+
+
+def reset_draft_stores():
+    """Забывает все черновики в памяти без сохранения (при повторной инициализации БД и в тестах)."""
+    with _stores_lock:
+        _stores.clear()
@@ -0,0 +1,131 @@
+import dataclasses
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from config import EVENT_CACHE_SIZE, EVENT_CACHE_TTL_SEC
+
+# Версия-заглушка для удалённых и архивированных мероприятий: их снимки больше не кэшируются
+REMOVED = math.inf
+
+
+class EventCache:
+    """
+    Кэш мероприятий (вместе со списками) в памяти процесса: LRU с ограничением
+    по числу записей и времени жизни.
+    Любое изменение мероприятия (в том числе имён в его списках и счётчиков) увеличивает
+    его версию, а после фиксации сбрасывает запись и запоминает новую версию.
+    Снимок с меньшей версией (прочитанный до фиксации изменения) в кэш не попадает,
+    поэтому чтение из пула потоков чтения не может вернуть в кэш устаревшие данные.
+    """
+
+    def __init__(self, max_size=EVENT_CACHE_SIZE, ttl=EVENT_CACHE_TTL_SEC):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # event_id -> (путь к БД, момент устаревания, Event)
+        self._entries = OrderedDict()
+        # event_id -> минимальная версия, допустимая для кэширования
+        self._floors = OrderedDict()
+        self._stats = Counter()
+
+    def get(self, db_path, event_id):
+        """Возвращает копию мероприятия из кэша или None."""
+        if self.max_size <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(event_id)
+            if entry is None or entry[0] != db_path:
+                self._stats["misses"] += 1
+                return None
+            if entry[1] < time.monotonic():
+                del self._entries[event_id]
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(event_id)
+            self._stats["hits"] += 1
+            return _copy(entry[2])
+
+    def peek(self, db_path, event_id):
+        """
+        Возвращает мероприятие из кэша без копирования или None.
+        Результат общий для всех потоков: только для чтения отдельных полей.
+        """
+        if self.max_size <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(event_id)
+            if entry is None or entry[0] != db_path or entry[1] < time.monotonic():
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+            return entry[2]
+
+    def put(self, db_path, event):
+        """Сохраняет копию мероприятия, если снимок не старее последнего изменения."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            floor = self._floors.get(event.id)
+            if floor is not None:
+                if event.version < floor:
+                    self._stats["rejected"] += 1
+                    return
+                del self._floors[event.id]
+            self._entries[event.id] = (db_path, time.monotonic() + self.ttl, _copy(event))
+            self._entries.move_to_end(event.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, event_id, min_version=None):
+        """
+        Сбрасывает мероприятие из кэша.
+        :param min_version: Версия мероприятия после текущего изменения (REMOVED - мероприятие удалено).
+        """
+        with self._lock:
+            self._entries.pop(event_id, None)
+            self._stats["invalidations"] += 1
+            if min_version is not None:
+                self._floors[event_id] = max(min_version, self._floors.get(event_id, 0))
+                self._floors.move_to_end(event_id)
+                # Версии отменённых изменений и удалённых мероприятий больше не нужны
+                while len(self._floors) > max(self.max_size, 1) * 4:
+                    self._floors.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._floors.clear()
+
+    def stats(self, reset=False):
+        """Счётчики кэша: hits, misses, expired, evictions, invalidations, rejected и размер."""
+        with self._lock:
+            stats = dict(self._stats, size=len(self._entries))
+            if reset:
+                self._stats.clear()
+        return stats
+
+
+def _copy(event):
+    """Копия мероприятия со своими списками: вызывающий код может изменять результат get_event."""
+    roster = {status: list(users) for status, users in event._get_roster().items()}
+    return dataclasses.replace(event, _roster=roster, _roster_loader=None)
+
+
+event_cache = EventCache()
+
+
+def get_event_cache_stats(reset=False):
+    """
+    Возвращает счётчики кэша мероприятий.
+    :param reset: Обнулить счётчики после чтения (для отчёта за период).
+    """
+    return event_cache.stats(reset)
+
+
+def clear_event_cache():
+    """Очищает кэш мероприятий (при повторной инициализации БД и в тестах)."""
+    event_cache.clear()
@@ -1,10 +1,28 @@
-import sqlite3
+from datetime import datetime
+
+from config import tz
+from src.database.connection import get_connection
+from src.database.maintenance import (
+    delete_orphan_rows, enable_incremental_vacuum, log_size_report, recount_roster_counters, table_sizes,
+)
+from src.database.migrations import apply_migrations, table_columns
+from src.logger.logger import logger
+from src.utils.utils import to_starts_at
+
 
 def init_db(db_path):
-    """Инициализирует базу данных и создает таблицы, если они не существуют."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    """
+    Инициализирует базу данных: применяет недостающие миграции схемы.
+    Новая БД создаётся с нуля (сразу с auto_vacuum=INCREMENTAL), существующая обновляется
+    до последней версии на месте.
+    """
+    conn = get_connection(db_path)
+    enable_incremental_vacuum(conn, db_path)
+    apply_migrations(conn, MIGRATIONS, "events")
+
 
+def _create_base_schema(cursor):
+    """Миграция 1: исходные таблицы (для старых БД без версии выполняется без изменений)."""
     # Таблица мероприятий
     cursor.execute(
         """
@@ -23,51 +41,6 @@ def init_db(db_path):
         """
     )
 
-    # Таблица участников
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS participants (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            event_id INTEGER NOT NULL,
-            user_id INTEGER NOT NULL,
-            user_name TEXT NOT NULL,
-            created_at TEXT NOT NULL,
-            updated_at TEXT NOT NULL,
-            FOREIGN KEY (event_id) REFERENCES events (id) ON DELETE CASCADE
-        )
-        """
-    )
-
-    # Таблица резерва
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS reserve (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            event_id INTEGER NOT NULL,
-            user_id INTEGER NOT NULL,
-            user_name TEXT NOT NULL,
-            created_at TEXT NOT NULL,
-            updated_at TEXT NOT NULL,
-            FOREIGN KEY (event_id) REFERENCES events (id) ON DELETE CASCADE
-        )
-        """
-    )
-
-    # Таблица отказавшихся
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS declined (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            event_id INTEGER NOT NULL,
-            user_id INTEGER NOT NULL,
-            user_name TEXT NOT NULL,
-            created_at TEXT NOT NULL,
-            updated_at TEXT NOT NULL,
-            FOREIGN KEY (event_id) REFERENCES events (id) ON DELETE CASCADE
-        )
-        """
-    )
-
     # Таблица для хранения запланированных задач
     cursor.execute(
         """
@@ -110,13 +83,309 @@ def init_db(db_path):
         FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
     )
     """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_event_templates_user_id ON event_templates (user_id)")
 
 
-    # Создание индексов
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_participants_event_id ON participants (event_id)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reserve_event_id ON reserve (event_id)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_declined_event_id ON declined (event_id)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_event_templates_user_id ON event_templates (user_id)")
+def _create_participation(cursor):
+    """Миграция 2: единая таблица participation вместо participants, reserve и declined."""
+    # Таблица участия: участники, резерв и отказавшиеся в одной таблице.
+    # status - 'participant' | 'reserve' | 'declined',
+    # position - порядок в пределах мероприятия (для резерва - очередь).
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS participation (
+            event_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            user_name TEXT NOT NULL,
+            status TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            UNIQUE (event_id, user_id),
+            FOREIGN KEY (event_id) REFERENCES events (id) ON DELETE CASCADE
+        )
+        """
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_participation_event_status ON participation (event_id, status, position)"
+    )
+
+    # Перенос данных из старых таблиц participants/reserve/declined
+    migrate_participation(cursor)
+
+
+def _create_hot_path_indexes(cursor):
+    """
+    Миграция 3: индексы для частых запросов.
+    Проверки членства (event_id, user_id) обслуживает уникальный индекс participation.
+    """
+    # get_events_by_participant: поиск по пользователю, покрывающий status и event_id
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_participation_user ON participation (user_id, status, event_id)"
+    )
+    # Поиск и удаление задач мероприятия (в том числе по типу)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_scheduled_jobs_event ON scheduled_jobs (event_id, job_type)"
+    )
+
+
+def migrate_participation(cursor):
+    """
+    Переносит записи из старых таблиц participants, reserve и declined в таблицу participation
+    и удаляет старые таблицы. Порядок внутри списков сохраняется по исходному id.
+    Если пользователь оказался сразу в нескольких списках, приоритет у участников, затем у резерва.
+    """
+    legacy_tables = (
+        ("participants", "participant"),
+        ("reserve", "reserve"),
+        ("declined", "declined"),
+    )
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    existing = {row[0] for row in cursor.fetchall()}
+
+    for table, status in legacy_tables:
+        if table not in existing:
+            continue
+        cursor.execute(
+            f"""
+            INSERT OR IGNORE INTO participation
+                (event_id, user_id, user_name, status, position, created_at, updated_at)
+            SELECT event_id, user_id, user_name, ?, id, created_at, updated_at
+            FROM {table}
+            ORDER BY id
+            """,
+            (status,),
+        )
+        cursor.execute(f"DROP TABLE {table}")
+
+
+def _add_starts_at(cursor):
+    """
+    Миграция 4: столбец starts_at (момент начала, Unix-время UTC) с индексом.
+    Заполняется по сохранённым date и time; если их не удаётся разобрать, остаётся NULL.
+    """
+    if "starts_at" not in table_columns(cursor, "events"):
+        cursor.execute("ALTER TABLE events ADD COLUMN starts_at INTEGER")
+
+    cursor.execute("SELECT id, date, time FROM events WHERE starts_at IS NULL")
+    for event_id, date, time in cursor.fetchall():
+        starts_at = to_starts_at(date, time, tz)
+        if starts_at is None:
+            logger.warning(f"Не удалось определить время начала мероприятия {event_id}: {date} {time}")
+            continue
+        cursor.execute("UPDATE events SET starts_at = ? WHERE id = ?", (starts_at, event_id))
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_starts_at ON events (starts_at)")
+
+
+def _create_archive(cursor):
+    """
+    Миграция 5: архив завершённых и удалённых мероприятий.
+    Архив не участвует в горячих запросах; списки хранятся компактно, без служебных дат,
+    в таблице WITHOUT ROWID с ключом (event_id, user_id).
+    """
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS events_archive (
+            id INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            date TEXT NOT NULL,
+            time TEXT NOT NULL,
+            starts_at INTEGER,
+            participant_limit INTEGER,
+            creator_id INTEGER NOT NULL,
+            chat_id INTEGER,
+            message_id INTEGER,
+            created_at TEXT NOT NULL,
+            archived_at TEXT NOT NULL,
+            reason TEXT NOT NULL
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS participation_archive (
+            event_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            user_name TEXT NOT NULL,
+            status TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            PRIMARY KEY (event_id, user_id)
+        ) WITHOUT ROWID
+        """
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_archive_chat ON events_archive (chat_id, starts_at)")
+
+
+def _delete_orphans(cursor):
+    """
+    Миграция 6: однократно удаляет списки и задачи удалённых мероприятий, накопившиеся,
+    пока соединения работали без PRAGMA foreign_keys (каскадное удаление не срабатывало).
+    Дальше такие строки удаляет ежедневное обслуживание (maintenance.sweep_orphans).
+    """
+    deleted = delete_orphan_rows(cursor)
+    if any(deleted.values()):
+        logger.info(f"Удалены осиротевшие строки: {deleted}")
+
+
+def _add_event_version(cursor):
+    """
+    Миграция 7: счётчик версий мероприятия для оптимистичных блокировок.
+    Каждое изменение мероприятия или его списков увеличивает version на 1.
+    """
+    if "version" not in table_columns(cursor, "events"):
+        cursor.execute("ALTER TABLE events ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+
+def create_roster_counter_triggers(cursor):
+    """
+    Триггеры, поддерживающие счётчики participants_count, reserve_count и declined_count
+    в events при любом изменении participation (в той же транзакции, что и само изменение).
+    """
+    counters = (
+        "participants_count = participants_count + {sign} ({row}.status = 'participant'), "
+        "reserve_count = reserve_count + {sign} ({row}.status = 'reserve'), "
+        "declined_count = declined_count + {sign} ({row}.status = 'declined')"
+    )
+    cursor.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_participation_counters_insert
+        AFTER INSERT ON participation
+        BEGIN
+            UPDATE events SET {counters.format(sign="+", row="NEW")} WHERE id = NEW.event_id;
+        END
+        """
+    )
+    cursor.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_participation_counters_delete
+        AFTER DELETE ON participation
+        BEGIN
+            UPDATE events SET {counters.format(sign="-", row="OLD")} WHERE id = OLD.event_id;
+        END
+        """
+    )
+    cursor.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_participation_counters_update
+        AFTER UPDATE OF status ON participation
+        WHEN OLD.status IS NOT NEW.status
+        BEGIN
+            UPDATE events SET {counters.format(sign="-", row="OLD")} WHERE id = OLD.event_id;
+            UPDATE events SET {counters.format(sign="+", row="NEW")} WHERE id = NEW.event_id;
+        END
+        """
+    )
+
+
+def _add_roster_counters(cursor):
+    """
+    Миграция 8: счётчики списков в events (проверка лимита и отображение без чтения participation).
+    """
+    existing = table_columns(cursor, "events")
+    for column in ("participants_count", "reserve_count", "declined_count"):
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE events ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+    recount_roster_counters(cursor)
+    create_roster_counter_triggers(cursor)
+
+
+def _compact_participation(cursor):
+    """
+    Миграция 9: компактное хранение списков. participation пересоздаётся таблицей
+    WITHOUT ROWID с ключом (event_id, user_id) и целочисленным Unix-временем в created_at
+    и updated_at; имя пользователя хранится один раз в users.display_name
+    и подставляется при чтении (db_operations.ROSTER_SELECT).
+    Освободившиеся страницы возвращает ОС ежедневное обслуживание (incremental vacuum).
+    """
+    before = table_sizes(cursor)
+    if "display_name" not in table_columns(cursor, "users"):
+        cursor.execute("ALTER TABLE users ADD COLUMN display_name TEXT")
+    if "user_name" not in table_columns(cursor, "participation"):
+        return
+
+    # Имена участников переносятся в users (последнее записанное имя пользователя)
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    cursor.execute(
+        """
+        INSERT INTO users (id, created_at, updated_at)
+        SELECT DISTINCT user_id, ?, ? FROM participation WHERE true
+        ON CONFLICT (id) DO NOTHING
+        """,
+        (now, now),
+    )
+    cursor.execute(
+        """
+        UPDATE users SET display_name = (
+            SELECT p.user_name FROM participation p
+            WHERE p.user_id = users.id
+            ORDER BY p.updated_at DESC LIMIT 1
+        )
+        WHERE display_name IS NULL AND id IN (SELECT user_id FROM participation)
+        """
+    )
+
+    cursor.execute(
+        """
+        CREATE TABLE participation_compact (
+            event_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            created_at INTEGER NOT NULL,
+            updated_at INTEGER NOT NULL,
+            PRIMARY KEY (event_id, user_id),
+            FOREIGN KEY (event_id) REFERENCES events (id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+        """
+    )
+    # Время хранилось строкой в местном часовом поясе; неразборчивые значения заменяются текущим
+    to_epoch = "COALESCE(CAST(strftime('%s', {column}, 'utc') AS INTEGER), CAST(strftime('%s', 'now') AS INTEGER))"
+    cursor.execute(
+        f"""
+        INSERT INTO participation_compact (event_id, user_id, status, position, created_at, updated_at)
+        SELECT event_id, user_id, status, position,
+               {to_epoch.format(column="created_at")}, {to_epoch.format(column="updated_at")}
+        FROM participation
+        """
+    )
+    cursor.execute("DROP TABLE participation")
+    cursor.execute("ALTER TABLE participation_compact RENAME TO participation")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_participation_event_status ON participation (event_id, status, position)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_participation_user ON participation (user_id, status, event_id)"
+    )
+    create_roster_counter_triggers(cursor)
+    log_size_report("Компактное хранение списков", before, table_sizes(cursor))
+
+
+def _create_shard_map(cursor):
+    """
+    Миграция 10: закрепление чатов за шардами основной БД (используется только в шарде 0,
+    см. sharding.ShardMap).
+    """
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS shard_map (
+            chat_id INTEGER PRIMARY KEY,
+            shard INTEGER NOT NULL
+        )
+        """
+    )
+
 
-    conn.commit()
-    conn.close()
\ No newline at end of file
+# Миграции основной БД: (версия, описание, функция). Новые миграции добавляются только в конец.
+MIGRATIONS = [
+    (1, "Базовая схема", _create_base_schema),
+    (2, "Единая таблица participation", _create_participation),
+    (3, "Индексы для горячих запросов", _create_hot_path_indexes),
+    (4, "Время начала мероприятия starts_at", _add_starts_at),
+    (5, "Архив мероприятий", _create_archive),
+    (6, "Удаление осиротевших строк", _delete_orphans),
+    (7, "Версия мероприятия", _add_event_version),
+    (8, "Счётчики списков мероприятия", _add_roster_counters),
+    (9, "Компактное хранение списков", _compact_participation),
+    (10, "Закрепление чатов за шардами", _create_shard_map),
+]
@@ -1,11 +1,26 @@
-import sqlite3
+from src.database.connection import get_connection
+from src.database.draft_store import DRAFT_COLUMNS
+from src.database.maintenance import enable_incremental_vacuum
+from src.database.migrations import apply_migrations, table_columns
 
 def init_drafts_db(db_path):
-    """Инициализирует базу данных для черновиков."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    """
+    Инициализирует базу данных для черновиков: применяет недостающие миграции схемы.
+    После этого структура таблицы drafts гарантирована и не проверяется при каждом запросе.
+    """
+    conn = get_connection(db_path)
+    enable_incremental_vacuum(conn, db_path)
+    apply_migrations(conn, DRAFT_MIGRATIONS, "drafts")
+
+
+def _create_drafts_table(cursor, with_event_fk=True):
+    """
+    Миграция 1: таблица черновиков.
+    Исходная схема ссылалась на events из другой БД; миграция 4 убирает этот ключ.
+    """
+    foreign_key = ",\n            FOREIGN KEY (event_id) REFERENCES events(id)" if with_event_fk else ""
     cursor.execute(
-        """
+        f"""
         CREATE TABLE IF NOT EXISTS drafts (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             creator_id INTEGER NOT NULL,
@@ -21,10 +36,57 @@ def init_drafts_db(db_path):
             original_message_id INTEGER,
             created_at TEXT NOT NULL,
             updated_at TEXT NOT NULL,
-            is_from_template BOOLEAN DEFAULT 0,
-            FOREIGN KEY (event_id) REFERENCES events(id)
+            is_from_template BOOLEAN DEFAULT 0{foreign_key}
         )
         """
     )
-    conn.commit()
-    conn.close()
\ No newline at end of file
+
+
+def _add_missing_draft_columns(cursor):
+    """Миграция 2: добавляет столбцы, которых нет в таблицах drafts старых версий."""
+    added_columns = (
+        ("bot_message_id", "INTEGER"),
+        ("event_id", "INTEGER"),
+        ("original_message_id", "INTEGER"),
+        ("is_from_template", "BOOLEAN DEFAULT 0"),
+    )
+    existing = table_columns(cursor, "drafts")
+    for column, column_type in added_columns:
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE drafts ADD COLUMN {column} {column_type}")
+
+
+def _create_draft_indexes(cursor):
+    """Миграция 3: индекс для get_user_chat_draft (последний черновик пользователя в чате)."""
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_drafts_creator_chat ON drafts (creator_id, chat_id, id)"
+    )
+
+
+def _drop_drafts_foreign_key(cursor):
+    """
+    Миграция 4: пересоздаёт drafts без FOREIGN KEY (event_id) REFERENCES events(id).
+    Таблица events находится в другой БД, поэтому при включённых внешних ключах
+    такой ключ нельзя проверить и любая запись в drafts завершалась бы ошибкой.
+    """
+    if not cursor.execute("PRAGMA foreign_key_list(drafts)").fetchall():
+        return
+
+    # Столбцы, добавленные следующими миграциями, в старой таблице ещё отсутствуют
+    existing = table_columns(cursor, "drafts")
+    columns = ", ".join(["id", *(column for column in DRAFT_COLUMNS if column in existing)])
+    cursor.execute("ALTER TABLE drafts RENAME TO drafts_old")
+    cursor.execute("DROP INDEX IF EXISTS idx_drafts_creator_chat")
+    _create_drafts_table(cursor, with_event_fk=False)
+    cursor.execute(f"INSERT INTO drafts ({columns}) SELECT {columns} FROM drafts_old")
+    cursor.execute("DROP TABLE drafts_old")
+    _create_draft_indexes(cursor)
+
+
+# Миграции БД черновиков: (версия, описание, функция). Новые миграции добавляются только в конец.
+DRAFT_MIGRATIONS = [
+    (1, "Таблица черновиков", _create_drafts_table),
+    (2, "Недостающие столбцы черновиков", _add_missing_draft_columns),
+    (3, "Индекс черновиков по пользователю и чату", _create_draft_indexes),
+    (4, "Черновики без внешнего ключа на другую БД", _drop_drafts_foreign_key),
+]
@@ -0,0 +1,257 @@
+import os
+import sqlite3
+import time
+from functools import partial
+
+from config import DB_VACUUM_PAGES, DB_VACUUM_REBUILD
+from src.database.connection import (
+    SQLiteFileBackend, after_commit, get_backend, get_connection, immediate_transaction,
+)
+from src.database.event_cache import event_cache
+from src.logger.logger import logger
+
+# Значение PRAGMA auto_vacuum, при котором работает PRAGMA incremental_vacuum
+AUTO_VACUUM_INCREMENTAL = 2
+
+# Дочерние таблицы мероприятий: (таблица, столбец со ссылкой на events.id)
+EVENT_CHILD_TABLES = (
+    ("participation", "event_id"),
+    ("scheduled_jobs", "event_id"),
+)
+
+
+def _database_size(conn, db_path):
+    """
+    Размер базы в байтах: файл БД вместе с WAL-журналом, для баз в памяти - по числу страниц.
+    """
+    if get_backend().name != SQLiteFileBackend.name:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        return conn.execute("PRAGMA page_count").fetchone()[0] * page_size
+
+    size = 0
+    for path in (db_path, f"{db_path}-wal"):
+        if os.path.exists(path):
+            size += os.path.getsize(path)
+    return size
+
+
+def enable_incremental_vacuum(conn, db_path, rebuild=False):
+    """
+    Включает режим auto_vacuum=INCREMENTAL, при котором работает PRAGMA incremental_vacuum.
+    Режим меняется только вместе с перестроением файла (VACUUM): для новой пустой базы
+    это мгновенно, а для базы с данными VACUUM переписывает весь файл и блокирует запись
+    на всё время работы, поэтому выполняется только при rebuild=True (разовая миграция).
+    :param conn: Постоянное соединение с базой вне открытой транзакции.
+    :param rebuild: Перестроить базу с данными.
+    :return: True, если режим включён.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+        return True
+    if conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone() and not rebuild:
+        return False
+
+    conn.execute(f"PRAGMA auto_vacuum={AUTO_VACUUM_INCREMENTAL}")
+    conn.execute("VACUUM")
+    logger.info(f"Для БД {db_path} включён режим auto_vacuum=INCREMENTAL")
+    return True
+
+
+def run_maintenance(db_path, vacuum_pages=DB_VACUUM_PAGES, rebuild=DB_VACUUM_REBUILD):
+    """
+    Обслуживание базы данных: обновляет статистику планировщика (PRAGMA optimize),
+    возвращает ОС до vacuum_pages свободных страниц (incremental vacuum)
+    и переносит WAL-журнал в основной файл с усечением журнала (checkpoint).
+    Базы, созданные до включения auto_vacuum=INCREMENTAL, освобождают страницы только
+    после разового перестроения (rebuild, см. DB_VACUUM_REBUILD); до этого шаг пропускается.
+    Выполнять в потоке БД (run_db), вне открытых транзакций.
+    :param db_path: Путь к базе данных.
+    :param vacuum_pages: Максимум освобождаемых страниц за один запуск.
+    :param rebuild: Перевести базу в auto_vacuum=INCREMENTAL полным VACUUM.
+    :return: Словарь со статистикой или None при ошибке.
+    """
+    conn = get_connection(db_path)
+    started = time.monotonic()
+    try:
+        size_before = _database_size(conn, db_path)
+        freelist_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+            # execute() делает один шаг запроса и освобождает одну страницу;
+            # executescript выполняет PRAGMA до конца
+            conn.executescript(f"PRAGMA incremental_vacuum({int(vacuum_pages)})")
+        elif not enable_incremental_vacuum(conn, db_path, rebuild):
+            logger.warning(
+                f"БД {db_path} создана без auto_vacuum=INCREMENTAL, свободные страницы не освобождаются; "
+                f"для разового перестроения задайте DB_VACUUM_REBUILD=true"
+            )
+
+        conn.execute("PRAGMA optimize")
+        busy, wal_pages, checkpointed = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+
+        stats = {
+            "size_before": size_before,
+            "size_after": _database_size(conn, db_path),
+            "freed_pages": freelist_before - conn.execute("PRAGMA freelist_count").fetchone()[0],
+            "checkpoint_busy": bool(busy),
+            "duration_ms": int((time.monotonic() - started) * 1000),
+        }
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка обслуживания БД {db_path}: {e}")
+        return None
+
+    logger.info(
+        f"Обслуживание БД {db_path}: {stats['size_before']} -> {stats['size_after']} байт, "
+        f"освобождено страниц: {stats['freed_pages']}, "
+        f"checkpoint {'не завершён (БД занята)' if busy else 'выполнен'}, {stats['duration_ms']} мс"
+    )
+    return stats
+
+
+def table_sizes(cursor):
+    """
+    Размер таблиц вместе с их индексами (байт) по виртуальной таблице dbstat.
+    :return: Словарь {таблица: байт} или None, если SQLite собран без dbstat.
+    """
+    try:
+        cursor.execute(
+            """
+            SELECT COALESCE(m.tbl_name, s.name), SUM(s.pgsize)
+            FROM dbstat s LEFT JOIN sqlite_master m ON m.name = s.name
+            GROUP BY 1
+            """
+        )
+    except sqlite3.OperationalError:
+        return None
+    return {name: size for name, size in cursor.fetchall()}
+
+
+def log_size_report(title, before, after):
+    """Пишет в лог изменение размера таблиц (результаты table_sizes до и после)."""
+    if before is None or after is None:
+        return
+    changed = [
+        f"{table}: {before.get(table, 0)} -> {after.get(table, 0)}"
+        for table in sorted(before.keys() | after.keys())
+        if before.get(table, 0) != after.get(table, 0)
+    ]
+    logger.info(
+        f"{title}: {sum(before.values())} -> {sum(after.values())} байт в таблицах"
+        f"{' (' + ', '.join(changed) + ')' if changed else ''}"
+    )
+
+
+def delete_orphan_rows(cursor):
+    """
+    Удаляет в рамках текущей транзакции строки дочерних таблиц без мероприятия.
+    :return: Словарь {таблица: удалено строк}.
+    """
+    return {
+        table: cursor.execute(f"DELETE FROM {table} WHERE {column} NOT IN (SELECT id FROM events)").rowcount
+        for table, column in EVENT_CHILD_TABLES
+    }
+
+
+def sweep_orphans(db_path):
+    """
+    Удаляет строки дочерних таблиц, оставшиеся от удалённых мероприятий
+    (пока внешние ключи не были включены, ON DELETE CASCADE не срабатывал).
+    Каждая таблица чистится одним запросом, всё - одной транзакцией.
+    :param db_path: Путь к базе мероприятий.
+    :return: Словарь {таблица: удалено строк, "bytes": освобождено байт в файле} или None при ошибке.
+    """
+    try:
+        with immediate_transaction(db_path) as conn:
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            freelist_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            stats = delete_orphan_rows(conn.cursor())
+            stats["bytes"] = (conn.execute("PRAGMA freelist_count").fetchone()[0] - freelist_before) * page_size
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка очистки осиротевших строк в БД {db_path}: {e}")
+        return None
+
+    rows = sum(count for table, count in stats.items() if table != "bytes")
+    if rows:
+        details = ", ".join(f"{table}: {stats[table]}" for table, _ in EVENT_CHILD_TABLES)
+        logger.info(f"Удалены осиротевшие строки в БД {db_path} ({details}), освобождено {stats['bytes']} байт")
+    return stats
+
+
+def recount_roster_counters(cursor, event_ids=None):
+    """
+    Пересчитывает счётчики списков по таблице participation.
+    :param event_ids: ID мероприятий; None - все мероприятия.
+    """
+    where = ""
+    params = ()
+    if event_ids is not None:
+        where = f"WHERE id IN ({', '.join('?' for _ in event_ids)})"
+        params = tuple(event_ids)
+    cursor.execute(
+        f"""
+        UPDATE events SET
+            participants_count = (
+                SELECT COUNT(*) FROM participation p WHERE p.event_id = events.id AND p.status = 'participant'
+            ),
+            reserve_count = (
+                SELECT COUNT(*) FROM participation p WHERE p.event_id = events.id AND p.status = 'reserve'
+            ),
+            declined_count = (
+                SELECT COUNT(*) FROM participation p WHERE p.event_id = events.id AND p.status = 'declined'
+            )
+        {where}
+        """,
+        params,
+    )
+
+
+def _bump_versions(cursor, event_ids):
+    """
+    Увеличивает версию исправленных мероприятий и сбрасывает их из кэша после фиксации:
+    снимок с прежними счётчиками, прочитанный до неё, в кэш уже не попадёт.
+    """
+    placeholders = ", ".join("?" for _ in event_ids)
+    cursor.execute(f"UPDATE events SET version = version + 1 WHERE id IN ({placeholders})", event_ids)
+    cursor.execute(f"SELECT id, version FROM events WHERE id IN ({placeholders})", event_ids)
+    for event_id, version in cursor.fetchall():
+        after_commit(cursor.connection, partial(event_cache.invalidate, event_id, version))
+
+
+def check_roster_counters(db_path, repair=True):
+    """
+    Сверяет счётчики списков в events с таблицей participation.
+    Расхождения возможны только при изменении БД в обход триггеров (вручную, старыми версиями бота).
+    :param repair: Пересчитать счётчики у мероприятий с расхождениями.
+    :return: Список ID мероприятий с расхождениями или None при ошибке.
+    """
+    try:
+        with immediate_transaction(db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT e.id FROM events e
+                LEFT JOIN (
+                    SELECT event_id,
+                           SUM(status = 'participant') AS participants,
+                           SUM(status = 'reserve') AS reserve,
+                           SUM(status = 'declined') AS declined
+                    FROM participation GROUP BY event_id
+                ) c ON c.event_id = e.id
+                WHERE e.participants_count != COALESCE(c.participants, 0)
+                   OR e.reserve_count != COALESCE(c.reserve, 0)
+                   OR e.declined_count != COALESCE(c.declined, 0)
+                """
+            )
+            mismatched = [row[0] for row in cursor.fetchall()]
+            if mismatched and repair:
+                recount_roster_counters(cursor, mismatched)
+                _bump_versions(cursor, mismatched)
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка проверки счётчиков списков в БД {db_path}: {e}")
+        return None
+
+    if mismatched:
+        logger.warning(
+            f"Счётчики списков не совпадают с participation у мероприятий {mismatched}"
+            f"{', пересчитаны' if repair else ''}"
+        )
+    return mismatched
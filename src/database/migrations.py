@@ -0,0 +1,79 @@
+from datetime import datetime
+
+from src.logger.logger import logger
+
+
+def get_schema_version(conn):
+    """
+    Возвращает текущую версию схемы базы данных.
+    :param conn: Соединение с базой данных.
+    :return: Номер последней применённой миграции (0 для новой или старой БД без версии).
+    """
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+        """
+    )
+    conn.commit()
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def apply_migrations(conn, migrations, db_name):
+    """
+    Применяет к базе данных все миграции, версия которых выше текущей.
+    Каждая миграция выполняется в отдельной транзакции вместе с записью в schema_version,
+    поэтому при ошибке база остаётся на предыдущей версии.
+    :param conn: Соединение с базой данных.
+    :param migrations: Список кортежей (версия, описание, функция(cursor)) по возрастанию версии.
+    :param db_name: Название базы для логов.
+    :return: Версия схемы после применения миграций.
+    """
+    version = get_schema_version(conn)
+    if all(target <= version for target, _, _ in migrations):
+        return version
+
+    # Миграции выполняются без проверки внешних ключей: старые данные могут содержать
+    # строки без родителя, а пересоздание таблиц временно нарушает ссылки.
+    # PRAGMA foreign_keys не действует внутри транзакции, поэтому переключается здесь.
+    foreign_keys = conn.execute("PRAGMA foreign_keys").fetchone()[0]
+    conn.execute("PRAGMA foreign_keys=OFF")
+    try:
+        return _apply_pending(conn, migrations, db_name, version)
+    finally:
+        conn.execute(f"PRAGMA foreign_keys={'ON' if foreign_keys else 'OFF'}")
+
+
+def _apply_pending(conn, migrations, db_name, version):
+    """Применяет миграции с версией выше version по одной в транзакции."""
+    for target, description, migrate in migrations:
+        if target <= version:
+            continue
+
+        logger.info(f"БД {db_name}: применяется миграция {target} ({description})")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.cursor()
+            migrate(cursor)
+            cursor.execute(
+                "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                (target, description, datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+            )
+        except BaseException:
+            conn.rollback()
+            logger.error(f"БД {db_name}: миграция {target} не применена", exc_info=True)
+            raise
+        conn.commit()
+        version = target
+
+    return version
+
+
+def table_columns(cursor, table):
+    """Возвращает множество имён столбцов таблицы (для миграций, дополняющих старые схемы)."""
+    cursor.execute(f"PRAGMA table_info({table})")
+    return {row[1] for row in cursor.fetchall()}
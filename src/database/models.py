@@ -0,0 +1,164 @@
+from dataclasses import dataclass, field, fields
+
+# Статусы пользователя в таблице participation
+STATUS_PARTICIPANT = "participant"
+STATUS_RESERVE = "reserve"
+STATUS_DECLINED = "declined"
+
+
+class RecordMixin:
+    """
+    Доступ к полям модели по ключу, как к словарю: record["description"], record.get("date"),
+    "event_id" in record, dict(record). Нужен коду, написанному под словари из get_event и get_draft.
+    Поля, начинающиеся с "_", служебные и как ключи недоступны.
+    """
+    __slots__ = ()
+
+    # Вычисляемые ключи (свойства), доступные наряду с полями
+    _extra_keys = ()
+
+    @classmethod
+    def from_row(cls, row, **extra):
+        """Создаёт модель из sqlite3.Row или словаря; лишние столбцы игнорируются."""
+        names = row.keys()
+        values = {f.name: row[f.name] for f in fields(cls) if f.name in names}
+        values.update(extra)
+        return cls(**values)
+
+    def keys(self):
+        return [f.name for f in fields(self) if not f.name.startswith("_")] + list(self._extra_keys)
+
+    def __getitem__(self, key):
+        if not isinstance(key, str) or key.startswith("_"):
+            raise KeyError(key)
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        if key.startswith("_") or key not in self.keys():
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+@dataclass(slots=True)
+class Participation(RecordMixin):
+    """Запись пользователя в одном из списков мероприятия."""
+    _extra_keys = ("name",)
+
+    user_id: int
+    user_name: str
+    status: str | None = None
+    position: int | None = None
+
+    @property
+    def name(self):
+        """Имя пользователя (ключ "name" используется в update_event)."""
+        return self.user_name
+
+
+@dataclass(slots=True)
+class Event(RecordMixin):
+    """
+    Мероприятие. Списки участников, резерва и отказавшихся загружаются
+    при первом обращении, если не были прочитаны вместе с мероприятием.
+    """
+    _extra_keys = ("participants", "reserve", "declined")
+
+    id: int
+    description: str
+    date: str
+    time: str
+    starts_at: int | None
+    participant_limit: int | None
+    creator_id: int
+    chat_id: int | None
+    message_id: int | None
+    created_at: str | None = None
+    updated_at: str | None = None
+    # Увеличивается при каждом изменении мероприятия или его списков (см. update_event)
+    version: int = 0
+    # Размеры списков, поддерживаются триггерами на participation
+    participants_count: int = 0
+    reserve_count: int = 0
+    declined_count: int = 0
+    # {статус: [Participation, ...]} или None, пока списки не загружены
+    _roster: dict | None = field(default=None, repr=False, compare=False)
+    # Функция без аргументов, возвращающая _roster (для ленивой загрузки)
+    _roster_loader: object = field(default=None, repr=False, compare=False)
+
+    def _get_roster(self):
+        if self._roster is None:
+            self._roster = self._roster_loader() if self._roster_loader else {
+                STATUS_PARTICIPANT: [], STATUS_RESERVE: [], STATUS_DECLINED: []
+            }
+            self._roster_loader = None
+        return self._roster
+
+    @property
+    def participants(self) -> list[Participation]:
+        return self._get_roster()[STATUS_PARTICIPANT]
+
+    @property
+    def reserve(self) -> list[Participation]:
+        return self._get_roster()[STATUS_RESERVE]
+
+    @property
+    def declined(self) -> list[Participation]:
+        return self._get_roster()[STATUS_DECLINED]
+
+
+@dataclass(slots=True)
+class EventHeader(RecordMixin):
+    """Заголовок мероприятия для проверок прав (без описания и списков)."""
+    id: int
+    creator_id: int
+    chat_id: int | None
+    message_id: int | None
+    version: int = 0
+
+
+@dataclass(slots=True)
+class Draft(RecordMixin):
+    """Черновик создания или редактирования мероприятия."""
+    id: int
+    creator_id: int
+    chat_id: int
+    status: str
+    message_id: int | None = None
+    bot_message_id: int | None = None
+    description: str | None = None
+    date: str | None = None
+    time: str | None = None
+    participant_limit: int | None = None
+    event_id: int | None = None
+    original_message_id: int | None = None
+    created_at: str | None = None
+    updated_at: str | None = None
+    is_from_template: bool = False
+
+    def __post_init__(self):
+        self.is_from_template = bool(self.is_from_template)
+
+
+@dataclass(slots=True)
+class Template(RecordMixin):
+    """Шаблон мероприятия пользователя."""
+    id: int
+    user_id: int
+    name: str
+    description: str
+    time: str
+    date: str | None = None
+    participant_limit: int | None = None
+    created_at: str | None = None
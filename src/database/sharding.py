@@ -0,0 +1,273 @@
+import functools
+import inspect
+import os
+import threading
+
+from src.database.connection import get_connection, immediate_transaction
+from src.database.init_database import init_db
+from src.logger.logger import logger
+
+# Шардирование основной БД по чатам: мероприятия чата целиком живут в одном файле,
+# поэтому запись в разных чатах не конкурирует за одну блокировку SQLite.
+# Обработчики по-прежнему передают путь DB_PATH; функции db_operations, помеченные
+# декораторами этого модуля, сами выбирают файл по chat_id, ID записи или user_id.
+#
+# ID записей (events, event_templates, scheduled_jobs) в шарде k начинаются с k * SHARD_ID_SPAN + 1,
+# поэтому шард определяется по самому ID: в callback_data и задачах ничего не меняется,
+# а записи, созданные до включения шардирования, остаются в шарде 0 (исходном файле).
+SHARD_ID_SPAN = 10 ** 12
+SHARDED_ID_TABLES = ("events", "event_templates", "scheduled_jobs")
+
+# {путь к основной БД: ShardMap} - только для включённого шардирования
+_maps = {}
+
+
+class ShardMap:
+    """
+    Файлы шардов одной основной БД и закрепление чатов за шардами.
+    Закрепление хранится в таблице shard_map шарда 0: чат, однажды получивший шард,
+    остаётся в нём и при изменении числа шардов.
+    """
+
+    def __init__(self, db_path, count):
+        self.db_path = os.fspath(db_path)
+        self.count = count
+        self.paths = [self._shard_path(index) for index in range(count)]
+        self._chats = {}
+        self._lock = threading.Lock()
+
+    def _shard_path(self, index):
+        """Файл шарда index: events.db, events.shard1.db, events.shard2.db, ..."""
+        if index == 0:
+            return self.db_path
+        base, extension = os.path.splitext(self.db_path)
+        return f"{base}.shard{index}{extension}"
+
+    def load(self):
+        """
+        Загружает закрепление чатов. Чаты, мероприятия которых уже есть в шарде 0
+        (созданные до включения шардирования), закрепляются за ним.
+        """
+        with immediate_transaction(self.db_path) as conn:
+            conn.execute(
+                """
+                INSERT INTO shard_map (chat_id, shard)
+                SELECT DISTINCT chat_id, 0 FROM events WHERE chat_id IS NOT NULL
+                ON CONFLICT (chat_id) DO NOTHING
+                """
+            )
+            rows = conn.execute("SELECT chat_id, shard FROM shard_map").fetchall()
+        with self._lock:
+            self._chats = {chat_id: shard for chat_id, shard in rows}
+        # Шарды, закреплённые при большем числе файлов, остаются доступными
+        for index in range(len(self.paths), max(self._chats.values(), default=0) + 1):
+            self.paths.append(self._shard_path(index))
+
+    def known_chat(self, chat_id):
+        """Путь к шарду уже закреплённого чата или None (без обращения к БД)."""
+        with self._lock:
+            shard = self._chats.get(chat_id)
+        return self.paths[shard] if shard is not None else None
+
+    def for_chat(self, chat_id):
+        """Путь к шарду чата; новый чат закрепляется за шардом chat_id % count."""
+        if chat_id is None:
+            return self.db_path
+        with self._lock:
+            shard = self._chats.get(chat_id)
+        if shard is None:
+            shard = self._assign(chat_id)
+        return self.paths[shard]
+
+    def _assign(self, chat_id):
+        with immediate_transaction(self.db_path) as conn:
+            conn.execute(
+                "INSERT INTO shard_map (chat_id, shard) VALUES (?, ?) ON CONFLICT (chat_id) DO NOTHING",
+                (chat_id, chat_id % self.count),
+            )
+            shard = conn.execute("SELECT shard FROM shard_map WHERE chat_id = ?", (chat_id,)).fetchone()[0]
+        with self._lock:
+            self._chats[chat_id] = shard
+        logger.info(f"Чат {chat_id} закреплён за шардом {shard}")
+        return shard
+
+    def for_id(self, record_id):
+        """
+        Путь к шарду записи по её ID (см. SHARD_ID_SPAN).
+        ID вне диапазонов известных шардов - ошибка: запрос не уходит в чужую базу.
+        """
+        shard = int(record_id) // SHARD_ID_SPAN if record_id is not None else 0
+        if not 0 <= shard < len(self.paths):
+            raise ValueError(f"ID {record_id} не относится ни к одному шарду {self.db_path}")
+        return self.paths[shard]
+
+    def for_user(self, user_id):
+        """Путь к шарду данных пользователя (users, шаблоны)."""
+        return self.paths[user_id % self.count]
+
+
+def init_shards(db_path, count):
+    """
+    Инициализирует основную БД: при count > 1 - все файлы шардов и закрепление чатов.
+    :param db_path: Путь к основной БД (он же шард 0).
+    :param count: Число шардов (DB_SHARDS).
+    :return: Список путей ко всем файлам основной БД.
+    """
+    _maps.pop(os.fspath(db_path), None)
+    if count <= 1:
+        init_db(db_path)
+        return [db_path]
+
+    shard_map = ShardMap(db_path, count)
+    for index, path in enumerate(shard_map.paths):
+        init_db(path)
+        _reserve_id_range(path, index)
+    shard_map.load()
+    _maps[shard_map.db_path] = shard_map
+    logger.info(f"Основная БД разделена на шарды: {', '.join(shard_map.paths)}")
+    return list(shard_map.paths)
+
+
+def _reserve_id_range(path, index):
+    """Сдвигает счётчики AUTOINCREMENT шарда index в его диапазон ID."""
+    if index == 0:
+        return
+    conn = get_connection(path)
+    with conn:
+        for table in SHARDED_ID_TABLES:
+            conn.execute("DELETE FROM sqlite_sequence WHERE name = ? AND seq < ?", (table, index * SHARD_ID_SPAN))
+            conn.execute(
+                "INSERT INTO sqlite_sequence (name, seq) SELECT ?, ? "
+                "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = ?)",
+                (table, index * SHARD_ID_SPAN, table),
+            )
+
+
+def get_shard_map(db_path):
+    """Возвращает ShardMap основной БД или None, если шардирование не включено."""
+    if not _maps:
+        return None
+    return _maps.get(os.fspath(db_path))
+
+
+def shard_paths(db_path):
+    """Все файлы основной БД (для обслуживания, резервного копирования и архивации)."""
+    shard_map = get_shard_map(db_path)
+    return list(shard_map.paths) if shard_map else [db_path]
+
+
+def reset_shards():
+    """Отключает шардирование всех баз (при повторной инициализации и в тестах)."""
+    _maps.clear()
+
+
+def resolve_path(db_path, func, args):
+    """
+    Путь к шарду для функции вида func(cursor, *args), помеченной route_by_*
+    (используется очередью записи write_queue).
+    """
+    route = getattr(func, "shard_route", None)
+    shard_map = get_shard_map(db_path)
+    if route is None or shard_map is None:
+        return db_path
+    index, pick = route
+    return pick(shard_map, args[index - 1])
+
+
+def writer_shard_path(func, args, kwargs):
+    """
+    Файл дополнительного шарда (не шарда 0), в который пишет вызов func(db_path, ...), или None.
+    По нему db_executor выбирает поток записи: у каждого дополнительного шарда свой поток,
+    шард 0 делит поток БД с черновиками и вызовами без шардирования.
+    Вызов определяется по декоратору route_by_* или по явно переданному пути к шарду.
+    Здесь нет обращений к БД: чат, ещё не закреплённый за шардом, попадает в поток шарда 0.
+    """
+    if not _maps:
+        return None
+    db_path = args[0] if args else kwargs.get("db_path")
+    if not isinstance(db_path, (str, os.PathLike)):
+        return None
+    db_path = os.fspath(db_path)
+
+    shard_map = _maps.get(db_path)
+    route = getattr(func, "shard_route", None)
+    if shard_map is not None and route is not None:
+        index, _ = route
+        value = args[index] if len(args) > index else kwargs.get(func.shard_arg)
+        path = func.shard_peek(shard_map, value)
+        return path if path != shard_map.db_path else None
+
+    for shard_map in _maps.values():
+        if db_path in shard_map.paths[1:]:
+            return db_path
+    return None
+
+
+def _route(arg, pick, peek=None):
+    """
+    Декоратор: функция выполняется в шарде, выбранном pick(shard_map, значение аргумента arg).
+    Функции с первым параметром db_path получают путь к шарду вместо основного пути;
+    функции вида func(cursor, ...) только помечаются (путь выбирает resolve_path).
+    :param peek: Выбор шарда без записи в БД для writer_shard_path (по умолчанию pick).
+    """
+    def decorator(func):
+        params = list(inspect.signature(func).parameters)
+        index = params.index(arg)
+        func.shard_route = (index, pick)
+        func.shard_arg = arg
+        func.shard_peek = peek or pick
+        if params[0] != "db_path":
+            return func
+
+        @functools.wraps(func)
+        def wrapper(db_path, *args, **kwargs):
+            shard_map = get_shard_map(db_path)
+            if shard_map is None:
+                return func(db_path, *args, **kwargs)
+            value = args[index - 1] if len(args) >= index else kwargs[arg]
+            return func(pick(shard_map, value), *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def route_by_chat(arg="chat_id"):
+    """Шард выбирается по ID чата (создание мероприятий)."""
+    return _route(arg, ShardMap.for_chat, peek=ShardMap.known_chat)
+
+
+def route_by_id(arg="event_id"):
+    """Шард выбирается по ID записи (мероприятия, шаблона, задачи)."""
+    return _route(arg, ShardMap.for_id)
+
+
+def route_by_user(arg="user_id"):
+    """Шард выбирается по ID пользователя (users, новые шаблоны)."""
+    return _route(arg, ShardMap.for_user)
+
+
+def fan_out(combine):
+    """
+    Декоратор для запросов по всем чатам (мероприятия пользователя, задачи, шаблоны):
+    функция выполняется в каждом шарде, результаты объединяются combine(список результатов).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(db_path, *args, **kwargs):
+            shard_map = get_shard_map(db_path)
+            if shard_map is None:
+                return func(db_path, *args, **kwargs)
+            return combine([func(path, *args, **kwargs) for path in shard_map.paths])
+        return wrapper
+    return decorator
+
+
+def concat(results):
+    """Объединяет списки результатов шардов."""
+    return [item for result in results for item in result]
+
+
+def concat_sorted(key, reverse=False):
+    """Объединяет списки результатов шардов с сортировкой по полю key."""
+    def combine(results):
+        return sorted(concat(results), key=lambda item: item[key], reverse=reverse)
+    return combine
@@ -0,0 +1,147 @@
+import asyncio
+import sqlite3
+
+from config import WRITE_BATCH_INTERVAL_MS, WRITE_BATCH_MAX_SIZE
+from src.database.connection import immediate_transaction, reraise_if_locked
+from src.database.db_executor import run_db
+from src.database.sharding import resolve_path
+from src.logger.logger import logger
+
+# Очередь группового коммита: мелкие записи (нажатия кнопок, данные пользователей)
+# копятся несколько миллисекунд и фиксируются одной транзакцией - один fsync на пачку.
+# Элементы очереди: (путь к БД, функция func(cursor, *args), аргументы, asyncio.Future)
+_pending = []
+_loop = None
+_flush_handle = None
+_flush_tasks = set()
+
+
+def queue_write(db_path, func, *args):
+    """
+    Ставит операцию записи в очередь группового коммита.
+    Пачка фиксируется через WRITE_BATCH_INTERVAL_MS миллисекунд после первой операции
+    или сразу, как только в очереди наберётся WRITE_BATCH_MAX_SIZE операций.
+    :param db_path: Путь к базе данных (при шардировании файл выбирается по аргументам func).
+    :param func: Функция вида func(cursor, *args), выполняется внутри общей транзакции.
+    :return: asyncio.Future с результатом func. Завершается после фиксации транзакции,
+             поэтому `await queue_write(...)` гарантирует, что запись уже на диске.
+             Если гарантия не нужна, результат можно не ожидать.
+    """
+    global _flush_handle
+    loop = asyncio.get_running_loop()
+    if _loop is not loop:
+        _reset(loop)
+
+    future = loop.create_future()
+    # Ошибки записи логируются при фиксации; отмечаем их полученными,
+    # чтобы не ожидаемые результаты не давали "exception was never retrieved"
+    future.add_done_callback(_mark_retrieved)
+    _pending.append((resolve_path(db_path, func, args), func, args, future))
+
+    if len(_pending) >= WRITE_BATCH_MAX_SIZE:
+        _start_flush()
+    elif _flush_handle is None:
+        _flush_handle = loop.call_later(WRITE_BATCH_INTERVAL_MS / 1000, _start_flush)
+    return future
+
+
+async def flush_writes():
+    """Фиксирует все накопленные операции записи (вызывается по таймеру и при остановке бота)."""
+    global _flush_handle
+    if _flush_handle is not None:
+        _flush_handle.cancel()
+        _flush_handle = None
+
+    while _pending:
+        batch = _pending[:WRITE_BATCH_MAX_SIZE]
+        del _pending[:len(batch)]
+
+        # Пачка каждой базы (шарда) фиксируется в её потоке записи, базы - параллельно
+        by_path = {}
+        for db_path, func, args, future in batch:
+            by_path.setdefault(db_path, []).append((func, args, future))
+        await asyncio.gather(*(_flush_path(db_path, items) for db_path, items in by_path.items()))
+
+
+async def _flush_path(db_path, items):
+    """Фиксирует операции одной базы и завершает их Future."""
+    try:
+        results = await run_db(_commit_batch, db_path, [(func, args) for func, args, _ in items])
+    except Exception as e:
+        logger.error(f"Не удалось выполнить групповую фиксацию в БД {db_path}: {e}")
+        results = [(False, e)] * len(items)
+
+    for (func, _, future), (ok, value) in zip(items, results):
+        if future.done():
+            continue
+        if ok:
+            future.set_result(value)
+        else:
+            logger.error(f"Ошибка отложенной записи {func.__name__}: {value}")
+            future.set_exception(value)
+
+
+def _start_flush():
+    """Запускает фиксацию очереди отдельной задачей."""
+    global _flush_handle
+    _flush_handle = None
+    task = asyncio.get_running_loop().create_task(flush_writes())
+    _flush_tasks.add(task)
+    task.add_done_callback(_flush_tasks.discard)
+
+
+def _commit_batch(db_path, batch):
+    """
+    Выполняет пачку операций одной базы в её потоке записи одной транзакцией BEGIN IMMEDIATE.
+    Каждая операция выполняется в своей точке сохранения, поэтому ошибка одной
+    операции откатывает только её, остальные фиксируются.
+    Ошибка блокировки пробрасывается: run_db повторит всю пачку с задержкой, не занимая поток записи.
+    :param db_path: Путь к базе данных (шарду).
+    :param batch: Список пар (функция, аргументы).
+    :return: Список (успех, результат или исключение) в порядке batch.
+    """
+    try:
+        results = _commit_path(db_path, batch)
+    except sqlite3.Error as e:
+        reraise_if_locked(e)
+        # Транзакция не зафиксирована: все операции пачки завершаются ошибкой
+        logger.error(f"Ошибка групповой фиксации в БД {db_path}: {e}")
+        return [(False, e)] * len(batch)
+
+    logger.debug(f"Групповая фиксация в БД {db_path}: {len(batch)} операций")
+    return results
+
+
+def _commit_path(db_path, batch):
+    """Выполняет операции batch одной транзакцией в БД db_path."""
+    results = []
+    with immediate_transaction(db_path) as conn:
+        cursor = conn.cursor()
+        for func, args in batch:
+            cursor.execute("SAVEPOINT queued_write")
+            mark = conn.after_commit_mark()
+            try:
+                results.append((True, func(cursor, *args)))
+            except Exception as e:
+                cursor.execute("ROLLBACK TO queued_write")
+                # Сброс кэша по отменённым изменениям операции не нужен
+                conn.discard_after_commit(mark)
+                results.append((False, e))
+            cursor.execute("RELEASE queued_write")
+    return results
+
+
+def _mark_retrieved(future):
+    if not future.cancelled():
+        future.exception()
+
+
+def _reset(loop):
+    """Привязывает очередь к новому событийному циклу (после перезапуска приложения или в тестах)."""
+    global _loop, _flush_handle
+    if _pending:
+        logger.warning(f"Очередь записи: отброшено {len(_pending)} операций прежнего событийного цикла")
+        _pending.clear()
+    _flush_handle = None
+    _flush_tasks.clear()
+    _loop = loop
@@ -2,7 +2,8 @@ from telegram import Update
 from telegram.error import BadRequest
 from telegram.ext import ContextTypes
 
-from src.database.db_operations import get_event
+from src.database.db_executor import run_db_read
+from src.database.db_operations import get_event_header
 from src.event.edit.update_event_field import update_event_field, validate_and_update
 from src.event.edit.update_limit import update_participant_limit
 from src.logger import logger
@@ -14,7 +15,7 @@ async def process_edit_step(update: Update, context: ContextTypes.DEFAULT_TYPE,
     user = update.message.from_user if update.message else update.callback_query.from_user
 
     # Проверяем авторство
-    event = get_event(context.bot_data["db_path"], draft["event_id"])
+    event = await run_db_read(get_event_header, context.bot_data["db_path"], draft["event_id"])
     if user.id != event["creator_id"]:
         await show_input_error(
             update, context,
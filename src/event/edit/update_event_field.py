@@ -1,6 +1,7 @@
 from datetime import datetime
 
 from config import tz
+from src.database.db_executor import run_db, run_db_read
 from src.database.db_operations import get_event
 from src.event.edit.final_edit import finalize_edit
 
@@ -8,19 +9,36 @@ from src.jobs.notification_jobs import remove_existing_notification_jobs, remove
     schedule_unpin_and_delete
 from src.logger import logger
 from src.utils.show_input_error import show_input_error
+from src.utils.utils import event_datetime as get_event_datetime
 
 
 async def update_event_field(context, draft, field, value):
-    """Обновляет поле мероприятия"""
+    """
+    Обновляет поле мероприятия.
+    Поле записывается, только если его не изменили с начала редактирования (прежнее значение
+    хранится в черновике); иначе автор получает сообщение, а мероприятие показывается как есть.
+    Записи в списки участников за это время изменению не мешают.
+    """
     from src.database.db_operations import update_event_field
 
     # Обновляем поле в базе данных
-    update_event_field(
+    updated = await run_db(
+        update_event_field,
         db_path=context.bot_data["db_path"],
         event_id=draft["event_id"],
         field=field,
-        value=value
+        value=value,
+        expected_value=draft[field]
     )
+    if not updated:
+        logger.warning(f"Изменение {field} мероприятия {draft['event_id']} не сохранено")
+        await context.bot.send_message(
+            chat_id=draft["chat_id"],
+            text="⚠️ Изменение не сохранено: это поле изменили, пока вы редактировали. "
+                 "Откройте редактирование ещё раз."
+        )
+        await finalize_edit(context, draft)
+        return
 
     # Если обновляется дата или время, пересоздаем задачи уведомлений
     if field in ["date", "time"]:
@@ -29,14 +47,12 @@ async def update_event_field(context, draft, field, value):
         remove_existing_job(draft["event_id"], context)  # Для задачи открепления
 
         # Получаем новые дату и время
-        event = get_event(context.bot_data["db_path"], draft["event_id"])
+        event = await run_db_read(get_event, context.bot_data["db_path"], draft["event_id"])
         if event:
-            try:
-                event_datetime = datetime.strptime(
-                    f"{event['date']} {event['time']}",
-                    "%d.%m.%Y %H:%M"
-                ).replace(tzinfo=tz)
-
+            event_datetime = get_event_datetime(event, tz)
+            if event_datetime is None:
+                logger.error(f"Ошибка при обработке новой даты/времени: {event['date']} {event['time']}")
+            else:
                 # Создаем новые задачи
                 await schedule_notifications(
                     event_id=draft["event_id"],
@@ -50,8 +66,6 @@ async def update_event_field(context, draft, field, value):
                     context=context,
                     chat_id=draft["chat_id"]
                 )
-            except ValueError as e:
-                logger.error(f"Ошибка при обработке новой даты/времени: {e}")
 
     await finalize_edit(context, draft)
 
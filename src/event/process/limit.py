@@ -3,8 +3,9 @@ from datetime import datetime
 from telegram.error import BadRequest
 
 from config import tz
-from src.database.db_draft_operations import get_draft, delete_draft
-from src.database.db_operations import add_event
+from src.database.db_draft_operations import get_draft
+from src.database.db_executor import run_db
+from src.database.db_operations import create_event_from_draft
 from src.jobs.notification_jobs import schedule_notifications, schedule_unpin_and_delete, logger
 from src.message.send_event_creation_notification import send_event_creation_notification
 from src.message.send_message import send_event_message
@@ -22,9 +23,12 @@ async def process_limit(update, context, draft, limit_input):
         updated_draft = get_draft(context.bot_data["drafts_db_path"], draft["id"])
         bot_message_id = updated_draft.get("bot_message_id") if updated_draft else None
 
-        # Создаем мероприятие
-        event_id = add_event(
+        # Создаем мероприятие и удаляем черновик одной транзакцией
+        event_id = await run_db(
+            create_event_from_draft,
             db_path=context.bot_data["db_path"],
+            drafts_db_path=context.bot_data["drafts_db_path"],
+            draft_id=draft["id"],
             description=draft["description"],
             date=draft["date"],
             time=draft["time"],
@@ -62,9 +66,6 @@ async def process_limit(update, context, draft, limit_input):
             chat_id=update.message.chat_id
         )
 
-        # Удаляем черновик
-        delete_draft(context.bot_data["drafts_db_path"], draft["id"])
-
         # Удаляем сообщение пользователя
         try:
             await update.message.delete()
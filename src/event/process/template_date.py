@@ -1,7 +1,8 @@
 from datetime import datetime
 
-from src.database.db_draft_operations import get_draft, delete_draft
-from src.database.db_operations import add_event
+from src.database.db_draft_operations import get_draft
+from src.database.db_executor import run_db
+from src.database.db_operations import create_event_from_draft
 from src.logger import logger
 from src.message.send_event_creation_notification import send_event_creation_notification
 from src.message.send_message import send_event_message
@@ -24,9 +25,12 @@ async def process_template_date(update, context, draft, date_input):
             logger.error("Отсутствует bot_message_id в черновике из шаблона")
             raise ValueError("Не найден ID сообщения")
 
-        # 4. Создание мероприятия
-        event_id = add_event(
+        # 4. Создание мероприятия и удаление черновика одной транзакцией
+        event_id = await run_db(
+            create_event_from_draft,
             db_path=context.bot_data["db_path"],
+            drafts_db_path=context.bot_data["drafts_db_path"],
+            draft_id=fresh_draft['id'],
             description=fresh_draft['description'],
             date=date_input,
             time=fresh_draft['time'],
@@ -35,6 +39,8 @@ async def process_template_date(update, context, draft, date_input):
             chat_id=update.message.chat_id,
             message_id=fresh_draft['bot_message_id']
         )
+        if not event_id:
+            raise Exception("Не удалось создать мероприятие")
 
         # 5. Отправка/редактирование сообщения
         await send_event_message(
@@ -44,8 +50,7 @@ async def process_template_date(update, context, draft, date_input):
             message_id=fresh_draft['bot_message_id']
         )
 
-        # 6. Очистка
-        delete_draft(context.bot_data["drafts_db_path"], fresh_draft['id'])
+        # 6. Удаляем сообщение пользователя
         await update.message.delete()
 
         # 7. Отправляем уведомление создателю (используем общую функцию)
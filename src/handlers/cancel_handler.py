@@ -1,9 +1,9 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CallbackQueryHandler
 
-from config import DB_PATH
 from src.database.db_draft_operations import delete_draft, get_draft, get_user_chat_draft
-from src.database.db_operations import get_event, get_participants
+from src.database.db_executor import run_db_read
+from src.database.db_operations import get_event, get_event_header
 from src.logger import logger
 from src.message.send_message import send_event_message, EMPTY_PARTICIPANTS_TEXT
 from src.utils.pin_message import pin_message_safe
@@ -46,14 +46,15 @@ async def cancel_edit(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         # Получаем event_id из callback_data
         event_id = int(query.data.split('|')[1])
-        event = get_event(context.bot_data["db_path"], event_id)
+        # Для проверки авторства хватает заголовка, списки нужны только запасному выводу
+        header = await run_db_read(get_event_header, context.bot_data["db_path"], event_id)
 
-        if not event:
+        if not header:
             await query.edit_message_text("Мероприятие не найдено")
             return
 
         # Проверяем авторство
-        if query.from_user.id != event["creator_id"]:
+        if query.from_user.id != header["creator_id"]:
             await query.answer("Только автор может отменить редактирование", show_alert=False)
             return
 
@@ -68,14 +69,16 @@ async def cancel_edit(update: Update, context: ContextTypes.DEFAULT_TYPE):
         try:
             # Редактируем текущее сообщение вместо удаления
             await send_event_message(
-                event_id=event["id"],
+                event_id=event_id,
                 context=context,
                 chat_id=query.message.chat_id,
                 message_id=query.message.message_id
             )
         except Exception as e:
             logger.error(f"Ошибка при восстановлении сообщения: {e}")
-            await restore_event_message_fallback(event, context, query)
+            event = await run_db_read(get_event, context.bot_data["db_path"], event_id)
+            if event:
+                await restore_event_message_fallback(event, context, query)
 
         # Удаляем черновик если он существует
         if draft:
@@ -91,9 +94,8 @@ async def restore_event_message_fallback(event, context, query):
     Не удаляет сообщения, только редактирует существующее.
     """
     try:
-        # Получаем базовые данные
-        db_path = context.bot_data.get("db_path", DB_PATH)
-        participants = get_participants(db_path, event["id"])
+        # Списки участников уже есть в данных мероприятия
+        participants = event["participants"]
 
         # Формируем упрощенное сообщение
         message_text = (
@@ -149,7 +151,7 @@ async def cancel_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         # Проверяем авторство для редактирования существующего мероприятия
         if draft.get("event_id"):
-            event = get_event(context.bot_data["db_path"], draft["event_id"])
+            event = await run_db_read(get_event_header, context.bot_data["db_path"], draft["event_id"])
             if event and query.from_user.id != event["creator_id"]:
                 await query.answer("❌ Только автор может отменить редактирование", show_alert=False)
                 return
@@ -174,7 +176,7 @@ async def cancel_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     logger.info(f"Не удалось удалить сообщение с формой: {e}")
 
             # Восстанавливаем оригинальное сообщение
-            event = get_event(context.bot_data["db_path"], event_id)
+            event = await run_db_read(get_event, context.bot_data["db_path"], event_id)
             if event:
                 try:
                     await send_event_message(
@@ -2,7 +2,8 @@
 from telegram import Update
 from telegram.ext import ContextTypes
 from telegram.error import BadRequest
-from src.database.db_operations import  get_event
+from src.database.db_executor import run_db_read
+from src.database.db_operations import get_event
 from src.event.edit.edit_step import process_edit_step
 from src.event.process.description import process_description
 from src.event.process.limit import process_limit
@@ -29,7 +30,7 @@ async def process_draft_step(update: Update, context: ContextTypes.DEFAULT_TYPE,
                 await show_input_error(update, context, "⚠️ Ошибка: мероприятие не найдено")
                 return
 
-            event = get_event(context.bot_data["db_path"], draft["event_id"])
+            event = await run_db_read(get_event, context.bot_data["db_path"], draft["event_id"])
             if not event:
                 logger.error(f"Мероприятие {draft['event_id']} не найдено в БД")
                 await show_input_error(update, context, "⚠️ Мероприятие не найдено")
@@ -3,6 +3,7 @@ from telegram.ext import ContextTypes, MessageHandler, filters
 from telegram.error import BadRequest
 
 from src.database.db_draft_operations import add_draft, get_user_chat_draft, update_draft
+from src.database.db_executor import run_db
 from src.logger.logger import logger
 
 async def mention_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -70,7 +71,8 @@ async def mention_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
 
     # Создаем черновик
-    draft_id = add_draft(
+    draft_id = await run_db(
+        add_draft,
         db_path=context.bot_data["drafts_db_path"],
         creator_id=creator_id,
         chat_id=chat_id,
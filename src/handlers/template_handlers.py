@@ -1,19 +1,20 @@
-import sqlite3
-from datetime import datetime
-
 import telegram
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
 from src.database.db_draft_operations import add_draft, update_draft
-from src.database.db_operations import get_event, get_user_templates
+from src.database.db_executor import run_db, run_db_read
+from src.database.db_operations import (
+    get_event, get_user_templates, get_template, add_template, delete_template, apply_save_user
+)
+from src.database.write_queue import queue_write
 from src.logger import logger
 
 
 async def handle_my_templates(query, context, offset=0, limit=5):
     """Показывает список шаблонов пользователя с пагинацией"""
     try:
-        templates = get_user_templates(context.bot_data["db_path"], query.from_user.id)
+        templates = await run_db(get_user_templates, context.bot_data["db_path"], query.from_user.id)
 
         if not templates:
             await query.answer("У вас нет сохранённых шаблонов", show_alert=False)
@@ -120,7 +121,7 @@ async def handle_my_templates(query, context, offset=0, limit=5):
 
 async def handle_save_template(query, context, event_id):
     try:
-        event = get_event(context.bot_data["db_path"], event_id)
+        event = await run_db_read(get_event, context.bot_data["db_path"], event_id)
 
         if not event:
             await query.answer("Мероприятие не найдено", show_alert=False)
@@ -131,21 +132,16 @@ async def handle_save_template(query, context, event_id):
             return
 
         # Сохраняем в базу
-        with sqlite3.connect(context.bot_data["db_path"]) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """INSERT INTO event_templates 
-                (user_id, name, description, date, time, participant_limit, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                (query.from_user.id,
-                 f"{event['description'][:30]}...",  # Обрезаем длинное описание
-                 event['description'],
-                 event['date'],
-                 event['time'],
-                 event['participant_limit'],
-                 datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-            )
-            conn.commit()
+        await run_db(
+            add_template,
+            context.bot_data["db_path"],
+            query.from_user.id,
+            f"{event['description'][:30]}...",  # Обрезаем длинное описание
+            event['description'],
+            event['date'],
+            event['time'],
+            event['participant_limit']
+        )
 
         await query.answer("✅ Шаблон сохранён!", show_alert=True)
 
@@ -157,21 +153,15 @@ async def handle_use_template(query, context, template_id):
     """Создает черновик на основе шаблона"""
     try:
         # Получаем шаблон
-        with sqlite3.connect(context.bot_data["db_path"]) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT * FROM event_templates WHERE id = ? AND user_id = ?",
-                (template_id, query.from_user.id)
-            )
-            template = cursor.fetchone()
+        template = await run_db(get_template, context.bot_data["db_path"], template_id, query.from_user.id)
 
         if not template:
             await query.answer("Шаблон не найден", show_alert=False)
             return
 
         # Создаем черновик СРАЗУ с bot_message_id
-        draft_id = add_draft(
+        draft_id = await run_db(
+            add_draft,
             db_path=context.bot_data["drafts_db_path"],
             creator_id=query.from_user.id,
             chat_id=query.message.chat_id,
@@ -213,7 +203,8 @@ async def handle_use_template(query, context, template_id):
                 reply_markup=InlineKeyboardMarkup(keyboard)
             )
             # Обновляем черновик с ID нового сообщения
-            update_draft(
+            await run_db(
+                update_draft,
                 db_path=context.bot_data["drafts_db_path"],
                 draft_id=draft_id,
                 bot_message_id=message.message_id  # <-- Только если сообщение новое!
@@ -227,16 +218,13 @@ async def handle_delete_template(query, context, template_id):
     """Обрабатывает удаление шаблона"""
     try:
         # Проверяем, что шаблон принадлежит пользователю
-        templates = get_user_templates(context.bot_data["db_path"], query.from_user.id)
+        templates = await run_db(get_user_templates, context.bot_data["db_path"], query.from_user.id)
         if not any(t['id'] == template_id for t in templates):
             await query.answer("❌ Шаблон не найден или нет прав", show_alert=False)
             return
 
         # Удаляем шаблон
-        with sqlite3.connect(context.bot_data["db_path"]) as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM event_templates WHERE id = ?", (template_id,))
-            conn.commit()
+        await run_db(delete_template, context.bot_data["db_path"], template_id)
 
         # Показываем уведомление
         await query.answer("✅ Шаблон удалён", show_alert=False)
@@ -251,17 +239,12 @@ async def handle_delete_template(query, context, template_id):
 async def save_user_middleware(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
     if user:
-        with sqlite3.connect(context.bot_data["db_path"]) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """INSERT OR REPLACE INTO users 
-                (id, first_name, last_name, username, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?)""",
-                (user.id,
-                 user.first_name,
-                 user.last_name or "",
-                 user.username or "",
-                 datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                 datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-            )
-            conn.commit()
\ No newline at end of file
+        # Запись не ожидается: она уйдёт на диск вместе с ближайшей пачкой очереди
+        queue_write(
+            context.bot_data["db_path"],
+            apply_save_user,
+            user.id,
+            user.first_name,
+            user.last_name,
+            user.username
+        )
\ No newline at end of file
@@ -0,0 +1,35 @@
+import sqlite3
+import time
+
+from telegram.ext import ContextTypes
+
+from config import ARCHIVE_GRACE_HOURS, ARCHIVE_BATCH_SIZE
+from src.database.db_executor import run_db
+from src.database.db_operations import archive_expired_events
+from src.database.sharding import shard_paths
+from src.logger.logger import logger
+
+
+async def archive_expired_events_job(context: ContextTypes.DEFAULT_TYPE):
+    """
+    Периодически переносит в архив мероприятия, которые начались более ARCHIVE_GRACE_HOURS
+    часов назад, но остались в рабочих таблицах (например, если задача unpin_delete
+    не выполнилась, пока бот был остановлен). Переносит не больше ARCHIVE_BATCH_SIZE
+    мероприятий за одну транзакцию, чтобы не держать блокировку записи долго.
+    При шардировании обходит все файлы основной БД.
+    :param context: Контекст задачи.
+    """
+    before_ts = int(time.time()) - ARCHIVE_GRACE_HOURS * 3600
+    total = 0
+    try:
+        for db_path in shard_paths(context.bot_data["db_path"]):
+            while True:
+                archived = await run_db(archive_expired_events, db_path, before_ts, ARCHIVE_BATCH_SIZE)
+                total += archived
+                if archived < ARCHIVE_BATCH_SIZE:
+                    break
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при архивации прошедших мероприятий: {e}")
+
+    if total:
+        logger.info(f"Перенесено в архив прошедших мероприятий: {total}")
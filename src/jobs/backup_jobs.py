@@ -0,0 +1,23 @@
+import asyncio
+
+from telegram.ext import ContextTypes
+
+from config import BACKUP_DIR
+from src.database.backup import backup_database
+from src.database.db_executor import run_db
+from src.database.draft_store import flush_all_drafts
+from src.database.sharding import shard_paths
+from src.database.write_queue import flush_writes
+
+
+async def backup_job(context: ContextTypes.DEFAULT_TYPE):
+    """
+    Ежедневное резервное копирование баз мероприятий (всех шардов) и черновиков.
+    Копирование идёт в отдельном потоке, поэтому обработчики и поток БД не ждут его.
+    :param context: Контекст задачи.
+    """
+    # Сохраняем отложенные записи и черновики из памяти, чтобы они попали в копию
+    await flush_writes()
+    await run_db(flush_all_drafts)
+    for db_path in shard_paths(context.bot_data["db_path"]) + [context.bot_data["drafts_db_path"]]:
+        await asyncio.to_thread(backup_database, db_path, BACKUP_DIR)
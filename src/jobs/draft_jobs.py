@@ -0,0 +1,61 @@
+from telegram.error import BadRequest
+from telegram.ext import ContextTypes
+
+from src.database.db_draft_operations import delete_expired_drafts
+from src.database.db_executor import run_db, run_db_read
+from src.database.db_operations import get_event
+from src.database.draft_store import flush_all_drafts
+from src.message.send_message import send_event_message
+from src.logger.logger import logger
+
+
+async def flush_drafts_job(context: ContextTypes.DEFAULT_TYPE):
+    """
+    Периодически сохраняет изменения черновиков из памяти в БД черновиков.
+    :param context: Контекст задачи.
+    """
+    flushed = await run_db(flush_all_drafts)
+    if flushed:
+        logger.debug(f"Сохранено изменений черновиков: {flushed}")
+
+
+async def sweep_expired_drafts_job(context: ContextTypes.DEFAULT_TYPE):
+    """
+    Периодически удаляет брошенные черновики (см. DRAFT_TTL_MINUTES) и убирает их следы в чатах:
+    запрос бота при создании мероприятия заменяется сообщением об отмене,
+    при редактировании восстанавливается сообщение мероприятия.
+    :param context: Контекст задачи.
+    """
+    expired = await run_db(delete_expired_drafts, context.bot_data["drafts_db_path"])
+    for draft in expired:
+        try:
+            if draft.event_id and draft.original_message_id:
+                await _restore_edited_event(context, draft)
+            elif draft.bot_message_id:
+                await context.bot.edit_message_text(
+                    chat_id=draft.chat_id,
+                    message_id=draft.bot_message_id,
+                    text="⌛ Создание мероприятия отменено: время ожидания истекло",
+                    reply_markup=None,
+                )
+        except BadRequest as e:
+            # Сообщение уже удалено или изменено пользователем
+            logger.info(f"Не удалось убрать запрос просроченного черновика {draft.id}: {e}")
+        except Exception as e:
+            logger.error(f"Ошибка при очистке просроченного черновика {draft.id}: {e}")
+
+
+async def _restore_edited_event(context, draft):
+    """Возвращает сообщению мероприятия исходный вид после брошенного редактирования."""
+    if draft.bot_message_id and draft.bot_message_id != draft.original_message_id:
+        await context.bot.delete_message(chat_id=draft.chat_id, message_id=draft.bot_message_id)
+
+    event = await run_db_read(get_event, context.bot_data["db_path"], draft.event_id)
+    if event:
+        await send_event_message(
+            event_id=draft.event_id,
+            context=context,
+            chat_id=draft.chat_id,
+            message_id=draft.original_message_id,
+            event=event,
+        )
@@ -0,0 +1,33 @@
+from telegram.ext import ContextTypes
+
+from src.database.db_executor import get_lock_stats, run_db
+from src.database.draft_store import flush_all_drafts
+from src.database.event_cache import get_event_cache_stats
+from src.database.maintenance import check_roster_counters, run_maintenance, sweep_orphans
+from src.database.sharding import shard_paths
+from src.database.write_queue import flush_writes
+from src.logger.logger import logger
+
+
+async def db_maintenance_job(context: ContextTypes.DEFAULT_TYPE):
+    """
+    Ежедневное обслуживание баз мероприятий и черновиков в часы наименьшей нагрузки.
+    Перед обслуживанием сохраняет отложенные записи, чтобы checkpoint захватил их,
+    удаляет осиротевшие строки дочерних таблиц мероприятий и сверяет счётчики списков.
+    Заодно пишет в лог счётчики блокировок БД и кэша мероприятий за прошедшие сутки.
+    Выполняется в потоке БД, поэтому не пересекается с запросами обработчиков.
+    :param context: Контекст задачи.
+    """
+    await flush_writes()
+    await run_db(flush_all_drafts)
+    events_paths = shard_paths(context.bot_data["db_path"])
+    for db_path in events_paths:
+        await run_db(sweep_orphans, db_path)
+        await run_db(check_roster_counters, db_path)
+    for db_path in events_paths + [context.bot_data["drafts_db_path"]]:
+        await run_db(run_maintenance, db_path)
+
+    lock_stats = get_lock_stats(reset=True)
+    if lock_stats:
+        logger.info(f"Блокировки БД за сутки: {lock_stats}")
+    logger.info(f"Кэш мероприятий за сутки: {get_event_cache_stats(reset=True)}")
@@ -3,10 +3,12 @@ from datetime import datetime, timedelta
 from telegram.ext import ContextTypes, Application
 
 from config import tz
+from src.database.db_executor import run_db, run_db_read
 from src.database.db_operations import (
-    get_event, delete_event, get_scheduled_job_id, delete_scheduled_job, add_scheduled_job, get_db_connection
+    get_event, archive_event, get_scheduled_job_id, delete_scheduled_job, add_scheduled_job,
+    get_scheduled_jobs, delete_scheduled_job_by_id, ARCHIVE_REASON_FINISHED
 )
-from src.utils.utils import time_until_event
+from src.utils.utils import event_datetime as get_event_datetime, format_event_date, format_time_until
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,7 +20,7 @@ async def send_notification(context: ContextTypes.DEFAULT_TYPE):
     """
     event_id = context.job.data["event_id"]
     db_path = context.bot_data["db_path"]
-    event = get_event(db_path, event_id)
+    event = await run_db_read(get_event, db_path, event_id)
 
     if not event:
         logger.error(f"Мероприятие с ID {event_id} не найдено.")
@@ -33,13 +35,11 @@ async def send_notification(context: ContextTypes.DEFAULT_TYPE):
     # Получаем часовой пояс из context.bot_data
     tz = context.bot_data.get("tz")
 
-    # Форматируем дату с днём недели
-    try:
-        date = datetime.strptime(event["date"], "%d.%m.%Y").date()  # Используем формат "%d.%m.%Y"
-        formatted_date = date.strftime("%d.%m.%Y (%A)")  # %A — полное название дня недели
-    except ValueError as e:
-        logger.error(f"Ошибка при обработке даты мероприятия: {e}")
+    # Дата с днём недели строится по времени начала мероприятия
+    if event["starts_at"] is None:
+        logger.error(f"Неизвестно время начала мероприятия {event_id}: {event['date']} {event['time']}")
         return
+    formatted_date = format_event_date(event, tz)
 
     # Преобразуем chat_id для ссылки
     chat_id = event["chat_id"]
@@ -52,7 +52,7 @@ async def send_notification(context: ContextTypes.DEFAULT_TYPE):
     event_link = f"https://t.me/c/{chat_id_link}/{event['message_id']}"
 
     # Формируем текст уведомления с кликабельным названием мероприятия
-    time_until = time_until_event(event["date"], event["time"], tz)
+    time_until = format_time_until(event["starts_at"], tz)
     message = (
         f"⏰ Напоминание о мероприятии:\n"
         f"📢 <a href='{event_link}'>{event['description']}</a>\n"
@@ -79,7 +79,7 @@ async def send_notification(context: ContextTypes.DEFAULT_TYPE):
 
 async def unpin_and_delete_event(context: ContextTypes.DEFAULT_TYPE):
     """
-    Открепляет сообщение мероприятия и удаляет его из базы данных.
+    Открепляет сообщение мероприятия и переносит мероприятие в архив.
     :param context: Контекст задачи.
     """
     event_id = context.job.data["event_id"]
@@ -87,7 +87,7 @@ async def unpin_and_delete_event(context: ContextTypes.DEFAULT_TYPE):
     db_path = context.bot_data["db_path"]
 
     # Получаем данные о мероприятии
-    event = get_event(db_path, event_id)
+    event = await run_db_read(get_event, db_path, event_id)
     if not event:
         logger.error(f"Мероприятие с ID {event_id} не найдено.")
         return
@@ -99,12 +99,11 @@ async def unpin_and_delete_event(context: ContextTypes.DEFAULT_TYPE):
     except Exception as e:
         logger.error(f"Ошибка при откреплении сообщения: {e}")
 
-    # Удаляем мероприятие из базы данных
-    delete_event(db_path, event_id)
-    logger.info(f"Мероприятие с ID {event_id} удалено из базы данных.")
+    # Переносим мероприятие в архив (вместе со списками и задачами)
+    await run_db(archive_event, db_path, event_id, ARCHIVE_REASON_FINISHED)
 
     # Удаляем задачу из базы данных
-    delete_scheduled_job(db_path, event_id, job_type="unpin_delete")
+    await run_db(delete_scheduled_job, db_path, event_id, job_type="unpin_delete")
     logger.info(f"Задача unpin_delete для мероприятия {event_id} удалена из базы данных.")
 
 
@@ -135,8 +134,14 @@ async def schedule_notifications(event_id: int, context: ContextTypes.DEFAULT_TY
     )
 
     # Сохраняем задачи в базу данных
-    add_scheduled_job(db_path, event_id, job_day.id, chat_id, (event_datetime - timedelta(days=1)).isoformat(), job_type="notification_day")
-    add_scheduled_job(db_path, event_id, job_minutes.id, chat_id, (event_datetime - timedelta(minutes=15)).isoformat(), job_type="notification_minutes")
+    await run_db(
+        add_scheduled_job, db_path, event_id, job_day.id, chat_id,
+        (event_datetime - timedelta(days=1)).isoformat(), job_type="notification_day"
+    )
+    await run_db(
+        add_scheduled_job, db_path, event_id, job_minutes.id, chat_id,
+        (event_datetime - timedelta(minutes=15)).isoformat(), job_type="notification_minutes"
+    )
 
     logger.info(f"Созданы новые задачи напоминания для мероприятия {event_id}.")
 
@@ -151,17 +156,15 @@ async def schedule_unpin_and_delete(event_id: int, context: ContextTypes.DEFAULT
     db_path = context.bot_data["db_path"]
 
     # Получаем данные о мероприятии
-    event = get_event(db_path, event_id)
+    event = await run_db_read(get_event, db_path, event_id)
     if not event:
         logger.error(f"Мероприятие с ID {event_id} не найдено.")
         return
 
-    # Преобразуем дату и время мероприятия
-    try:
-        event_datetime = datetime.strptime(f"{event['date']} {event['time']}", "%d.%m.%Y %H:%M")
-        event_datetime = event_datetime.replace(tzinfo=tz)  # Устанавливаем часовой пояс
-    except ValueError as e:
-        logger.error(f"Ошибка при обработке даты и времени мероприятия: {e}")
+    # Время начала мероприятия
+    event_datetime = get_event_datetime(event, tz)
+    if event_datetime is None:
+        logger.error(f"Неизвестно время начала мероприятия {event_id}: {event['date']} {event['time']}")
         return
 
     # Создаём задачу
@@ -173,7 +176,9 @@ async def schedule_unpin_and_delete(event_id: int, context: ContextTypes.DEFAULT
     )
 
     # Сохраняем задачу в базу данных
-    add_scheduled_job(db_path, event_id, job.id, chat_id, event_datetime.isoformat(), job_type="unpin_delete")
+    await run_db(
+        add_scheduled_job, db_path, event_id, job.id, chat_id, event_datetime.isoformat(), job_type="unpin_delete"
+    )
     logger.info(f"Создана задача для открепления и удаления мероприятия {event_id}.")
 
 
@@ -228,47 +233,41 @@ def restore_scheduled_jobs(application: Application):
     :param application: Приложение бота.
     """
     db_path = application.bot_data["db_path"]
-    with get_db_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM scheduled_jobs")
-        jobs = cursor.fetchall()
-
-        for job in jobs:
-            event_id = job["event_id"]
-            chat_id = job["chat_id"]
-            execute_at = datetime.fromisoformat(job["execute_at"])
-
-            # Преобразуем execute_at в offset-aware, если он offset-naive
-            if execute_at.tzinfo is None:
-                execute_at = tz.localize(execute_at)
-
-            # Проверяем, не истекло ли время выполнения задачи
-            if execute_at > datetime.now(tz):
-                # Создаем задачу в зависимости от её типа
-                if job["job_type"] == "unpin_delete":
-                    application.job_queue.run_once(
-                        unpin_and_delete_event,
-                        when=execute_at,
-                        data={"event_id": event_id, "chat_id": chat_id},
-                        name=f"unpin_delete_{event_id}"
-                    )
-                elif job["job_type"] == "notification_day":
-                    application.job_queue.run_once(
-                        send_notification,
-                        when=execute_at,
-                        data={"event_id": event_id, "time_until": "1 день"},
-                        name=f"notification_{event_id}_day"
-                    )
-                elif job["job_type"] == "notification_minutes":
-                    application.job_queue.run_once(
-                        send_notification,
-                        when=execute_at,
-                        data={"event_id": event_id, "time_until": "15 минут"},
-                        name=f"notification_{event_id}_minutes"
-                    )
-                logger.info(f"Восстановлена задача для мероприятия с ID: {event_id}")
-            else:
-                # Если время выполнения задачи истекло, удаляем её из базы данных
-                cursor.execute("DELETE FROM scheduled_jobs WHERE id = ?", (job["id"],))
-                conn.commit()
-                logger.info(f"Удалена устаревшая задача для мероприятия с ID: {event_id}")
\ No newline at end of file
+    for job in get_scheduled_jobs(db_path):
+        event_id = job["event_id"]
+        chat_id = job["chat_id"]
+        execute_at = datetime.fromisoformat(job["execute_at"])
+
+        # Преобразуем execute_at в offset-aware, если он offset-naive
+        if execute_at.tzinfo is None:
+            execute_at = execute_at.replace(tzinfo=tz)
+
+        # Проверяем, не истекло ли время выполнения задачи
+        if execute_at > datetime.now(tz):
+            # Создаем задачу в зависимости от её типа
+            if job["job_type"] == "unpin_delete":
+                application.job_queue.run_once(
+                    unpin_and_delete_event,
+                    when=execute_at,
+                    data={"event_id": event_id, "chat_id": chat_id},
+                    name=f"unpin_delete_{event_id}"
+                )
+            elif job["job_type"] == "notification_day":
+                application.job_queue.run_once(
+                    send_notification,
+                    when=execute_at,
+                    data={"event_id": event_id, "time_until": "1 день"},
+                    name=f"notification_{event_id}_day"
+                )
+            elif job["job_type"] == "notification_minutes":
+                application.job_queue.run_once(
+                    send_notification,
+                    when=execute_at,
+                    data={"event_id": event_id, "time_until": "15 минут"},
+                    name=f"notification_{event_id}_minutes"
+                )
+            logger.info(f"Восстановлена задача для мероприятия с ID: {event_id}")
+        else:
+            # Если время выполнения задачи истекло, удаляем её из базы данных
+            delete_scheduled_job_by_id(db_path, job["id"])
+            logger.info(f"Удалена устаревшая задача для мероприятия с ID: {event_id}")
@@ -1,6 +1,8 @@
-from datetime import datetime
+from config import tz
+from src.database.db_executor import run_db_read
 from src.database.db_operations import get_event
 from src.logger import logger
+from src.utils.utils import format_event_date
 from telegram.error import BadRequest
 
 async def send_event_creation_notification(context, event_id, bot_message_id):
@@ -12,7 +14,7 @@ async def send_event_creation_notification(context, event_id, bot_message_id):
 
         # Получаем данные о мероприятии
         try:
-            event = get_event(context.bot_data["db_path"], event_id)
+            event = await run_db_read(get_event, context.bot_data["db_path"], event_id)
             if not event:
                 logger.error(f"Мероприятие {event_id} не найдено в БД")
                 return
@@ -36,7 +38,7 @@ async def send_event_creation_notification(context, event_id, bot_message_id):
 
     except BadRequest as e:
         # Теперь event всегда определен (хотя может быть None)
-        event = get_event(context.bot_data["db_path"], event_id)
+        event = await run_db_read(get_event, context.bot_data["db_path"], event_id)
         creator_id = event.get("creator_id") if event else "неизвестен"
         logger.error(f"Ошибка отправки сообщения creator_id {creator_id}: {e}")
     except Exception as e:
@@ -76,11 +78,7 @@ async def _format_notification_message(event, chat_info, bot_message_id):
 
     # Добавляем дату
     if event.get("date"):
-        try:
-            date_str = datetime.strptime(event["date"], "%d.%m.%Y").strftime("%d.%m.%Y (%A)")
-            message_parts.append(f"📅 <b>Дата:</b> {date_str}")
-        except ValueError:
-            message_parts.append(f"📅 <b>Дата:</b> {event['date']}")
+        message_parts.append(f"📅 <b>Дата:</b> {format_event_date(event, tz)}")
 
     # Добавляем время
     if event.get("time"):
@@ -1,15 +1,14 @@
-from datetime import datetime
-
 import telegram
 from telegram import InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.error import BadRequest
 from telegram.ext import ContextTypes
 
 from config import DB_PATH
-from src.database.db_operations import get_event, get_participants, get_reserve, get_declined, update_message_id
+from src.database.db_executor import run_db, run_db_read
+from src.database.db_operations import get_event, update_message_id
 from src.logger.logger import logger
 from src.utils.pin_message import pin_message_safe
-from src.utils.utils import time_until_event, format_users_list
+from src.utils.utils import format_event_date, format_time_until, format_users_list
 
 # Константы для текстов пустых списков
 EMPTY_PARTICIPANTS_TEXT = "Ещё никто не участвует."
@@ -17,30 +16,33 @@ EMPTY_RESERVE_TEXT = "Резерв пуст."
 EMPTY_DECLINED_TEXT = "Отказавшихся нет."
 
 
-async def send_event_message(event_id, context: ContextTypes.DEFAULT_TYPE, chat_id: int, message_id):
+async def send_event_message(event_id, context: ContextTypes.DEFAULT_TYPE, chat_id: int, message_id, event=None):
     logger.warning(f"Готовимся к отправке сообщения о мероприятие с ID {event_id} и номером сообщения {message_id}.")
     """
     Отправляет или редактирует сообщение с информацией о мероприятии и закрепляет его.
+    Если передан event (данные в формате get_event), мероприятие повторно из БД не читается.
     Возвращает ID сообщения.
     """
     try:
         db_path = context.bot_data.get("db_path", DB_PATH)
-        event = get_event(db_path, event_id)
+        if event is None:
+            event = await run_db_read(get_event, db_path, event_id)
         if not event:
             logger.error(f"Мероприятие с ID {event_id} не найдено.")
             return None
 
-        # Получаем данные для сообщения
-        participants = get_participants(db_path, event_id)
-        reserve = get_reserve(db_path, event_id)
-        declined = get_declined(db_path, event_id)
+        # Списки уже получены вместе с мероприятием
+        participants = event["participants"]
+        reserve = event["reserve"]
+        declined = event["declined"]
 
-        # Форматируем текст и клавиатуру
+        # Форматируем текст и клавиатуру, дата и обратный отсчёт строятся по starts_at
+        tz = context.bot_data.get("tz")
         message_text = (
             f"📢 <b>{event['description']}</b>\n"
-            f"📅 <i>Дата:</i> {datetime.strptime(event['date'], '%d.%m.%Y').strftime('%d.%m.%Y (%A)')}\n"
+            f"📅 <i>Дата:</i> {format_event_date(event, tz)}\n"
             f"🕒 <i>Время:</i> {event['time']}\n"
-            f"⏳ <i>До мероприятия:</i> {time_until_event(event['date'], event['time'], context.bot_data.get('tz'))}\n"
+            f"⏳ <i>До мероприятия:</i> {format_time_until(event['starts_at'], tz)}\n"
             f"👥 <i>Лимит:</i> {'∞' if event['participant_limit'] is None else event['participant_limit']}\n\n"
             f"✅ <i>Участники:</i>\n{format_users_list(participants, EMPTY_PARTICIPANTS_TEXT)}\n\n"
             f"⏳ <i>Резерв:</i>\n{format_users_list(reserve, EMPTY_RESERVE_TEXT)}\n\n"
@@ -80,7 +82,7 @@ async def send_event_message(event_id, context: ContextTypes.DEFAULT_TYPE, chat_
         logger.info(f"Начинаем закреплять сообщение  {message_id} в чате {chat_id}")
         await pin_message_safe(context, chat_id, new_message_id)
         # Обновляем ID сообщения в БД и закрепляем
-        update_message_id(db_path, event_id, new_message_id)
+        await run_db(update_message_id, db_path, event_id, new_message_id)
 
         return new_message_id
 
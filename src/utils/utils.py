@@ -8,27 +8,70 @@ from zoneinfo import ZoneInfo  # Используем ZoneInfo для работ
 locale.setlocale(locale.LC_TIME, 'ru_RU.UTF-8')  # Для Linux
 
 
-def time_until_event(event_date: str, event_time: str, tz: ZoneInfo) -> str:
+# Форматы, в которых пользователь вводит дату и время мероприятия
+EVENT_DATE_FORMAT = "%d.%m.%Y"
+EVENT_TIME_FORMAT = "%H:%M"
+
+
+def to_starts_at(event_date: str, event_time: str, tz: ZoneInfo) -> int | None:
     """
-    Вычисляет оставшееся время до мероприятия с учетом часового пояса.
+    Переводит дату и время мероприятия в момент начала (Unix-время, UTC).
     :param event_date: Дата мероприятия в формате "дд.мм.гггг".
     :param event_time: Время мероприятия в формате "чч:мм".
+    :param tz: Часовой пояс, в котором указаны дата и время.
+    :return: Число секунд с начала эпохи или None, если дата или время не разбираются.
+    """
+    try:
+        event_datetime = datetime.strptime(f"{event_date} {event_time}", f"{EVENT_DATE_FORMAT} {EVENT_TIME_FORMAT}")
+    except (TypeError, ValueError):
+        return None
+    return int(event_datetime.replace(tzinfo=tz).timestamp())
+
+
+def event_datetime(event: dict, tz: ZoneInfo) -> datetime | None:
+    """
+    Возвращает момент начала мероприятия в указанном часовом поясе.
+    :param event: Мероприятие в формате get_event (используется поле starts_at).
+    :param tz: Часовой пояс.
+    :return: Объект datetime или None, если время начала неизвестно.
+    """
+    starts_at = event.get("starts_at")
+    if starts_at is None:
+        return None
+    return datetime.fromtimestamp(starts_at, tz)
+
+
+def format_event_date(event: dict, tz: ZoneInfo) -> str:
+    """
+    Форматирует дату мероприятия с днём недели, например "01.01.2030 (вторник)".
+    Если время начала неизвестно, возвращает дату в том виде, в каком она сохранена.
+    """
+    start = event_datetime(event, tz)
+    if start is None:
+        return event.get("date") or ""
+    return start.strftime(f"{EVENT_DATE_FORMAT} (%A)")
+
+
+def format_time_until(starts_at: int | None, tz: ZoneInfo) -> str:
+    """
+    Вычисляет оставшееся время до мероприятия.
+    :param starts_at: Момент начала мероприятия (Unix-время).
     :param tz: Часовой пояс (ZoneInfo).
     :return: Строка с оставшимся временем в формате "X дней, Y часов, Z минут".
     """
-    # Преобразуем дату и время мероприятия в объект datetime
-    event_datetime = datetime.strptime(f"{event_date} {event_time}", "%d.%m.%Y %H:%M")
-    event_datetime = event_datetime.replace(tzinfo=tz)  # Устанавливаем часовой пояс
+    if starts_at is None:
+        return "Неизвестно"
 
-    # Получаем текущее время с учетом часового пояса
+    # Разница считается в UTC, часовой пояс нужен только для текущего времени
     now = datetime.now(tz)
+    event_start = datetime.fromtimestamp(starts_at, tz)
 
     # Если мероприятие уже прошло, возвращаем соответствующее сообщение
-    if event_datetime <= now:
+    if event_start <= now:
         return "Мероприятие уже прошло."
 
     # Вычисляем разницу между текущим временем и временем мероприятия
-    delta = event_datetime - now
+    delta = event_start - now
     days = delta.days
     hours, remainder = divmod(delta.seconds, 3600)
     minutes, _ = divmod(remainder, 60)
@@ -45,6 +88,20 @@ def time_until_event(event_date: str, event_time: str, tz: ZoneInfo) -> str:
     return ", ".join(result) if result else "Менее минуты"
 
 
+def time_until_event(event_date: str, event_time: str, tz: ZoneInfo) -> str:
+    """
+    Вычисляет оставшееся время до мероприятия с учетом часового пояса.
+    :param event_date: Дата мероприятия в формате "дд.мм.гггг".
+    :param event_time: Время мероприятия в формате "чч:мм".
+    :param tz: Часовой пояс (ZoneInfo).
+    :return: Строка с оставшимся временем в формате "X дней, Y часов, Z минут".
+    """
+    starts_at = to_starts_at(event_date, event_time, tz)
+    if starts_at is None:
+        raise ValueError(f"Неверная дата или время мероприятия: {event_date} {event_time}")
+    return format_time_until(starts_at, tz)
+
+
 def format_users_list(users: list, empty_text: str) -> str:
     """Форматирует список пользователей без использования username из БД"""
     if not users:
@@ -1,5 +1,5 @@
 import pytest
-import sqlite3
+import os
 from datetime import datetime
 from pathlib import Path
 from unittest.mock import MagicMock, AsyncMock
@@ -8,6 +8,10 @@ from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from telegram import User, Chat, Message, CallbackQuery, Update
 from telegram.ext import CallbackContext, Application, ContextTypes
 
+from src.database.connection import get_backend
+from src.database.draft_store import reset_draft_stores
+from src.database.event_cache import clear_event_cache
+from src.database.sharding import reset_shards
 from src.database.init_database import init_db
 from src.database.init_draft_database import init_drafts_db
 from src.logger import logger
@@ -29,6 +33,20 @@ def app():
     application = Application.builder().token("FAKE-TOKEN").build()
     return application
 
+def connect_db(db_path):
+    """
+    Соединение с тестовой БД через текущее хранилище (DB_BACKEND): с DB_BACKEND=memory
+    фикстуры видят те же базы в памяти, что и db_operations.
+    """
+    return get_backend().connect(os.path.abspath(os.fspath(db_path)))
+
+
+# Тесты файловых свойств хранилища (WAL, соединения только для чтения)
+requires_file_backend = pytest.mark.skipif(
+    get_backend().name != "file", reason="проверяет поведение файлового хранилища SQLite"
+)
+
+
 @pytest.fixture(scope="session")
 def temp_dir(tmp_path_factory):
     """Фикстура для временной директории"""
@@ -40,7 +58,7 @@ def test_databases(temp_dir):
 
     """
     Фикстура создает и инициализирует обе тестовые базы данных:
-    - Основную БД (events, participants и др.)
+    - Основную БД (events, participation и др.)
     - БД черновиков (drafts)
     Возвращает словарь с путями к созданным БД
     """
@@ -56,7 +74,7 @@ def test_databases(temp_dir):
 
     # Добавляем тестовые данные
     now = datetime.now().isoformat()
-    with sqlite3.connect(main_db_path) as conn:
+    with connect_db(main_db_path) as conn:
         cursor = conn.cursor()
 
         # Тестовое мероприятие
@@ -144,33 +162,44 @@ def test_draft_operations_fixture(draft_operations, test_databases):
     )
     assert draft_id is not None
 
-    with sqlite3.connect(test_databases["drafts_db"]) as conn:
+    with connect_db(test_databases["drafts_db"]) as conn:
         drafts = conn.execute("SELECT * FROM drafts").fetchall()
         assert len(drafts) == 1
 
 @pytest.fixture(autouse=True)
 def clean_databases(test_databases, request):
     """Очищает базы данных после каждого теста."""
+    # Черновики и кэш мероприятий в памяти сбрасываются вместе с таблицами
+    reset_draft_stores()
+    clear_event_cache()
+
     # Очистка перед тестом
-    with sqlite3.connect(test_databases["main_db"]) as conn:
+    with connect_db(test_databases["main_db"]) as conn:
         conn.execute("DELETE FROM events")
-        conn.execute("DELETE FROM participants")
+        conn.execute("DELETE FROM participation")
         conn.execute("DELETE FROM users")
+        conn.execute("DELETE FROM events_archive")
+        conn.execute("DELETE FROM participation_archive")
         conn.commit()
 
-    with sqlite3.connect(test_databases["drafts_db"]) as conn:
+    with connect_db(test_databases["drafts_db"]) as conn:
         conn.execute("DELETE FROM drafts")
         conn.commit()
 
     def finalizer():
         # Очистка после теста
-        with sqlite3.connect(test_databases["main_db"]) as conn:
+        reset_draft_stores()
+        reset_shards()
+        clear_event_cache()
+        with connect_db(test_databases["main_db"]) as conn:
             conn.execute("DELETE FROM events")
-            conn.execute("DELETE FROM participants")
+            conn.execute("DELETE FROM participation")
             conn.execute("DELETE FROM users")
+            conn.execute("DELETE FROM events_archive")
+            conn.execute("DELETE FROM participation_archive")
             conn.commit()
 
-        with sqlite3.connect(test_databases["drafts_db"]) as conn:
+        with connect_db(test_databases["drafts_db"]) as conn:
             conn.execute("DELETE FROM drafts")
             conn.commit()
 
@@ -278,14 +307,12 @@ def mock_context(mock_bot):
 def setup_teardown(test_databases):
     """Фикстура для setup/teardown перед/после каждого теста"""
     # Setup: очищаем таблицы перед каждым тестом
-    with sqlite3.connect(test_databases["main_db"]) as conn:
+    with connect_db(test_databases["main_db"]) as conn:
         cursor = conn.cursor()
-        cursor.execute("DELETE FROM participants")
-        cursor.execute("DELETE FROM reserve")
-        cursor.execute("DELETE FROM declined")
+        cursor.execute("DELETE FROM participation")
         conn.commit()
 
-    with sqlite3.connect(test_databases["drafts_db"]) as conn:
+    with connect_db(test_databases["drafts_db"]) as conn:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM drafts")
         conn.commit()
@@ -5,7 +5,6 @@ import pytest
 from unittest.mock import AsyncMock, MagicMock, patch, ANY, PropertyMock
 from telegram import Update, CallbackQuery, User, Message, Chat, InlineKeyboardMarkup
 from telegram.ext import CallbackContext
-import sqlite3
 from src.buttons.button_handlers import (
     button_handler,
     handle_join,
@@ -17,6 +16,7 @@ from src.buttons.button_handlers import (
     handle_cancel_delete,
     update_event_message
 )
+from tests.conftest import connect_db
 
 @pytest.mark.asyncio
 async def test_button_handler_simple_actions(mock_update, mock_context):
@@ -70,7 +70,7 @@ async def test_button_handler_event_actions(
     update.callback_query.from_user = mock_user
 
     # Добавление тестового мероприятия
-    with sqlite3.connect(test_databases["main_db"]) as conn:
+    with connect_db(test_databases["main_db"]) as conn:
         conn.execute("DELETE FROM events")
         conn.execute(
             """
@@ -171,11 +171,12 @@ async def test_button_handler_edit_actions(mock_update, mock_context, test_datab
     mock_context._user_data = None
 
     # 2. Подготовка тестовых данных в БД
-    with sqlite3.connect(test_databases["main_db"]) as conn:
+    with connect_db(test_databases["main_db"]) as conn:
         conn.execute("DELETE FROM events WHERE id = 1")
         conn.execute("""
-            INSERT INTO events VALUES 
-            (1, 'Test Event', '2023-01-01', '12:00', 10, 123, 456, 789,
+            INSERT INTO events (id, description, date, time, participant_limit,
+                                creator_id, chat_id, message_id, created_at, updated_at)
+            VALUES (1, 'Test Event', '2023-01-01', '12:00', 10, 123, 456, 789,
             datetime('now'), datetime('now'))
         """)
         conn.commit()
@@ -240,7 +241,7 @@ async def test_handle_edit_field(mock_update, mock_context, test_databases):
     mock_context._user_data = {}
 
     # 2. Подготовка тестовых данных в БД
-    with sqlite3.connect(test_databases["main_db"]) as conn:
+    with connect_db(test_databases["main_db"]) as conn:
         conn.execute("DELETE FROM events")
         conn.execute("""
             INSERT INTO events 
@@ -254,6 +255,7 @@ async def test_handle_edit_field(mock_update, mock_context, test_databases):
 
     # 3. Патчим вспомогательные функции и классы
     with patch('src.buttons.button_handlers.get_event') as mock_get_event, \
+         patch('src.buttons.button_handlers.get_event_header') as mock_get_event_header, \
          patch('src.buttons.button_handlers.add_draft') as mock_add_draft, \
          patch('telegram.InlineKeyboardMarkup') as mock_markup:
 
@@ -269,6 +271,7 @@ async def test_handle_edit_field(mock_update, mock_context, test_databases):
             "message_id": 789
         }
 
+        mock_get_event_header.return_value = mock_get_event.return_value
         mock_add_draft.return_value = 1  # ID нового черновика
         mock_markup.return_value = MagicMock()  # Мок для клавиатуры
 
@@ -340,7 +343,7 @@ async def test_handle_edit_event_author(mock_update, mock_context):
     mock_query.answer = AsyncMock()
     mock_query.from_user.id = 123
 
-    with patch("src.buttons.button_handlers.get_event") as mock_get_event:
+    with patch("src.buttons.button_handlers.get_event_header") as mock_get_event:
         mock_get_event.return_value = {
             "id": 1,
             "description": "Test",
@@ -368,7 +371,7 @@ async def test_handle_edit_event_not_author(mock_update, mock_context):
     mock_query.answer = AsyncMock()
     mock_query.from_user.id = 999  # не автор
 
-    with patch("src.buttons.button_handlers.get_event") as mock_get_event:
+    with patch("src.buttons.button_handlers.get_event_header") as mock_get_event:
         mock_get_event.return_value = {
             "id": 1,
             "creator_id": 123
@@ -386,7 +389,7 @@ async def test_handle_edit_event_not_found(mock_update, mock_context):
     mock_query = update.callback_query
     mock_query.answer = AsyncMock()
 
-    with patch("src.buttons.button_handlers.get_event", return_value=None):
+    with patch("src.buttons.button_handlers.get_event_header", return_value=None):
         await handle_edit_event(mock_query, mock_context, event_id=1)
         mock_query.answer.assert_called_with("Мероприятие не найдено", show_alert=False)
 
@@ -412,6 +415,7 @@ async def test_handle_edit_field_success(mock_update, mock_context):
     type(mock_context).user_data = PropertyMock(return_value=fake_user_data)
 
     with patch("src.buttons.button_handlers.get_event") as mock_get_event, \
+         patch("src.buttons.button_handlers.get_event_header") as mock_get_event_header, \
          patch("src.buttons.button_handlers.add_draft") as mock_add_draft:
 
         mock_get_event.return_value = {
@@ -425,6 +429,7 @@ async def test_handle_edit_field_success(mock_update, mock_context):
             "message_id": 789
         }
 
+        mock_get_event_header.return_value = mock_get_event.return_value
         mock_add_draft.return_value = 42
 
         await handle_edit_field(mock_query, mock_context, event_id=1, field="description")
@@ -442,7 +447,7 @@ async def test_handle_edit_field_not_author(mock_update, mock_context):
     mock_query.from_user.id = 999
     mock_query.answer = AsyncMock()
 
-    with patch("src.buttons.button_handlers.get_event") as mock_get_event:
+    with patch("src.buttons.button_handlers.get_event_header") as mock_get_event:
         mock_get_event.return_value = {"creator_id": 123}
 
         await handle_edit_field(mock_query, mock_context, event_id=1, field="description")
@@ -458,7 +463,7 @@ async def test_handle_edit_field_event_not_found(mock_update, mock_context):
     mock_query = update.callback_query
     mock_query.edit_message_text = AsyncMock()
 
-    with patch("src.buttons.button_handlers.get_event", return_value=None):
+    with patch("src.buttons.button_handlers.get_event_header", return_value=None):
         await handle_edit_field(mock_query, mock_context, event_id=1, field="description")
 
         mock_query.edit_message_text.assert_called_with("❌ Мероприятие не найдено")
@@ -524,11 +529,12 @@ async def test_handle_join_new_participant(test_databases, mock_context, mock_ca
     logging.debug(f"Test database path: {db_path}")
 
     # Подготовка данных в базе
-    with sqlite3.connect(db_path) as conn:
+    with connect_db(db_path) as conn:
         conn.execute(""" 
-            INSERT INTO events VALUES 
-            (1, 'Test Event', '2023-01-01', '12:00', 10, 123, 456, 789, 
-            datetime('now'), datetime('now')) 
+            INSERT INTO events (id, description, date, time, participant_limit,
+                                creator_id, chat_id, message_id, created_at, updated_at)
+            VALUES (1, 'Test Event', '2023-01-01', '12:00', 10, 123, 456, 789,
+            datetime('now'), datetime('now'))
         """)
         conn.commit()
 
@@ -548,9 +554,9 @@ async def test_handle_join_new_participant(test_databases, mock_context, mock_ca
     mock_callback_query.answer.assert_called_once_with("Test (@test_user), вы добавлены в список участников!")
 
     # Проверка, добавлен ли пользователь в базу данных
-    with sqlite3.connect(db_path) as conn:
+    with connect_db(db_path) as conn:
         cur = conn.cursor()
-        cur.execute("SELECT * FROM participants WHERE event_id = 1 AND user_id = 123")
+        cur.execute("SELECT * FROM participation WHERE event_id = 1 AND user_id = 123 AND status = 'participant'")
         assert cur.fetchone() is not None
 
 
@@ -561,7 +567,7 @@ async def test_handle_confirm_delete(mock_update, mock_context, test_databases):
     mock_context.bot_data["db_path"] = test_databases["main_db"]
 
     # Настройка тестового мероприятия
-    with sqlite3.connect(test_databases["main_db"]) as conn:
+    with connect_db(test_databases["main_db"]) as conn:
         conn.execute("DELETE FROM events")
         conn.execute("""
             INSERT INTO events 
@@ -589,7 +595,7 @@ async def test_update_event_message(mock_update, mock_context, test_databases):
     mock_context.bot_data["db_path"] = test_databases["main_db"]
 
     # Настройка тестового мероприятия
-    with sqlite3.connect(test_databases["main_db"]) as conn:
+    with connect_db(test_databases["main_db"]) as conn:
         # Создаем таблицу events
         conn.execute("""
             CREATE TABLE IF NOT EXISTS events (
@@ -603,15 +609,6 @@ async def test_update_event_message(mock_update, mock_context, test_databases):
                 message_id INTEGER
             )
         """)
-        # Создаем таблицу participants
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS participants (
-                event_id INTEGER,
-                user_id INTEGER,
-                user_name TEXT,
-                PRIMARY KEY (event_id, user_id)
-            )
-        """)
         # Вставляем тестовые данные
         conn.execute("DELETE FROM events")
         conn.execute("""
@@ -643,7 +640,8 @@ async def test_update_event_message(mock_update, mock_context, test_databases):
             event_id=1,
             context=mock_context,
             chat_id=456,
-            message_id=789
+            message_id=789,
+            event=ANY
         )
 
 
@@ -1,5 +1,4 @@
 import asyncio
-import sqlite3
 from unittest.mock import patch, MagicMock, AsyncMock
 
 import pytest
@@ -8,13 +7,14 @@ from telegram.ext import CallbackContext
 
 from src.buttons.create_event_button import create_event_button
 from src.logger import logger
+from tests.conftest import connect_db
 
 
 async def test_create_event_flow(app, mock_callback_query, mock_context, test_databases, draft_operations):
     drafts_db_path = test_databases["drafts_db"]
 
     # Очистка таблицы drafts перед тестом
-    with sqlite3.connect(drafts_db_path) as conn:
+    with connect_db(drafts_db_path) as conn:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM drafts")  # Очистить таблицу drafts
         conn.commit()
@@ -37,7 +37,7 @@ async def test_create_event_flow(app, mock_callback_query, mock_context, test_da
     await create_event_button(update, context)
 
     # Логируем состояние базы данных после вызова
-    with sqlite3.connect(drafts_db_path) as conn:
+    with connect_db(drafts_db_path) as conn:
         drafts = conn.execute("SELECT * FROM drafts").fetchall()
         logger.info(f"Черновики в базе данных после выполнения функции: {drafts}")
 
@@ -0,0 +1,61 @@
+
+from src.database.db_operations import (
+    ARCHIVE_REASON_DELETED,
+    add_event,
+    add_participant,
+    add_scheduled_job,
+    add_to_reserve,
+    archive_event,
+    archive_expired_events,
+    get_archived_event,
+    get_event,
+)
+from tests.conftest import connect_db
+
+
+def _count(db_path, table, event_id):
+    column = "id" if table in ("events", "events_archive") else "event_id"
+    with connect_db(db_path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table} WHERE {column} = ?", (event_id,)).fetchone()[0]
+
+
+def test_archive_event_moves_event_and_roster(test_databases):
+    """Мероприятие со списками и задачами переносится в архив и удаляется из рабочих таблиц"""
+    db_path = test_databases["main_db"]
+    event_id = add_event(db_path, "Мероприятие", "01.01.2030", "12:00", 1, 123, 456, 789)
+    add_participant(db_path, event_id, 1, "Участник")
+    add_to_reserve(db_path, event_id, 2, "Резервист")
+    add_scheduled_job(db_path, event_id, "job", 456, "2030-01-01T12:00:00", "unpin_delete")
+
+    assert archive_event(db_path, event_id, ARCHIVE_REASON_DELETED)
+
+    assert get_event(db_path, event_id) is None
+    assert _count(db_path, "participation", event_id) == 0
+    assert _count(db_path, "scheduled_jobs", event_id) == 0
+
+    archived = get_archived_event(db_path, event_id)
+    assert archived["description"] == "Мероприятие"
+    assert [p["user_id"] for p in archived["participants"]] == [1]
+    assert [p["user_id"] for p in archived["reserve"]] == [2]
+    with connect_db(db_path) as conn:
+        assert conn.execute("SELECT reason FROM events_archive WHERE id = ?", (event_id,)).fetchone()[0] == "deleted"
+
+
+def test_archive_missing_event(test_databases):
+    """Архивация несуществующего мероприятия ничего не делает"""
+    assert not archive_event(test_databases["main_db"], 999999)
+
+
+def test_archive_expired_events_in_batches(test_databases):
+    """Прошедшие мероприятия переносятся пачками, будущие остаются"""
+    db_path = test_databases["main_db"]
+    past = [add_event(db_path, f"Прошло {i}", "01.01.2020", "12:00", None, 123, 456, None) for i in range(3)]
+    future = add_event(db_path, "Будет", "01.01.2030", "12:00", None, 123, 456, None)
+    before_ts = 1700000000
+
+    assert archive_expired_events(db_path, before_ts, 2) == 2
+    assert archive_expired_events(db_path, before_ts, 2) == 1
+    assert archive_expired_events(db_path, before_ts, 2) == 0
+
+    assert all(_count(db_path, "events_archive", event_id) == 1 for event_id in past)
+    assert get_event(db_path, future) is not None
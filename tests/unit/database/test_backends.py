@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from src.database.connection import SQLiteFileBackend, SQLiteMemoryBackend, get_backend, set_backend
+from src.database.db_draft_operations import add_draft, get_draft
+from src.database.db_operations import add_event, create_event_from_draft, get_event, join_event
+from src.database.draft_store import reset_draft_stores
+from src.database.event_cache import clear_event_cache
+from src.database.init_database import init_db
+from src.database.init_draft_database import init_drafts_db
+
+
+@pytest.fixture(params=[SQLiteFileBackend, SQLiteMemoryBackend], ids=["file", "memory"])
+def backend(request):
+    """Переключает хранилище на время теста: сценарий проверяется на каждом хранилище"""
+    backend = request.param()
+    previous = set_backend(backend)
+    reset_draft_stores()
+    clear_event_cache()
+    yield backend
+    set_backend(previous)
+    backend.reset()
+    reset_draft_stores()
+    clear_event_cache()
+
+
+def test_workload_runs_on_every_backend(backend, tmp_path):
+    """Один и тот же сценарий работает в каждом хранилище; хранилище в памяти не создаёт файлов"""
+    main_db, drafts_db = str(tmp_path / "main.db"), str(tmp_path / "drafts.db")
+    init_db(main_db)
+    init_drafts_db(drafts_db)
+
+    event_id = add_event(main_db, "Мероприятие", "01.01.2030", "12:00", 1, 123, 456, None)
+    join_event(main_db, event_id, 1, "Первый")
+    join_event(main_db, event_id, 2, "Второй")
+
+    event = get_event(main_db, event_id)
+    assert [p.user_id for p in event.participants] == [1]
+    assert [p.user_id for p in event.reserve] == [2]
+
+    draft_id = add_draft(drafts_db, creator_id=123, chat_id=456, status="AWAIT_LIMIT")
+    promoted_id = create_event_from_draft(
+        main_db, drafts_db, draft_id, "Из черновика", "02.01.2030", "12:00", None, 123, 456, None
+    )
+    assert get_event(main_db, promoted_id).description == "Из черновика"
+    assert get_draft(drafts_db, draft_id) is None
+
+    assert get_backend() is backend
+    assert bool(os.listdir(tmp_path)) == (backend.name == "file")
@@ -0,0 +1,38 @@
+import os
+import sqlite3
+import time
+
+from src.database.backup import backup_database
+from src.database.connection import get_connection
+
+
+def test_backup_copies_database_and_rotates(tmp_path):
+    """Копия содержит данные базы, старые копии удаляются"""
+    db_path = str(tmp_path / "events.db")
+    backup_dir = tmp_path / "backups"
+    with get_connection(db_path) as conn:
+        conn.execute("CREATE TABLE data (id INTEGER PRIMARY KEY, payload TEXT)")
+        conn.executemany("INSERT INTO data (payload) VALUES (?)", [("x" * 100,)] * 200)
+
+    for stamp in ("20000101-000000", "20000102-000000"):
+        (backup_dir / f"events-{stamp}.db").parent.mkdir(exist_ok=True)
+        (backup_dir / f"events-{stamp}.db").write_bytes(b"")
+
+    target = backup_database(db_path, str(backup_dir), keep=2, pages=4, step_sleep_ms=0)
+
+    with sqlite3.connect(target) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM data").fetchone()[0] == 200
+    assert sorted(os.listdir(backup_dir)) == ["events-20000102-000000.db", os.path.basename(target)]
+
+
+def test_backup_pauses_between_steps(tmp_path):
+    """Между порциями копирования выдерживается пауза step_sleep_ms"""
+    db_path = str(tmp_path / "events.db")
+    with get_connection(db_path) as conn:
+        conn.execute("CREATE TABLE data (id INTEGER PRIMARY KEY, payload TEXT)")
+        conn.executemany("INSERT INTO data (payload) VALUES (?)", [("x" * 1000,)] * 50)
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+
+    started = time.monotonic()
+    assert backup_database(db_path, str(tmp_path / "backups"), pages=1, step_sleep_ms=20, verify=False)
+    assert time.monotonic() - started >= (page_count - 1) * 0.02
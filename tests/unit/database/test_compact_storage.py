@@ -0,0 +1,71 @@
+
+from src.database.db_operations import add_event, add_participant, get_event, join_event, update_event
+from src.database.init_database import init_db
+from tests.conftest import connect_db
+
+
+def test_names_stored_once_in_users(test_databases):
+    """Имя пользователя хранится в users, списки всех мероприятий показывают последнее имя"""
+    db_path = test_databases["main_db"]
+    first = add_event(db_path, "Первое", "01.01.2030", "12:00", None, 123, 456, None)
+    second = add_event(db_path, "Второе", "02.01.2030", "12:00", None, 123, 456, None)
+    join_event(db_path, first, 1, "Старое имя")
+    add_participant(db_path, second, 1, "Новое имя")
+
+    assert [p.user_name for p in get_event(db_path, first).participants] == ["Новое имя"]
+
+    update_event(db_path, second, [{"user_id": 1, "name": "Новое имя"}, {"user_id": 2, "name": "Второй"}], [], [])
+    with connect_db(db_path) as conn:
+        names = dict(conn.execute("SELECT id, display_name FROM users WHERE id IN (1, 2)").fetchall())
+        created_at = conn.execute("SELECT created_at FROM participation WHERE user_id = 2").fetchone()[0]
+    assert names == {1: "Новое имя", 2: "Второй"}
+    assert isinstance(created_at, int)
+
+
+def test_participation_migrated_to_compact_layout(tmp_path):
+    """Миграция переносит имена в users, время - в Unix-время, таблица становится WITHOUT ROWID"""
+    db_path = tmp_path / "legacy.db"
+    with connect_db(db_path) as conn:
+        conn.execute(
+            """
+            CREATE TABLE events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                description TEXT NOT NULL,
+                date TEXT NOT NULL,
+                time TEXT NOT NULL,
+                participant_limit INTEGER,
+                creator_id INTEGER NOT NULL,
+                chat_id INTEGER,
+                message_id INTEGER,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute("INSERT INTO events VALUES (1, 'A', '05.03.2030', '10:15', NULL, 1, 2, 3, 'x', 'x')")
+        conn.execute(
+            """
+            CREATE TABLE participants (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                user_name TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute("INSERT INTO participants (event_id, user_id, user_name, created_at, updated_at) "
+                     "VALUES (1, 7, 'Седьмой', '2024-05-01 10:00:00', '2024-05-01 10:00:00')")
+
+    init_db(db_path)
+
+    with connect_db(db_path) as conn:
+        sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'participation'").fetchone()[0]
+        created_at, = conn.execute("SELECT created_at FROM participation WHERE user_id = 7").fetchone()
+        counters = conn.execute("SELECT participants_count FROM events WHERE id = 1").fetchone()[0]
+
+    assert "WITHOUT ROWID" in sql and "user_name" not in sql
+    assert isinstance(created_at, int) and created_at > 0
+    assert counters == 1
+    assert [p.user_name for p in get_event(db_path, 1).participants] == ["Седьмой"]
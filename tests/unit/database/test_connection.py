@@ -0,0 +1,88 @@
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from config import DB_MMAP_SIZE_MB
+from src.database import connection
+from src.database.connection import get_connection, close_all_connections, get_read_connection, read_snapshot
+from src.database.db_operations import (
+    add_event,
+    get_participants,
+    get_participants_count,
+    get_user_status,
+    join_event,
+)
+from tests.conftest import requires_file_backend
+
+
+def test_connection_is_reused(test_databases):
+    """Повторные обращения к одной БД возвращают одно и то же соединение"""
+    first = get_connection(test_databases["main_db"])
+    second = get_connection(test_databases["main_db"])
+    assert first is second
+
+
+@requires_file_backend
+def test_connection_pragmas(test_databases):
+    """Соединение настроено на WAL и synchronous=NORMAL"""
+    conn = get_connection(test_databases["main_db"])
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+
+def test_close_all_connections(test_databases):
+    """После закрытия открывается новое соединение"""
+    first = get_connection(test_databases["main_db"])
+    close_all_connections()
+    second = get_connection(test_databases["main_db"])
+    assert first is not second
+    assert second.execute("SELECT 1").fetchone()[0] == 1
+
+
+@requires_file_backend
+def test_read_connection_is_read_only(test_databases):
+    """Соединение для чтения отдельное, не может писать и отображает файл в память"""
+    db_path = test_databases["main_db"]
+    reader = get_read_connection(db_path)
+    assert reader is not get_connection(db_path)
+    assert reader.execute("PRAGMA query_only").fetchone()[0] == 1
+    assert reader.execute("PRAGMA mmap_size").fetchone()[0] == DB_MMAP_SIZE_MB * 1024 * 1024
+    with pytest.raises(sqlite3.OperationalError):
+        reader.execute("DELETE FROM events")
+
+
+@requires_file_backend
+def test_read_snapshot_does_not_wait_for_writer(test_databases):
+    """Читатель видит зафиксированные данные, пока писатель держит блокировку записи"""
+    db_path = test_databases["main_db"]
+    writer = get_connection(db_path)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        writer.execute(
+            "INSERT INTO events (description, date, time, creator_id, created_at, updated_at) "
+            "VALUES ('Черновик', '01.01.2030', '12:00', 1, 'x', 'x')"
+        )
+        with read_snapshot(db_path) as reader:
+            assert reader.execute("SELECT COUNT(*) FROM events").fetchone()[0] == 0
+    finally:
+        writer.rollback()
+
+
+@requires_file_backend
+def test_roster_reads_use_read_connection(test_databases):
+    """Чтение списков и счётчиков не открывает соединение писателя"""
+    db_path = test_databases["main_db"]
+    event_id = add_event(db_path, "Мероприятие", "01.01.2030", "12:00", None, 123, 456, None)
+    join_event(db_path, event_id, 1, "Участник")
+
+    def read_in_new_thread():
+        assert get_participants_count(db_path, event_id) == 1
+        assert get_user_status(db_path, event_id, 1) == "participant"
+        assert [p.user_id for p in get_participants(db_path, event_id)] == [1]
+        return list(connection._local.connections)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        opened = executor.submit(read_in_new_thread).result()
+    assert opened == [(os.path.abspath(db_path), "read")]
@@ -0,0 +1,41 @@
+
+from src.database.db_draft_operations import add_draft, get_draft
+from src.database.db_operations import create_event_from_draft, get_event
+from tests.conftest import connect_db
+
+
+def _count(db_path, table, draft_id=None):
+    with connect_db(db_path) as conn:
+        if draft_id is None:
+            return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        return conn.execute(f"SELECT COUNT(*) FROM {table} WHERE id = ?", (draft_id,)).fetchone()[0]
+
+
+def test_event_created_and_draft_removed(test_databases):
+    """Мероприятие создаётся, черновик удаляется из БД и из памяти"""
+    main_db, drafts_db = test_databases["main_db"], test_databases["drafts_db"]
+    draft_id = add_draft(drafts_db, creator_id=123, chat_id=456, status="AWAIT_LIMIT")
+
+    event_id = create_event_from_draft(
+        main_db, drafts_db, draft_id, "Мероприятие", "01.01.2030", "12:00", 5, 123, 456, 789
+    )
+
+    assert get_event(main_db, event_id)["participant_limit"] == 5
+    assert get_draft(drafts_db, draft_id) is None
+    assert _count(drafts_db, "drafts", draft_id) == 0
+
+
+def test_failure_rolls_back_both_databases(test_databases):
+    """Ошибка при создании мероприятия не удаляет черновик"""
+    main_db, drafts_db = test_databases["main_db"], test_databases["drafts_db"]
+    draft_id = add_draft(drafts_db, creator_id=123, chat_id=456, status="AWAIT_LIMIT")
+
+    # description NOT NULL - вставка мероприятия завершится ошибкой
+    event_id = create_event_from_draft(
+        main_db, drafts_db, draft_id, None, "01.01.2030", "12:00", 5, 123, 456, 789
+    )
+
+    assert event_id is None
+    assert _count(main_db, "events") == 0
+    assert get_draft(drafts_db, draft_id) is not None
+    assert _count(drafts_db, "drafts", draft_id) == 1
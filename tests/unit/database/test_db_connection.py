@@ -1,12 +1,12 @@
-import sqlite3
 
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text  # Добавляем импорт text
+from tests.conftest import connect_db
 
 def test_db_connection(test_databases):
     """Тест проверяет работоспособность подключения к БД"""
-    with sqlite3.connect(test_databases["main_db"]) as conn:
+    with connect_db(test_databases["main_db"]) as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT 1")
         result = cursor.fetchone()[0]
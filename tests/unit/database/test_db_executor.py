@@ -0,0 +1,84 @@
+import sqlite3
+import threading
+
+import pytest
+
+from src.database import db_draft_operations, db_executor
+from src.database.db_draft_operations import add_draft, get_draft
+from src.database.db_executor import get_lock_stats, run_db
+from src.database.db_operations import get_event, join_event
+from tests.conftest import connect_db
+
+
+async def test_run_db_uses_db_thread(test_databases):
+    """Запросы выполняются вне потока событийного цикла, результат возвращается вызывающему"""
+    thread_name = await run_db(lambda: threading.current_thread().name)
+    assert thread_name != threading.current_thread().name
+
+    with connect_db(test_databases["main_db"]) as conn:
+        conn.execute(
+            "INSERT INTO events (id, description, date, time, creator_id, created_at, updated_at) "
+            "VALUES (1, 'Test Event', '01.01.2030', '12:00', 123, 'x', 'x')"
+        )
+
+    await run_db(join_event, test_databases["main_db"], 1, 42, "Участник")
+    event = await run_db(get_event, test_databases["main_db"], 1)
+    assert 42 in [u["user_id"] for u in event["participants"]]
+
+
+async def test_run_db_propagates_errors():
+    """Исключение из функции пробрасывается в корутину"""
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await run_db(fail)
+
+
+async def test_run_db_retries_lock_errors(monkeypatch):
+    """Блокировка БД повторяется с задержкой и учитывается в счётчиках"""
+    monkeypatch.setattr(db_executor, "DB_LOCK_RETRY_BASE_MS", 1)
+    get_lock_stats(reset=True)
+    attempts = []
+
+    def locked_once():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return "ok"
+
+    assert await run_db(locked_once) == "ok"
+    stats = get_lock_stats(reset=True)
+    assert stats["lock_errors"] == 1 and stats["retries"] == 1 and "failures" not in stats
+
+
+async def test_add_draft_retried_on_lock(monkeypatch, test_databases):
+    """add_draft не скрывает блокировку за None: run_db повторяет вызов и черновик создаётся"""
+    monkeypatch.setattr(db_executor, "DB_LOCK_RETRY_BASE_MS", 1)
+    connect = db_draft_operations.get_db_connection
+    attempts = []
+
+    def locked_once(db_path):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return connect(db_path)
+
+    monkeypatch.setattr(db_draft_operations, "get_db_connection", locked_once)
+    draft_id = await run_db(add_draft, test_databases["drafts_db"], creator_id=1, chat_id=2, status="AWAIT_DATE")
+    assert draft_id is not None and len(attempts) == 2
+    assert get_draft(test_databases["drafts_db"], draft_id) is not None
+
+
+async def test_run_db_gives_up_after_retries(monkeypatch):
+    """После всех повторов ошибка блокировки пробрасывается"""
+    monkeypatch.setattr(db_executor, "DB_LOCK_RETRIES", 1)
+    monkeypatch.setattr(db_executor, "DB_LOCK_RETRY_BASE_MS", 1)
+    get_lock_stats(reset=True)
+
+    def always_locked():
+        raise sqlite3.OperationalError("database is locked")
+
+    with pytest.raises(sqlite3.OperationalError):
+        await run_db(always_locked)
+    assert get_lock_stats(reset=True)["failures"] == 1
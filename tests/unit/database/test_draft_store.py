@@ -0,0 +1,68 @@
+
+from src.database.db_draft_operations import (
+    add_draft,
+    delete_draft,
+    delete_expired_drafts,
+    get_draft,
+    get_user_chat_draft,
+    update_draft,
+)
+from src.database.draft_store import flush_all_drafts, get_draft_store, reset_draft_stores
+from tests.conftest import connect_db
+
+
+def _db_status(db_path, draft_id):
+    with connect_db(db_path) as conn:
+        row = conn.execute("SELECT status FROM drafts WHERE id = ?", (draft_id,)).fetchone()
+    return row[0] if row else None
+
+
+def test_updates_are_written_behind(test_databases):
+    """Изменения видны сразу из памяти, а в БД попадают при сбросе"""
+    db_path = test_databases["drafts_db"]
+    draft_id = add_draft(db_path, creator_id=1, chat_id=2, status="AWAIT_DESCRIPTION")
+    assert _db_status(db_path, draft_id) == "AWAIT_DESCRIPTION"
+
+    update_draft(db_path, draft_id, status="AWAIT_DATE", description="Описание")
+
+    assert get_draft(db_path, draft_id)["status"] == "AWAIT_DATE"
+    assert get_user_chat_draft(db_path, 1, 2)["description"] == "Описание"
+    assert _db_status(db_path, draft_id) == "AWAIT_DESCRIPTION"
+
+    assert flush_all_drafts() == 1
+    assert _db_status(db_path, draft_id) == "AWAIT_DATE"
+
+
+def test_drafts_survive_restart(test_databases):
+    """После сброса черновики загружаются из БД, удалённые не возвращаются"""
+    db_path = test_databases["drafts_db"]
+    first = add_draft(db_path, creator_id=1, chat_id=2, status="AWAIT_DESCRIPTION")
+    second = add_draft(db_path, creator_id=1, chat_id=2, status="AWAIT_TIME", is_from_template=True)
+    update_draft(db_path, second, time="18:00")
+    delete_draft(db_path, first)
+    flush_all_drafts()
+
+    reset_draft_stores()
+
+    assert get_draft(db_path, first) is None
+    draft = get_user_chat_draft(db_path, 1, 2)
+    assert draft["id"] == second
+    assert draft["time"] == "18:00"
+    assert draft["is_from_template"] is True
+
+
+def test_expired_drafts_are_ignored_and_swept(test_databases):
+    """Просроченный черновик не возвращается пользователю и удаляется очисткой"""
+    db_path = test_databases["drafts_db"]
+    stale = add_draft(db_path, creator_id=1, chat_id=2, status="AWAIT_DATE", bot_message_id=10)
+    fresh = add_draft(db_path, creator_id=3, chat_id=2, status="AWAIT_DATE")
+    get_draft_store(db_path).update(stale, {"updated_at": "2000-01-01 00:00:00"})
+
+    assert get_user_chat_draft(db_path, 1, 2) is None
+
+    expired = delete_expired_drafts(db_path, ttl_minutes=60)
+
+    assert [(draft.id, draft.bot_message_id) for draft in expired] == [(stale, 10)]
+    assert get_draft(db_path, stale) is None
+    assert _db_status(db_path, stale) is None
+    assert get_user_chat_draft(db_path, 3, 2).id == fresh
@@ -0,0 +1,148 @@
+import pytest
+
+from src.database.connection import immediate_transaction
+from src.database.db_operations import (
+    add_event,
+    apply_join_event,
+    archive_event,
+    get_event,
+    get_event_header,
+    join_event,
+    update_event_field,
+    update_message_id,
+)
+from src.database.event_cache import EventCache, event_cache, get_event_cache_stats
+from src.database.models import Event
+
+
+def _event(event_id, version=0):
+    return Event(event_id, "Мероприятие", "01.01.2030", "12:00", None, None, 1, 2, None, version=version)
+
+
+def test_get_event_served_from_cache_and_invalidated(test_databases):
+    """Повторное чтение идёт из кэша, изменения сбрасывают запись"""
+    db_path = test_databases["main_db"]
+    event_id = add_event(db_path, "Мероприятие", "01.01.2030", "12:00", None, 123, 456, None)
+    get_event_cache_stats(reset=True)
+
+    first = get_event(db_path, event_id)
+    first.participants.append("чужое изменение")
+    assert get_event(db_path, event_id).participants == []
+    assert get_event_cache_stats()["hits"] == 1
+
+    join_event(db_path, event_id, 1, "Участник")
+    assert [p.user_id for p in get_event(db_path, event_id).participants] == [1]
+
+    update_event_field(db_path, event_id, "description", "Новое описание")
+    assert get_event(db_path, event_id).description == "Новое описание"
+
+    archive_event(db_path, event_id)
+    assert get_event(db_path, event_id) is None
+
+
+def test_get_event_inside_write_transaction_reads_through_writer(test_databases):
+    """Внутри транзакции записи get_event видит её незафиксированные изменения, а не кэш или снимок"""
+    db_path = test_databases["main_db"]
+    event_id = add_event(db_path, "Мероприятие", "01.01.2030", "12:00", None, 123, 456, None)
+    get_event(db_path, event_id)
+
+    with immediate_transaction(db_path) as conn:
+        conn.execute("UPDATE events SET description = 'В транзакции' WHERE id = ?", (event_id,))
+        assert get_event(db_path, event_id).description == "В транзакции"
+        conn.rollback()
+
+
+def test_snapshot_older_than_write_is_not_cached():
+    """Снимок, прочитанный до фиксации изменения, в кэш не попадает"""
+    cache = EventCache(max_size=10, ttl=60)
+    cache.invalidate(1, min_version=3)
+
+    cache.put("db", _event(1, version=2))
+    assert cache.get("db", 1) is None
+
+    cache.put("db", _event(1, version=3))
+    assert cache.get("db", 1).version == 3
+    assert cache.stats()["rejected"] == 1
+
+
+def test_lru_and_ttl_bounds():
+    """Кэш вытесняет давно не читавшиеся записи и не отдаёт устаревшие"""
+    cache = EventCache(max_size=2, ttl=60)
+    for event_id in (1, 2):
+        cache.put("db", _event(event_id))
+    cache.get("db", 1)
+    cache.put("db", _event(3))
+
+    assert cache.get("db", 2) is None
+    assert cache.get("db", 1) is not None and cache.get("db", 3) is not None
+    assert cache.get("other.db", 1) is None
+
+    expired = EventCache(max_size=2, ttl=-1)
+    expired.put("db", _event(1))
+    assert expired.get("db", 1) is None
+    assert expired.stats()["expired"] == 1
+
+
+def test_event_header_without_rosters(test_databases):
+    """Заголовок для проверки прав читается без списков и отражает изменения"""
+    db_path = test_databases["main_db"]
+    event_id = add_event(db_path, "Мероприятие", "01.01.2030", "12:00", None, 123, 456, None)
+    join_event(db_path, event_id, 1, "Участник")
+
+    header = get_event_header(db_path, event_id)
+    assert (header.creator_id, header.chat_id, header.message_id) == (123, 456, None)
+    assert "participants" not in header
+
+    get_event(db_path, event_id)
+    update_message_id(db_path, event_id, 789)
+    assert get_event_header(db_path, event_id).message_id == 789
+    assert get_event_header(db_path, 999999) is None
+
+
+def test_rolled_back_change_does_not_block_caching(test_databases):
+    """Откаченное изменение не сбрасывает кэш и не мешает кэшировать мероприятие"""
+    db_path = test_databases["main_db"]
+    event_id = add_event(db_path, "Мероприятие", "01.01.2030", "12:00", None, 123, 456, None)
+
+    with pytest.raises(RuntimeError):
+        with immediate_transaction(db_path) as conn:
+            apply_join_event(conn.cursor(), event_id, 1, "Участник")
+            raise RuntimeError("откат")
+    get_event_cache_stats(reset=True)
+
+    get_event(db_path, event_id)
+    get_event(db_path, event_id)
+    stats = get_event_cache_stats()
+    assert stats.get("rejected", 0) == 0 and stats["hits"] == 1
+
+
+def test_renamed_user_invalidates_cached_events(test_databases):
+    """Новое имя пользователя видно в кэшированных мероприятиях, где он записан"""
+    db_path = test_databases["main_db"]
+    first = add_event(db_path, "Первое", "01.01.2030", "12:00", None, 123, 456, None)
+    second = add_event(db_path, "Второе", "01.01.2030", "12:00", None, 123, 456, None)
+    join_event(db_path, first, 1, "Старое имя")
+    assert get_event(db_path, first).participants[0].name == "Старое имя"
+
+    join_event(db_path, second, 1, "Новое имя")
+    assert get_event(db_path, first).participants[0].name == "Новое имя"
+
+
+def test_peek_counts_misses():
+    """Промах заголовка учитывается так же, как промах get"""
+    cache = EventCache(max_size=10, ttl=60)
+    assert cache.peek("db", 1) is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_snapshot_before_rename_is_not_cached(test_databases):
+    """Снимок со старым именем, прочитанный до фиксации переименования, в кэш не возвращается"""
+    db_path = test_databases["main_db"]
+    first = add_event(db_path, "Первое", "01.01.2030", "12:00", None, 123, 456, None)
+    second = add_event(db_path, "Второе", "01.01.2030", "12:00", None, 123, 456, None)
+    join_event(db_path, first, 1, "Старое имя")
+    stale = get_event(db_path, first)
+
+    join_event(db_path, second, 1, "Новое имя")
+    event_cache.put(db_path, stale)
+    assert get_event(db_path, first).participants[0].name == "Новое имя"
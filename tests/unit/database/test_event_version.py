@@ -0,0 +1,78 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.database.db_operations import (
+    add_event,
+    get_event,
+    join_event,
+    update_event,
+    update_event_field,
+)
+from src.database.models import Draft
+from src.event.edit.update_event_field import update_event_field as edit_event_field
+
+
+def _add(db_path):
+    return add_event(db_path, "Мероприятие", "01.01.2030", "12:00", None, 123, 456, None)
+
+
+def test_mutations_increment_version(test_databases):
+    """Изменение полей и списков увеличивает версию"""
+    db_path = test_databases["main_db"]
+    event_id = _add(db_path)
+    assert get_event(db_path, event_id).version == 0
+
+    join_event(db_path, event_id, 1, "Участник")
+    update_event_field(db_path, event_id, "description", "Новое описание")
+
+    assert get_event(db_path, event_id).version == 2
+
+
+def test_stale_writer_is_rejected(test_databases):
+    """Запись по устаревшей версии не затирает чужие изменения"""
+    db_path = test_databases["main_db"]
+    event_id = _add(db_path)
+    stale = get_event(db_path, event_id)
+    join_event(db_path, event_id, 1, "Участник")
+
+    assert not update_event(db_path, event_id, [], [], [], expected_version=stale.version)
+    assert not update_event_field(db_path, event_id, "participant_limit", 5, expected_version=stale.version)
+
+    event = get_event(db_path, event_id)
+    assert [p.user_id for p in event.participants] == [1]
+    assert event.participant_limit is None
+
+
+async def test_edit_saved_despite_join_since_edit_started(test_databases):
+    """Запись в список участников после начала редактирования не мешает сохранить поле"""
+    db_path = test_databases["main_db"]
+    event_id = _add(db_path)
+    draft = Draft(1, 123, 456, "EDIT_description", description="Мероприятие", event_id=event_id,
+                  original_message_id=10)
+    join_event(db_path, event_id, 1, "Участник")
+
+    context = MagicMock()
+    context.bot_data = {"db_path": db_path}
+    context.bot.send_message = AsyncMock()
+    with patch("src.event.edit.update_event_field.finalize_edit", new_callable=AsyncMock):
+        await edit_event_field(context, draft, "description", "Новое описание")
+
+    assert get_event(db_path, event_id).description == "Новое описание"
+    context.bot.send_message.assert_not_awaited()
+
+
+async def test_edit_rejected_if_field_changed_since_edit_started(test_databases):
+    """Правка поля, которое успели изменить после начала редактирования, не сохраняется"""
+    db_path = test_databases["main_db"]
+    event_id = _add(db_path)
+    draft = Draft(1, 123, 456, "EDIT_limit", event_id=event_id, original_message_id=10)
+    update_event_field(db_path, event_id, "participant_limit", 3)
+
+    context = MagicMock()
+    context.bot_data = {"db_path": db_path}
+    context.bot.send_message = AsyncMock()
+    with patch("src.event.edit.update_event_field.finalize_edit", new_callable=AsyncMock) as finalize:
+        await edit_event_field(context, draft, "participant_limit", 1)
+
+    assert get_event(db_path, event_id).participant_limit == 3
+    context.bot.send_message.assert_awaited_once()
+    finalize.assert_awaited_once_with(context, draft)
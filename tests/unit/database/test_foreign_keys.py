@@ -0,0 +1,65 @@
+
+from src.database.connection import get_connection
+from src.database.db_operations import (
+    add_event,
+    add_participant,
+    add_template,
+    delete_event,
+    get_user_templates,
+    save_user,
+)
+from src.database.maintenance import sweep_orphans
+from tests.conftest import connect_db
+
+
+def _count(db_path, table):
+    with connect_db(db_path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_delete_event_cascades(test_databases):
+    """Удаление мероприятия каскадно удаляет его списки"""
+    db_path = test_databases["main_db"]
+    event_id = add_event(db_path, "Мероприятие", "01.01.2030", "12:00", None, 123, 456, None)
+    add_participant(db_path, event_id, 1, "Участник")
+
+    delete_event(db_path, event_id)
+
+    assert _count(db_path, "participation") == 0
+
+
+def test_save_user_keeps_templates(test_databases):
+    """Обновление данных пользователя не удаляет его шаблоны"""
+    db_path = test_databases["main_db"]
+    add_template(db_path, 77, "Шаблон", "Описание", None, "12:00", None)
+
+    save_user(db_path, 77, "Имя", "Фамилия", "login")
+
+    assert len(get_user_templates(db_path, 77)) == 1
+    with connect_db(db_path) as conn:
+        assert conn.execute("SELECT first_name FROM users WHERE id = 77").fetchone()[0] == "Имя"
+        conn.execute("DELETE FROM event_templates")
+
+
+def test_sweep_orphans(test_databases):
+    """Строки без мероприятия удаляются очисткой"""
+    db_path = test_databases["main_db"]
+    event_id = add_event(db_path, "Мероприятие", "01.01.2030", "12:00", None, 123, 456, None)
+    add_participant(db_path, event_id, 1, "Участник")
+    # Осиротевшие строки, как в БД, работавших без PRAGMA foreign_keys
+    with connect_db(db_path) as conn:
+        conn.execute(
+            "INSERT INTO participation (event_id, user_id, status, position, created_at, updated_at) "
+            "VALUES (999999, 2, 'participant', 1, 0, 0)"
+        )
+
+    stats = sweep_orphans(db_path)
+
+    assert stats["participation"] == 1 and stats["scheduled_jobs"] == 0
+    assert _count(db_path, "participation") == 1
+
+
+def test_drafts_have_no_cross_database_foreign_key(test_databases):
+    """В таблице drafts нет внешнего ключа на events из другой БД"""
+    conn = get_connection(test_databases["drafts_db"])
+    assert conn.execute("PRAGMA foreign_key_list(drafts)").fetchall() == []
@@ -0,0 +1,45 @@
+
+from src.database.connection import get_connection
+from src.database.init_database import init_db
+from src.database.maintenance import AUTO_VACUUM_INCREMENTAL, run_maintenance
+from tests.conftest import connect_db
+
+
+def _auto_vacuum(db_path):
+    return get_connection(db_path).execute("PRAGMA auto_vacuum").fetchone()[0]
+
+
+def _fill(db_path):
+    with get_connection(db_path) as conn:
+        conn.execute("CREATE TABLE data (id INTEGER PRIMARY KEY, payload TEXT)")
+        conn.executemany("INSERT INTO data (payload) VALUES (?)", [("x" * 1000,)] * 500)
+
+
+def test_existing_database_rebuilt_only_on_request(tmp_path):
+    """Периодическое обслуживание не перестраивает базу с данными, разовое перестроение - по запросу"""
+    db_path = str(tmp_path / "maintenance.db")
+    _fill(db_path)
+
+    assert run_maintenance(db_path, rebuild=False) is not None
+    assert _auto_vacuum(db_path) != AUTO_VACUUM_INCREMENTAL
+
+    assert run_maintenance(db_path, rebuild=True) is not None
+    assert _auto_vacuum(db_path) == AUTO_VACUUM_INCREMENTAL
+
+
+def test_maintenance_reclaims_free_pages(tmp_path):
+    """Новая база создаётся с incremental vacuum, обслуживание возвращает свободные страницы"""
+    db_path = str(tmp_path / "maintenance.db")
+    init_db(db_path)
+    _fill(db_path)
+    assert _auto_vacuum(db_path) == AUTO_VACUUM_INCREMENTAL
+
+    with get_connection(db_path) as conn:
+        conn.execute("DELETE FROM data")
+    stats = run_maintenance(db_path)
+
+    assert stats["freed_pages"] > 0
+    assert stats["size_after"] < stats["size_before"]
+    assert not stats["checkpoint_busy"]
+    with connect_db(db_path) as conn:
+        assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
@@ -0,0 +1,90 @@
+import sqlite3
+
+import pytest
+
+from src.database.init_database import MIGRATIONS, init_db
+from src.database.init_draft_database import DRAFT_MIGRATIONS, init_drafts_db
+from src.database.migrations import apply_migrations, get_schema_version
+from tests.conftest import connect_db
+
+
+def _indexes(db_path, table):
+    with connect_db(db_path) as conn:
+        return {row[1] for row in conn.execute(f"PRAGMA index_list({table})")}
+
+
+def test_new_databases_get_latest_version(tmp_path):
+    """Новые БД создаются сразу с последней версией схемы и всеми индексами"""
+    main_db = tmp_path / "main.db"
+    draft_db = tmp_path / "draft.db"
+
+    init_db(main_db)
+    init_drafts_db(draft_db)
+    # Повторная инициализация ничего не меняет
+    init_db(main_db)
+
+    with connect_db(main_db) as conn:
+        assert get_schema_version(conn) == MIGRATIONS[-1][0]
+        assert conn.execute("SELECT COUNT(*) FROM schema_version").fetchone()[0] == len(MIGRATIONS)
+    with connect_db(draft_db) as conn:
+        assert get_schema_version(conn) == DRAFT_MIGRATIONS[-1][0]
+
+    assert "idx_participation_user" in _indexes(main_db, "participation")
+    assert "idx_scheduled_jobs_event" in _indexes(main_db, "scheduled_jobs")
+    assert "idx_drafts_creator_chat" in _indexes(draft_db, "drafts")
+
+
+def test_old_drafts_table_upgraded_in_place(tmp_path):
+    """Существующая таблица drafts без новых столбцов дополняется, данные сохраняются"""
+    draft_db = tmp_path / "draft.db"
+    with connect_db(draft_db) as conn:
+        conn.execute(
+            """
+            CREATE TABLE drafts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                creator_id INTEGER NOT NULL,
+                chat_id INTEGER NOT NULL,
+                message_id INTEGER,
+                status TEXT NOT NULL,
+                description TEXT,
+                date TEXT,
+                time TEXT,
+                participant_limit INTEGER,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute("INSERT INTO drafts (creator_id, chat_id, status, created_at, updated_at) "
+                     "VALUES (1, 2, 'AWAIT_DESCRIPTION', 'x', 'x')")
+
+    init_drafts_db(draft_db)
+
+    with connect_db(draft_db) as conn:
+        conn.row_factory = sqlite3.Row
+        row = conn.execute("SELECT * FROM drafts").fetchone()
+
+    assert row["creator_id"] == 1
+    assert row["bot_message_id"] is None
+    assert row["is_from_template"] == 0
+
+
+def test_failed_migration_rolls_back(tmp_path):
+    """Ошибка в миграции откатывает её изменения, версия схемы не повышается"""
+    def broken(cursor):
+        cursor.execute("CREATE TABLE half_done (id INTEGER)")
+        raise sqlite3.OperationalError("boom")
+
+    conn = sqlite3.connect(tmp_path / "broken.db")
+    migrations = [
+        (1, "ok", lambda cursor: cursor.execute("CREATE TABLE ok (id INTEGER)")),
+        (2, "broken", broken),
+    ]
+
+    with pytest.raises(sqlite3.OperationalError):
+        apply_migrations(conn, migrations, "test")
+
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert get_schema_version(conn) == 1
+    assert "ok" in tables and "half_done" not in tables
+    conn.close()
@@ -0,0 +1,44 @@
+
+import pytest
+
+from src.database.db_operations import add_participant, get_all_events, get_event
+from src.database.models import Draft, Event
+from tests.conftest import connect_db
+
+
+def _insert_event(db_path):
+    with connect_db(db_path) as conn:
+        conn.execute(
+            "INSERT INTO events (id, description, date, time, creator_id, chat_id, created_at, updated_at) "
+            "VALUES (1, 'Test Event', '01.01.2030', '12:00', 123, 456, 'x', 'x')"
+        )
+
+
+def test_models_support_mapping_access():
+    """Модели читаются и изменяются по ключу, как словари, и не имеют __dict__"""
+    draft = Draft(id=1, creator_id=2, chat_id=3, status="AWAIT_DATE", is_from_template=1)
+
+    assert draft["status"] == "AWAIT_DATE"
+    assert draft.get("missing", "default") == "default"
+    assert "event_id" in draft and "missing" not in draft
+    assert draft["is_from_template"] is True
+    draft["description"] = "Описание"
+    assert dict(draft)["description"] == "Описание"
+    assert not hasattr(draft, "__dict__")
+    with pytest.raises(KeyError):
+        draft["unknown"] = 1
+
+
+def test_event_roster_loaded_lazily(test_databases):
+    """Списки мероприятий из выборок загружаются только при обращении"""
+    db_path = test_databases["main_db"]
+    _insert_event(db_path)
+    add_participant(db_path, 1, 10, "Участник")
+
+    event = get_all_events(db_path)[0]
+    assert isinstance(event, Event)
+    assert event._roster is None
+
+    assert [p["name"] for p in event["participants"]] == ["Участник"]
+    assert event._roster is not None
+    assert get_event(db_path, 1).participants[0].user_id == 10
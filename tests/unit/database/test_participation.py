@@ -0,0 +1,144 @@
+
+from src.database.db_operations import (
+    add_participant,
+    add_to_reserve,
+    add_to_declined,
+    get_event,
+    get_reserve,
+    get_user_status,
+    join_event,
+    leave_event,
+    promote_from_reserve,
+)
+from src.database.init_database import init_db
+from tests.conftest import connect_db
+
+
+def _insert_event(db_path, event_id=1):
+    with connect_db(db_path) as conn:
+        conn.execute("DELETE FROM events")
+        conn.execute(
+            """
+            INSERT INTO events (id, description, date, time, participant_limit,
+                                creator_id, chat_id, message_id, created_at, updated_at)
+            VALUES (?, 'Test Event', '01.01.2030', '12:00', 1, 123, 456, 789, datetime('now'), datetime('now'))
+            """,
+            (event_id,),
+        )
+
+
+def test_roster_in_one_event(test_databases):
+    """Все три списка читаются вместе с мероприятием"""
+    db_path = test_databases["main_db"]
+    _insert_event(db_path)
+    add_participant(db_path, 1, 1, "Первый")
+    add_to_reserve(db_path, 1, 2, "Второй")
+    add_to_declined(db_path, 1, 3, "Третий")
+
+    event = get_event(db_path, 1)
+    assert [u["user_id"] for u in event["participants"]] == [1]
+    assert [u["user_id"] for u in event["reserve"]] == [2]
+    assert [u["user_name"] for u in event["declined"]] == ["Третий"]
+
+
+def test_reserve_queue_order_and_promotion(test_databases):
+    """Резерв упорядочен по позиции, повышение меняет статус одной записи"""
+    db_path = test_databases["main_db"]
+    _insert_event(db_path)
+    add_participant(db_path, 1, 1, "Участник")
+    for user_id in (30, 10, 20):
+        add_to_reserve(db_path, 1, user_id, f"Резерв {user_id}")
+
+    assert [u["user_id"] for u in get_reserve(db_path, 1)] == [30, 10, 20]
+
+    add_to_declined(db_path, 1, 1, "Участник")
+    promoted = promote_from_reserve(db_path, 1)
+
+    assert promoted["user_id"] == 30
+    assert get_user_status(db_path, 1, 30) == "participant"
+    assert get_user_status(db_path, 1, 1) == "declined"
+    assert [u["user_id"] for u in get_reserve(db_path, 1)] == [10, 20]
+
+
+def test_join_event_respects_limit(test_databases):
+    """При лимите 1 второй записавшийся попадает в резерв, повторная запись ничего не меняет"""
+    db_path = test_databases["main_db"]
+    _insert_event(db_path)
+
+    first = join_event(db_path, 1, 1, "Первый")
+    second = join_event(db_path, 1, 2, "Второй")
+    again = join_event(db_path, 1, 2, "Второй")
+
+    assert first["status"] == "participant" and first["changed"]
+    assert second["status"] == "reserve"
+    assert not again["changed"]
+    assert [u["user_id"] for u in again["event"]["reserve"]] == [2]
+    assert join_event(db_path, 999, 1, "Первый") is None
+
+
+def test_leave_event_promotes_reserve(test_databases):
+    """Уход участника повышает первого из резерва в той же транзакции"""
+    db_path = test_databases["main_db"]
+    _insert_event(db_path)
+    join_event(db_path, 1, 1, "Первый")
+    join_event(db_path, 1, 2, "Второй")
+
+    result = leave_event(db_path, 1, 1, "Первый")
+
+    assert result["previous_status"] == "participant"
+    assert result["promoted"] == {"user_id": 2, "user_name": "Второй"}
+    assert [u["user_id"] for u in result["event"]["participants"]] == [2]
+    assert [u["user_id"] for u in result["event"]["declined"]] == [1]
+
+
+def test_legacy_tables_migrated(tmp_path):
+    """Данные из старых таблиц переносятся в participation, старые таблицы удаляются"""
+    db_path = tmp_path / "legacy.db"
+    with connect_db(db_path) as conn:
+        conn.execute(
+            """
+            CREATE TABLE events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                description TEXT NOT NULL,
+                date TEXT NOT NULL,
+                time TEXT NOT NULL,
+                participant_limit INTEGER,
+                creator_id INTEGER NOT NULL,
+                chat_id INTEGER,
+                message_id INTEGER,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute("INSERT INTO events VALUES (1, 'A', '05.03.2030', '10:15', NULL, 1, 2, 3, 'x', 'x')")
+        for table in ("participants", "reserve", "declined"):
+            conn.execute(
+                f"""
+                CREATE TABLE {table} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    event_id INTEGER NOT NULL,
+                    user_id INTEGER NOT NULL,
+                    user_name TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+                """
+            )
+        conn.execute("INSERT INTO participants (event_id, user_id, user_name, created_at, updated_at) "
+                     "VALUES (1, 1, 'A', 'x', 'x')")
+        conn.execute("INSERT INTO reserve (event_id, user_id, user_name, created_at, updated_at) "
+                     "VALUES (1, 3, 'C', 'x', 'x')")
+        conn.execute("INSERT INTO reserve (event_id, user_id, user_name, created_at, updated_at) "
+                     "VALUES (1, 2, 'B', 'x', 'x')")
+
+    init_db(db_path)
+
+    with connect_db(db_path) as conn:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        rows = conn.execute(
+            "SELECT user_id, status FROM participation WHERE event_id = 1 ORDER BY status, position"
+        ).fetchall()
+
+    assert "participants" not in tables and "reserve" not in tables
+    assert rows == [(1, "participant"), (3, "reserve"), (2, "reserve")]
@@ -0,0 +1,62 @@
+
+from src.database.db_operations import (
+    add_event,
+    get_event,
+    get_participants_count,
+    join_event,
+    leave_event,
+    update_event,
+)
+from src.database.event_cache import event_cache
+from src.database.maintenance import check_roster_counters
+from tests.conftest import connect_db
+
+
+def _counts(event):
+    return event.participants_count, event.reserve_count, event.declined_count
+
+
+def test_counters_follow_roster_changes(test_databases):
+    """Счётчики меняются вместе со списками, лимит проверяется по счётчику"""
+    db_path = test_databases["main_db"]
+    event_id = add_event(db_path, "Мероприятие", "01.01.2030", "12:00", 1, 123, 456, None)
+
+    join_event(db_path, event_id, 1, "Первый")
+    assert join_event(db_path, event_id, 2, "Второй")["status"] == "reserve"
+    assert _counts(get_event(db_path, event_id)) == (1, 1, 0)
+
+    # Участник уходит, резерв повышается
+    leave_event(db_path, event_id, 1, "Первый")
+    assert _counts(get_event(db_path, event_id)) == (1, 0, 1)
+    assert get_participants_count(db_path, event_id) == 1
+
+    update_event(db_path, event_id, [], [], [{"user_id": 3, "name": "Третий"}])
+    assert _counts(get_event(db_path, event_id)) == (0, 0, 1)
+
+
+def test_checker_repairs_counters(test_databases):
+    """Проверка находит и исправляет расхождения счётчиков"""
+    db_path = test_databases["main_db"]
+    event_id = add_event(db_path, "Мероприятие", "01.01.2030", "12:00", None, 123, 456, None)
+    join_event(db_path, event_id, 1, "Первый")
+    assert check_roster_counters(db_path) == []
+
+    with connect_db(db_path) as conn:
+        conn.execute("UPDATE events SET participants_count = 5 WHERE id = ?", (event_id,))
+
+    assert check_roster_counters(db_path) == [event_id]
+    assert _counts(get_event(db_path, event_id)) == (1, 0, 0)
+
+
+def test_repaired_counters_not_overwritten_by_stale_snapshot(test_databases):
+    """Снимок со счётчиками до исправления не возвращается в кэш"""
+    db_path = test_databases["main_db"]
+    event_id = add_event(db_path, "Мероприятие", "01.01.2030", "12:00", None, 123, 456, None)
+    join_event(db_path, event_id, 1, "Первый")
+    with connect_db(db_path) as conn:
+        conn.execute("UPDATE events SET participants_count = 5 WHERE id = ?", (event_id,))
+    stale = get_event(db_path, event_id)
+
+    check_roster_counters(db_path)
+    event_cache.put(db_path, stale)
+    assert _counts(get_event(db_path, event_id)) == (1, 0, 0)
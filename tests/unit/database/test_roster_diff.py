@@ -0,0 +1,38 @@
+from src.database.db_operations import add_event, get_event, join_event, update_event
+from tests.conftest import connect_db
+
+
+def _rows(db_path, event_id):
+    with connect_db(db_path) as conn:
+        return {
+            user_id: (status, position, updated_at)
+            for user_id, status, position, updated_at in conn.execute(
+                "SELECT user_id, status, position, updated_at FROM participation WHERE event_id = ?", (event_id,)
+            )
+        }
+
+
+def _users(*ids):
+    return [{"user_id": user_id, "name": f"Пользователь {user_id}"} for user_id in ids]
+
+
+def test_update_event_writes_only_changed_rows(test_databases):
+    """update_event переписывает только изменившиеся строки и сохраняет порядок списков"""
+    db_path = test_databases["main_db"]
+    event_id = add_event(db_path, "Мероприятие", "01.01.2030", "12:00", None, 123, 456, None)
+    for user_id in range(1, 7):
+        join_event(db_path, event_id, user_id, f"Пользователь {user_id}")
+    with connect_db(db_path) as conn:
+        conn.execute("UPDATE participation SET updated_at = 'old' WHERE event_id = ?", (event_id,))
+
+    # Уходит второй, шестой переходит в резерв, добавляется седьмой, третий встаёт в конец
+    assert update_event(db_path, event_id, _users(1, 4, 5, 3, 7), _users(6), [])
+
+    rows = _rows(db_path, event_id)
+    assert 2 not in rows
+    untouched = [user_id for user_id, (_, _, updated_at) in rows.items() if updated_at == "old"]
+    assert sorted(untouched) == [1, 4, 5]
+
+    event = get_event(db_path, event_id)
+    assert [p.user_id for p in event.participants] == [1, 4, 5, 3, 7]
+    assert [p.user_id for p in event.reserve] == [6]
@@ -0,0 +1,112 @@
+
+import threading
+
+import pytest
+
+from src.database.db_operations import (
+    add_event,
+    add_template,
+    apply_join_event,
+    get_event,
+    get_events_by_participant,
+    get_user_templates,
+    join_event,
+)
+from src.database.db_executor import run_db
+from src.database.sharding import SHARD_ID_SPAN, init_shards, reset_shards, route_by_id, shard_paths
+from src.database.write_queue import flush_writes, queue_write
+from tests.conftest import connect_db
+
+
+@pytest.fixture
+def shards(tmp_path):
+    db_path = str(tmp_path / "events.db")
+    paths = init_shards(db_path, 3)
+    yield db_path, paths
+    reset_shards()
+
+
+def _count(path, table):
+    with connect_db(path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_events_routed_by_chat(shards):
+    """Мероприятия чата попадают в его шард, ID определяет шард при чтении"""
+    db_path, paths = shards
+    assert shard_paths(db_path) == paths and len(paths) == 3
+
+    first = add_event(db_path, "Чат 3", "01.01.2030", "12:00", None, 1, 3, None)
+    second = add_event(db_path, "Чат 4", "01.01.2030", "12:00", None, 1, 4, None)
+
+    assert first // SHARD_ID_SPAN == 0 and second // SHARD_ID_SPAN == 1
+    assert _count(paths[0], "events") == 1 and _count(paths[1], "events") == 1
+    assert get_event(db_path, second).description == "Чат 4"
+
+    join_event(db_path, second, 10, "Участник")
+    assert [p.user_id for p in get_event(db_path, second).participants] == [10]
+
+
+def test_chat_stays_on_its_shard_after_resharding(tmp_path):
+    """Закрепление чата сохраняется при изменении числа шардов"""
+    db_path = str(tmp_path / "events.db")
+    add_event(init_shards(db_path, 1)[0], "До шардирования", "01.01.2030", "12:00", None, 1, 5, None)
+
+    init_shards(db_path, 2)
+    try:
+        event_id = add_event(db_path, "После", "02.01.2030", "12:00", None, 1, 5, None)
+    finally:
+        reset_shards()
+
+    # Чат 5 уже был в исходном файле, поэтому остаётся в шарде 0
+    assert event_id < SHARD_ID_SPAN
+    assert _count(db_path, "events") == 2
+
+
+def test_user_queries_fan_out(shards):
+    """Мероприятия и шаблоны пользователя собираются из всех шардов"""
+    db_path, _ = shards
+    events = [add_event(db_path, f"Чат {chat}", "01.01.2030", "12:00", None, 1, chat, None) for chat in (3, 4, 5)]
+    for event_id in events:
+        join_event(db_path, event_id, 7, "Участник")
+    add_template(db_path, 7, "Шаблон", "Описание", None, "12:00", None)
+
+    assert sorted(e.id for e in get_events_by_participant(db_path, 7)) == sorted(events)
+    assert [t.name for t in get_user_templates(db_path, 7)] == ["Шаблон"]
+
+
+async def test_write_queue_routes_to_shard(shards):
+    """Очередь записи выполняет операцию в шарде мероприятия"""
+    db_path, _ = shards
+    event_id = add_event(db_path, "Чат 5", "01.01.2030", "12:00", None, 1, 5, None)
+
+    result = queue_write(db_path, apply_join_event, event_id, 8, "Участник")
+    await flush_writes()
+
+    assert (await result)["status"] == "participant"
+    assert [p.user_id for p in get_event(db_path, event_id).participants] == [8]
+
+
+async def test_shards_have_own_writer_threads(shards):
+    """Запись в разные шарды выполняется в разных потоках, в один шард - в одном"""
+    db_path, _ = shards
+    first = add_event(db_path, "Чат 3", "01.01.2030", "12:00", None, 1, 3, None)
+    second = add_event(db_path, "Чат 4", "01.01.2030", "12:00", None, 1, 4, None)
+
+    @route_by_id()
+    def writer_thread(db_path, event_id):
+        return threading.current_thread().name
+
+    threads = [await run_db(writer_thread, db_path, event_id) for event_id in (first, second, second)]
+
+    assert threads[0] != threads[1] and threads[1] == threads[2]
+
+
+def test_id_outside_shards_is_rejected(shards):
+    """ID вне диапазонов шардов не читается и не пишется в шард 0"""
+    db_path, _ = shards
+
+    with pytest.raises(ValueError):
+        get_event(db_path, 5 * SHARD_ID_SPAN + 1)
+    with pytest.raises(ValueError):
+        join_event(db_path, -1, 10, "Участник")
@@ -0,0 +1,84 @@
+from datetime import datetime
+
+from config import tz
+from src.database.db_operations import (
+    add_event,
+    get_event,
+    get_expired_events,
+    get_upcoming_events,
+    update_event_field,
+)
+from src.database.init_database import init_db
+from src.utils.utils import to_starts_at
+from tests.conftest import connect_db
+
+
+def _clear_events(db_path):
+    with connect_db(db_path) as conn:
+        conn.execute("DELETE FROM events")
+
+
+def _add(db_path, date, time="12:00"):
+    return add_event(db_path, "Мероприятие", date, time, None, 123, 456, None)
+
+
+def test_add_event_and_update_keep_starts_at(test_databases):
+    """starts_at вычисляется при создании и пересчитывается при смене даты или времени"""
+    db_path = test_databases["main_db"]
+    _clear_events(db_path)
+
+    event_id = _add(db_path, "01.01.2030")
+    event = get_event(db_path, event_id)
+    assert event["starts_at"] == int(datetime(2030, 1, 1, 12, 0, tzinfo=tz).timestamp())
+
+    update_event_field(db_path, event_id, "time", "18:30")
+    assert get_event(db_path, event_id)["starts_at"] == int(datetime(2030, 1, 1, 18, 30, tzinfo=tz).timestamp())
+
+    update_event_field(db_path, event_id, "description", "Новое описание")
+    assert get_event(db_path, event_id)["starts_at"] == int(datetime(2030, 1, 1, 18, 30, tzinfo=tz).timestamp())
+
+
+def test_range_queries(test_databases):
+    """Ближайшие и прошедшие мероприятия выбираются по starts_at"""
+    db_path = test_databases["main_db"]
+    _clear_events(db_path)
+
+    past = _add(db_path, "01.01.2020")
+    soon = _add(db_path, "02.01.2030")
+    later = _add(db_path, "10.01.2030")
+    now_ts = to_starts_at("01.01.2030", "12:00", tz)
+
+    assert [e["id"] for e in get_upcoming_events(db_path, 2 * 24 * 3600, now_ts=now_ts)] == [soon]
+    assert [e["id"] for e in get_expired_events(db_path, now_ts=now_ts)] == [past]
+    assert later not in [e["id"] for e in get_upcoming_events(db_path, 24 * 3600, now_ts=now_ts)]
+
+
+def test_starts_at_backfilled_for_existing_events(tmp_path):
+    """Миграция заполняет starts_at у существующих мероприятий и пропускает неразборчивые даты"""
+    db_path = tmp_path / "old.db"
+    with connect_db(db_path) as conn:
+        conn.execute(
+            """
+            CREATE TABLE events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                description TEXT NOT NULL,
+                date TEXT NOT NULL,
+                time TEXT NOT NULL,
+                participant_limit INTEGER,
+                creator_id INTEGER NOT NULL,
+                chat_id INTEGER,
+                message_id INTEGER,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute("INSERT INTO events VALUES (1, 'A', '05.03.2030', '10:15', NULL, 1, 2, 3, 'x', 'x')")
+        conn.execute("INSERT INTO events VALUES (2, 'B', 'завтра', '10:15', NULL, 1, 2, 3, 'x', 'x')")
+
+    init_db(db_path)
+
+    with connect_db(db_path) as conn:
+        rows = dict(conn.execute("SELECT id, starts_at FROM events").fetchall())
+
+    assert rows == {1: to_starts_at("05.03.2030", "10:15", tz), 2: None}
@@ -0,0 +1,78 @@
+import asyncio
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+
+from src.database import db_executor, write_queue
+from src.database.db_executor import get_lock_stats
+from src.database.db_operations import apply_join_event, apply_save_user, get_event
+from src.database.write_queue import flush_writes, queue_write
+from tests.conftest import connect_db
+
+
+def _insert_event(db_path, limit):
+    with connect_db(db_path) as conn:
+        conn.execute(
+            "INSERT INTO events (id, description, date, time, participant_limit, creator_id, created_at, updated_at) "
+            "VALUES (1, 'Test Event', '01.01.2030', '12:00', ?, 123, 'x', 'x')",
+            (limit,),
+        )
+
+
+async def test_writes_grouped_into_one_transaction(test_databases):
+    """Одновременные нажатия фиксируются одной транзакцией, лимит соблюдается"""
+    db_path = test_databases["main_db"]
+    _insert_event(db_path, 2)
+
+    with patch.object(write_queue, "immediate_transaction", wraps=write_queue.immediate_transaction) as tx:
+        results = await asyncio.gather(*(
+            queue_write(db_path, apply_join_event, 1, user_id, f"Пользователь {user_id}")
+            for user_id in range(1, 6)
+        ))
+
+    assert tx.call_count == 1
+    assert [r["status"] for r in results] == ["participant", "participant", "reserve", "reserve", "reserve"]
+    assert len(get_event(db_path, 1)["reserve"]) == 3
+
+
+async def test_failed_write_does_not_affect_batch(test_databases):
+    """Ошибка одной операции откатывает только её"""
+    db_path = test_databases["main_db"]
+
+    def broken(cursor):
+        cursor.execute("INSERT INTO users (id, created_at, updated_at) VALUES (777, 'x', 'x')")
+        raise ValueError("boom")
+
+    ok = queue_write(db_path, apply_save_user, 555, "Имя", None, "user")
+    failed = queue_write(db_path, broken)
+    await flush_writes()
+
+    assert ok.result() is None
+    with pytest.raises(ValueError):
+        failed.result()
+    with connect_db(db_path) as conn:
+        ids = {row[0] for row in conn.execute("SELECT id FROM users")}
+    assert 555 in ids and 777 not in ids
+
+
+async def test_locked_batch_retried_by_run_db(test_databases, monkeypatch):
+    """Пачка, заставшая блокировку, повторяется через run_db, а не ожиданием в потоке записи"""
+    monkeypatch.setattr(db_executor, "DB_LOCK_RETRY_BASE_MS", 1)
+    db_path = test_databases["main_db"]
+    commit_path = write_queue._commit_path
+    attempts = []
+
+    def locked_once(path, batch):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return commit_path(path, batch)
+
+    monkeypatch.setattr(write_queue, "_commit_path", locked_once)
+    get_lock_stats(reset=True)
+    result = queue_write(db_path, apply_save_user, 556, "Имя", None, "user")
+    await flush_writes()
+
+    assert result.result() is None and len(attempts) == 2
+    assert get_lock_stats(reset=True)["retries"] == 1